@@ -1,22 +1,39 @@
 import os
-from google.adk import Agent
-from .tools import list_products, check_inventory, update_inventory, search_supplier, place_supplier_order
+import threading
+from typing import TYPE_CHECKING, Union
+from .config import load_env
+from .context_budget import get_context_compactor
+from .instrumentation import instrument, start_exporters_from_env
+from .stock_ledger import end_failed_tool_call, end_tool_call, record_tool_call
+from .async_tools import (
+    list_products, check_inventory, update_inventory, check_inventory_many,
+    update_inventory_many, search_supplier, place_supplier_order, plan_restock, execute_restock
+)
 
-def create_inventory_agent(model_name: str = "gemini-2.0-flash-exp") -> Agent:
+if TYPE_CHECKING:
+    from google.adk import Agent
+    from google.adk.models import BaseLlm
+
+def create_inventory_agent(model_name: Union[str, "BaseLlm"] = "gemini-2.0-flash-exp") -> "Agent":
     """Creates and configures the Inventory Manager agent.
 
     Args:
-        model_name: The name of the model to use.
+        model_name: The name of the model to use, or a model instance
+            (e.g. the scripted fake model used by benchmarks).
 
     Returns:
         A configured ADK Agent instance.
     
     Note:
-        Requires GOOGLE_API_KEY environment variable to be set.
+        Requires GOOGLE_API_KEY environment variable to be set when a
+        model name is given.
     """
+    # Imported here: google.adk dominates the package's import time
+    from google.adk import Agent
     
+    load_env()
     # Verify API key is set
-    if not os.getenv("GOOGLE_API_KEY"):
+    if isinstance(model_name, str) and not os.getenv("GOOGLE_API_KEY"):
         raise ValueError(
             "GOOGLE_API_KEY environment variable not set. "
             "Please set it in your .env file or environment."
@@ -29,6 +46,7 @@ def create_inventory_agent(model_name: str = "gemini-2.0-flash-exp") -> Agent:
     **Your Capabilities:**
     - List all available products and their stock levels
     - Check current stock levels for any product
+    - Check or update several products at once with the batch tools
     - Monitor and restock low inventory items
     - Search for products from suppliers
     - Place orders with suppliers
@@ -59,6 +77,23 @@ def create_inventory_agent(model_name: str = "gemini-2.0-flash-exp") -> Agent:
     4. Place an order for sufficient quantity (target: 20 units)
     5. Update the local inventory to reflect the order
     
+    To restock everything that is low, do not walk through products one by one:
+    call plan_restock to preview the orders, and execute_restock to place them
+    and update the inventory in a single call.
+    
+    Tools answer with compact JSON. Failures carry an "error" code and a
+    "message": "insufficient_stock" lists the "current" stock of the products
+    that would go below zero, and nothing was changed.
+    
+    Product names are matched case- and plural-insensitively. If a tool answers
+    with error "unknown_product", its "suggestions" map each requested name to
+    similar products (an empty list: no such product): retry with a suggested
+    name when it clearly is what the user meant; otherwise ask the user. Only
+    pass new_product=true when the user really wants to add a new product.
+    
+    When a request involves several products, use check_inventory_many and
+    update_inventory_many instead of calling the single-product tools repeatedly.
+    
     **Important Boundaries:**
     You ONLY handle inventory management tasks. If a user asks about:
     - Topics unrelated to inventory (weather, sports, general chat, etc.)
@@ -71,15 +106,47 @@ def create_inventory_agent(model_name: str = "gemini-2.0-flash-exp") -> Agent:
     Always be helpful, clear, and professional in your responses.
     """
 
+    tools = [
+        list_products, check_inventory, update_inventory, check_inventory_many,
+        update_inventory_many, search_supplier, place_supplier_order, plan_restock, execute_restock
+    ]
+    # No-op unless INVENTORY_METRICS=true
+    tools = [instrument(f"tool.{tool.__name__}")(tool) for tool in tools]
+    start_exporters_from_env()
+    # None unless INVENTORY_CONTEXT_BUDGET is set
+    compactor = get_context_compactor()
+    
     agent = Agent(
         model=model_name,
         name="inventory_manager",
         description="Manages inventory levels by checking stock and ordering from suppliers.",
         instruction=instruction,
-        tools=[list_products, check_inventory, update_inventory, search_supplier, place_supplier_order]
+        tools=tools,
+        # Attributes stock movements in the ledger to the session and tool
+        before_tool_callback=record_tool_call,
+        after_tool_callback=end_tool_call,
+        on_tool_error_callback=end_failed_tool_call,
+        # Compacts stale tool outputs in long sessions to stay within the context budget
+        before_model_callback=compactor.before_model_callback if compactor else None,
+        after_model_callback=compactor.after_model_callback if compactor else None
     )
     
     return agent
 
-# Export as root_agent for ADK web interface
-root_agent = create_inventory_agent()
+_root_agent = None
+_root_agent_lock = threading.Lock()
+
+def get_root_agent() -> "Agent":
+    """The default agent, created on first use rather than at import."""
+    global _root_agent
+    if _root_agent is None:
+        with _root_agent_lock:
+            if _root_agent is None:
+                _root_agent = create_inventory_agent()
+    return _root_agent
+
+def __getattr__(name):
+    # Export root_agent for the ADK web interface, built when it is first looked up
+    if name == 'root_agent':
+        return get_root_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
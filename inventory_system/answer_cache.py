@@ -0,0 +1,171 @@
+"""
+Answer cache for repeated read-only questions.
+
+Users ask the same questions ("how many laptops do we have?") many times an
+hour. With ANSWER_CACHE=true, a turn whose tool calls only read stock is
+cached under its normalized message and the inventory version it was
+answered at; the same question is then answered from the cache, without a
+model call, until any stock update bumps the version. Entries also expire
+after ANSWER_CACHE_TTL seconds, to pick up changes made outside the server.
+
+The version only counts this process's updates, so the server turns the
+cache off when several workers share MySQL or SQLite storage.
+
+A session opts out by setting the `answer_cache` key of its state to false.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+from .config import env_flag
+
+# Session state key: false skips the cache for the session
+SESSION_STATE_KEY = 'answer_cache'
+
+# Tools whose calls leave stock and supplier orders untouched
+READ_ONLY_TOOLS = frozenset({'list_products', 'check_inventory', 'check_inventory_many'})
+
+
+def normalize_message(message: str) -> str:
+    """Cache key for a question: case, punctuation and spacing insensitive."""
+    return " ".join(re.sub(r"[^\w\s]", " ", message.casefold()).split())
+
+
+def conversation_digest(events) -> str:
+    """Digest of the texts a session's turns exchanged so far ('' before
+    its first turn), so answers are only reused in the same conversation."""
+    digest = None
+    for event in events:
+        if not event.content:
+            continue
+        for part in event.content.parts or ():
+            if part.text:
+                digest = digest or hashlib.blake2b(digest_size=16)
+                digest.update(f"{event.content.role}\0{normalize_message(part.text)}\0".encode())
+    return digest.hexdigest() if digest else ''
+
+
+class CachedAnswer(NamedTuple):
+    version: int
+    expires_at: float
+    response: str
+    tools_used: Tuple[str, ...]
+
+
+class AnswerCache:
+    """Answers keyed by normalized question, valid for one inventory version.
+
+    The conversation so far (see conversation_digest) is part of the key:
+    the agent greets and lists products on a first message, and later
+    questions may refer back to earlier turns.
+    """
+
+    def __init__(self, version: Callable[[], int], ttl: float = 300.0, max_entries: int = 1024):
+        self.version = version
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (normalized message, conversation digest) -> CachedAnswer
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0, 'misses': 0, 'stale': 0, 'expired': 0, 'stores': 0,
+            'not_read_only': 0, 'evictions': 0, 'bypassed': 0,
+        }
+
+    def lookup(self, message: str, context: str) -> Optional[CachedAnswer]:
+        """The cached answer to `message`, asked after the turns digested in
+        `context`, at the current inventory version."""
+        key = (normalize_message(message), context)
+        version = self.version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.version != version:
+                    self._stats['stale'] += 1
+                    del self._entries[key]
+                elif entry.expires_at <= time.monotonic():
+                    self._stats['expired'] += 1
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry
+            self._stats['misses'] += 1
+        return None
+
+    def store(self, message: str, context: str, version: int, response: str, tools_used: Iterable[str]):
+        """Cache a turn answered at inventory `version`.
+
+        Only answers grounded in stock readings are kept: at least one tool
+        call, all of them read-only, and no stock change since `version`.
+        """
+        tools_used = tuple(tools_used)
+        if not response or not tools_used or not READ_ONLY_TOOLS.issuperset(tools_used):
+            with self._lock:
+                self._stats['not_read_only'] += 1
+            return
+        if self.version() != version:
+            with self._lock:
+                self._stats['stale'] += 1
+            return
+        key = (normalize_message(message), context)
+        with self._lock:
+            self._entries[key] = CachedAnswer(version, time.monotonic() + self.ttl, response, tools_used)
+            self._entries.move_to_end(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def bypassed(self):
+        """Count a turn of a session that opted out."""
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def answer_cache_enabled() -> bool:
+    """Whether ANSWER_CACHE puts the answer cache in front of the agent."""
+    return env_flag('ANSWER_CACHE')
+
+
+def session_uses_cache(state) -> bool:
+    return state.get(SESSION_STATE_KEY, True) is not False
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Process-wide answer cache over get_inventory_backend()'s stock
+    version, or None when ANSWER_CACHE was off as the backend was built.
+
+    ANSWER_CACHE_TTL (default 300s), ANSWER_CACHE_SIZE (1024).
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        from .database import get_inventory_backend, inventory_version
+        backend = get_inventory_backend()
+        # The backend factory reads ANSWER_CACHE: no versioned backend, no cache
+        if inventory_version(backend) is None:
+            return None
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    lambda: inventory_version(backend),
+                    ttl=float(os.getenv('ANSWER_CACHE_TTL', 300)),
+                    max_entries=int(os.getenv('ANSWER_CACHE_SIZE', 1024))
+                )
+    return _answer_cache
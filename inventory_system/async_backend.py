@@ -0,0 +1,167 @@
+"""
+Async inventory backends so tools never block the event loop that drives
+the ADK runner.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple, Union
+from .config import env_flag
+from .database import CoalescingInventory, InventoryBackend, find_backend, get_inventory_backend, use_mysql, use_sqlite
+from .results import StockChange, StockError, StockLevel
+from .single_flight import AsyncSingleFlight, Generation
+
+class AsyncInventoryBackend(ABC):
+    """Abstract base class for non-blocking inventory storage backends."""
+    
+    @abstractmethod
+    async def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        """Check stock level for a product."""
+        pass
+    
+    @abstractmethod
+    async def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        """Update stock level for a product."""
+        pass
+    
+    @abstractmethod
+    async def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        """Check stock levels for several products in one call."""
+        pass
+    
+    @abstractmethod
+    async def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        """Apply several stock changes atomically: all of them or none."""
+        pass
+    
+    @abstractmethod
+    async def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        """Return up to `limit` (name, quantity) pairs ordered by name."""
+        pass
+    
+    @abstractmethod
+    async def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        """Return (name, quantity) of every product below `threshold` units, ordered by name."""
+        pass
+
+class ExecutorInventoryBackend(AsyncInventoryBackend):
+    """Runs a blocking InventoryBackend on a dedicated thread pool.
+
+    The pool is sized like the MySQL connection pool by default, so worker
+    threads never queue on the connection pool while holding an executor
+    slot. With `offload=False` calls run inline, which suits backends that
+    never do I/O (e.g. the in-memory one).
+    """
+    
+    def __init__(self, backend: InventoryBackend, max_workers: Optional[int] = None, offload: bool = True):
+        self.backend = backend
+        self.offload = offload
+        self._executor = None
+        if offload:
+            if max_workers is None:
+                max_workers = int(os.getenv('INVENTORY_EXECUTOR_WORKERS', os.getenv('MYSQL_POOL_SIZE', 5)))
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inventory-db")
+    
+    async def _call(self, method, *args):
+        if not self.offload:
+            return method(*args)
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. the stock ledger's session) into the worker
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, partial(context.run, method, *args))
+    
+    async def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return await self._call(self.backend.check_stock, product_name)
+    
+    async def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        return await self._call(self.backend.update_stock, product_name, quantity_change)
+    
+    async def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        return await self._call(self.backend.check_stock_many, product_names)
+    
+    async def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        return await self._call(self.backend.update_stock_many, changes)
+    
+    async def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return await self._call(self.backend.list_products, offset, limit, prefix)
+    
+    async def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return await self._call(self.backend.low_stock, threshold)
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads."""
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+
+class CoalescingAsyncInventory(AsyncInventoryBackend):
+    """Collapses concurrent identical reads on the event loop into one call.
+
+    Waiting callers only await the shared call, so they hold no executor
+    thread or connection. Writes start a new generation, as in
+    CoalescingInventory; pass that backend's `generation` when tools also
+    write through the blocking backend, so their writes count too.
+    """
+    
+    def __init__(self, backend: AsyncInventoryBackend, generation: Optional[Generation] = None):
+        self.backend = backend
+        self.generation = generation or Generation()
+        self._flights = AsyncSingleFlight()
+    
+    async def _read(self, method, *args):
+        result = await self._flights.do((method.__name__, args, self.generation.value), method, *args)
+        return list(result) if isinstance(result, list) else result
+    
+    async def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return await self._read(self.backend.check_stock, product_name)
+    
+    async def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        try:
+            return await self.backend.update_stock(product_name, quantity_change)
+        finally:
+            self.generation.bump()
+    
+    async def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        return await self._read(self.backend.check_stock_many, tuple(product_names))
+    
+    async def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        try:
+            return await self.backend.update_stock_many(changes)
+        finally:
+            self.generation.bump()
+    
+    async def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return await self._read(self.backend.list_products, offset, limit, prefix)
+    
+    async def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return await self._read(self.backend.low_stock, threshold)
+    
+    def stats(self) -> Dict:
+        """Coalescing counters for monitoring."""
+        return self._flights.stats()
+
+_async_backend = None
+_async_backend_lock = threading.Lock()
+
+def get_async_inventory_backend() -> AsyncInventoryBackend:
+    """Process-wide async backend over get_inventory_backend(), built on first use.
+
+    INVENTORY_COALESCE also coalesces identical reads on the event loop,
+    sharing the blocking backend's write generation.
+    """
+    global _async_backend
+    if _async_backend is None:
+        with _async_backend_lock:
+            if _async_backend is None:
+                sync_backend = get_inventory_backend()
+                # Only backends that do I/O need to leave the event loop
+                backend = ExecutorInventoryBackend(sync_backend, offload=use_mysql() or use_sqlite())
+                coalescing = find_backend(sync_backend, CoalescingInventory)
+                if env_flag('INVENTORY_COALESCE') and coalescing is not None:
+                    backend = CoalescingAsyncInventory(backend, generation=coalescing.generation)
+                _async_backend = backend
+    return _async_backend
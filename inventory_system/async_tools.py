@@ -0,0 +1,167 @@
+"""
+Async versions of the inventory tools, registered on the agent so that
+storage and supplier I/O never block the ADK event loop.
+"""
+
+import asyncio
+from typing import Dict, List, Optional
+from . import tools
+from .async_backend import get_async_inventory_backend
+from .name_resolver import ProductNameResolver, get_name_resolver, peek_name_resolver, resolver_enabled
+from .results import DATABASE_ERROR, SUPPLIER_ERROR
+from .supplier_client import get_supplier_client
+from .tools import (
+    MAX_LIST_LIMIT, _error, _product_page, _read_names, _record_new_products, _stock_response,
+    _supplier_results, _update_changes, _update_name
+)
+
+async def _name_resolver() -> Optional[ProductNameResolver]:
+    if not resolver_enabled():
+        return None
+    # The first call builds the index from storage; keep that off the event loop
+    return peek_name_resolver() or await asyncio.to_thread(get_name_resolver)
+
+async def list_products(offset: int = 0, limit: int = 50, prefix: str = "") -> Dict:
+    """Lists products available in the inventory with their current stock levels.
+    Results are paginated; call again with the suggested offset to see more.
+
+    Args:
+        offset: How many products to skip (for pagination).
+        limit: Maximum number of products to return (at most 100).
+        prefix: Only list products whose name starts with this text.
+
+    Returns:
+        {"products": {name: quantity}}, plus "next_offset" when more products
+        are available.
+    """
+    limit = max(1, min(limit, MAX_LIST_LIMIT))
+    offset = max(0, offset)
+    try:
+        # Fetch one extra row to know whether another page exists
+        products = await get_async_inventory_backend().list_products(offset, limit + 1, prefix)
+    except Exception as e:
+        return _error(DATABASE_ERROR, str(e))
+    return _product_page(products, offset, limit)
+
+async def check_inventory(product_name: str) -> Dict:
+    """Checks the local inventory for a product's stock level.
+
+    Args:
+        product_name: The name of the product to check.
+
+    Returns:
+        {"stock": {name: quantity}}.
+    """
+    names, error = _read_names(await _name_resolver(), [product_name])
+    if error:
+        return error
+    return _stock_response(await get_async_inventory_backend().check_stock(names[0]))
+
+async def update_inventory(product_name: str, quantity: int, new_product: bool = False) -> Dict:
+    """Updates the local inventory stock.
+
+    Args:
+        product_name: The name of the product.
+        quantity: The amount to add (positive) or remove (negative).
+        new_product: Set to true only to add a product that is not in the
+            inventory yet but whose name is similar to an existing one.
+
+    Returns:
+        {"updated": {name: [old, new]}}.
+    """
+    resolver = await _name_resolver()
+    name, error = _update_name(resolver, product_name, new_product)
+    if error:
+        return error
+    result = await get_async_inventory_backend().update_stock(name, quantity)
+    _record_new_products(resolver, result, [name])
+    return _stock_response(result)
+
+async def check_inventory_many(product_names: List[str]) -> Dict:
+    """Checks the local inventory for several products at once.
+
+    Args:
+        product_names: The names of the products to check.
+
+    Returns:
+        {"stock": {name: quantity}}.
+    """
+    names, error = _read_names(await _name_resolver(), product_names)
+    if error:
+        return error
+    return _stock_response(await get_async_inventory_backend().check_stock_many(names))
+
+async def update_inventory_many(changes: Dict[str, int]) -> Dict:
+    """Updates the local inventory stock of several products in one step.
+    Either every change is applied or none is.
+
+    Args:
+        changes: Mapping of product name to the amount to add (positive) or remove (negative).
+
+    Returns:
+        {"updated": {name: [old, new]}}.
+    """
+    resolver = await _name_resolver()
+    merged, error = _update_changes(resolver, changes)
+    if error:
+        return error
+    result = await get_async_inventory_backend().update_stock_many(merged)
+    _record_new_products(resolver, result, merged)
+    return _stock_response(result)
+
+async def search_supplier(query: str) -> Dict:
+    """Searches for products from an external supplier API to check availability and price.
+
+    Args:
+        query: The product name to search for.
+
+    Returns:
+        {"results": [{"id", "title", "price", "stock"}]}, at most 3.
+    """
+    try:
+        return _supplier_results(await get_supplier_client().search_async(query, limit=3))
+    except Exception as e:
+        return _error(SUPPLIER_ERROR, str(e))
+
+async def place_supplier_order(product_id: int, quantity: int) -> Dict:
+    """Places an order with the supplier.
+
+    Args:
+        product_id: The ID of the product to order (found via search_supplier).
+        quantity: The quantity to order.
+
+    Returns:
+        The order confirmation: {"product_id", "quantity", "delivery_days"}.
+    """
+    # The supplier client is blocking; run the order off the event loop
+    return await asyncio.to_thread(tools.place_supplier_order, product_id, quantity)
+
+async def plan_restock(threshold: int = 10, target: int = 20) -> Dict:
+    """Finds every product below the stock threshold and plans how much to order
+    from which supplier to bring it up to the target. Nothing is ordered.
+
+    Args:
+        threshold: Products with fewer units than this need restocking.
+        target: Stock level each restocked product should reach.
+
+    Returns:
+        {"plan": {name: {"current", "order", "supplier_id", "price"}},
+        "units", "cost"}; products without a supplier offer have a "skipped"
+        reason instead of the offer.
+    """
+    # Storage and supplier calls are blocking; run the planner off the event loop
+    return await asyncio.to_thread(tools.plan_restock, threshold, target)
+
+async def execute_restock(threshold: int = 10, target: int = 20) -> Dict:
+    """Restocks the whole catalog in one step: orders every product below the
+    threshold from its supplier and adds the ordered units to the inventory.
+
+    Args:
+        threshold: Products with fewer units than this need restocking.
+        target: Stock level each restocked product should reach.
+
+    Returns:
+        {"restocked": {name: units ordered}}, plus "skipped": {name: reason}
+        for products without a supplier offer.
+    """
+    return await asyncio.to_thread(tools.execute_restock, threshold, target)
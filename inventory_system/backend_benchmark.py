@@ -0,0 +1,122 @@
+"""
+Throughput/latency comparison of the storage backends under a mixed,
+multi-threaded workload.
+
+Usage:
+    uv run python -m inventory_system.backend_benchmark --threads 8 --ops 2000
+    uv run python -m inventory_system.backend_benchmark --backends memory,sqlite,mysql  # MySQL must be running
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from .benchmark import percentiles
+from .compact_inventory import CompactInventory
+from .database import InMemoryInventory, InventoryBackend, MySQLInventory, SQLiteInventory
+
+BACKENDS: Dict[str, Callable[[str], InventoryBackend]] = {
+    'memory': lambda workdir: InMemoryInventory(),
+    'compact': lambda workdir: CompactInventory(),
+    'sqlite': lambda workdir: SQLiteInventory(os.path.join(workdir, "bench.db")),
+    'mysql': lambda workdir: MySQLInventory(),
+}
+
+# Share of each operation in the workload
+MIX = [
+    ('check_stock', 0.60),
+    ('update_stock', 0.20),
+    ('check_stock_many', 0.10),
+    ('update_stock_many', 0.05),
+    ('list_products', 0.05),
+]
+
+
+def seed(backend: InventoryBackend, products: List[str]):
+    for start in range(0, len(products), 500):
+        backend.update_stock_many({name: 100 for name in products[start:start + 500]})
+
+
+def run_worker(backend: InventoryBackend, products: List[str], ops: int, worker_seed: int) -> Dict[str, List[float]]:
+    rng = random.Random(worker_seed)
+    names = [name for name, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    samples: Dict[str, List[float]] = {name: [] for name in names}
+    for op in rng.choices(names, weights, k=ops):
+        if op == 'check_stock':
+            call = lambda: backend.check_stock(rng.choice(products))
+        elif op == 'update_stock':
+            call = lambda: backend.update_stock(rng.choice(products), rng.choice((-1, 1)))
+        elif op == 'check_stock_many':
+            call = lambda: backend.check_stock_many(rng.sample(products, 5))
+        elif op == 'update_stock_many':
+            call = lambda: backend.update_stock_many({name: 1 for name in rng.sample(products, 5)})
+        else:
+            call = lambda: backend.list_products(rng.randrange(len(products)), 50, "")
+        started = time.perf_counter()
+        call()
+        samples[op].append(time.perf_counter() - started)
+    return samples
+
+
+def bench_backend(name: str, threads: int, ops: int, catalog: int) -> Dict:
+    with tempfile.TemporaryDirectory() as workdir:
+        backend = BACKENDS[name](workdir)
+        products = [f"SKU-{i:06d}" for i in range(catalog)]
+        seed(backend, products)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            results = list(pool.map(lambda i: run_worker(backend, products, ops, i), range(threads)))
+        wall_time = time.perf_counter() - started
+
+        if isinstance(backend, SQLiteInventory):
+            backend.close()
+
+    merged: Dict[str, List[float]] = {}
+    for samples in results:
+        for op, values in samples.items():
+            merged.setdefault(op, []).extend(values)
+    total = threads * ops
+    return {
+        'ops': total,
+        'wall_time_s': round(wall_time, 4),
+        'ops_per_sec': round(total / wall_time, 1),
+        'operations': {op: {'calls': len(values), **percentiles(values)} for op, values in merged.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inventory backends")
+    parser.add_argument("--backends", default="memory,compact,sqlite", help=f"comma-separated subset of: {', '.join(BACKENDS)}")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=2000, help="operations per thread")
+    parser.add_argument("--catalog", type=int, default=1000, help="number of products to seed")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {'config': {'threads': args.threads, 'ops_per_thread': args.ops, 'catalog': args.catalog}, 'backends': {}}
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if name not in BACKENDS:
+            parser.error(f"unknown backend: {name}")
+        result = bench_backend(name, args.threads, args.ops, args.catalog)
+        report['backends'][name] = result
+        print(f"{name:<8} {result['ops_per_sec']:>10.1f} ops/s  "
+              f"check_stock p50={result['operations']['check_stock'].get('p50_ms')}ms  "
+              f"update_stock p50={result['operations']['update_stock'].get('p50_ms')}ms")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✓ Report written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
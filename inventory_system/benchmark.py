@@ -0,0 +1,257 @@
+"""
+Concurrent load test for the inventory agent.
+
+Runs many sessions through the real Runner, tools and storage backend while a
+scripted fake model stands in for Gemini, and reports throughput, latency
+percentiles, DB connections and memory as JSON.
+
+Usage:
+    uv run python -m inventory_system.benchmark --sessions 200 --concurrency 20 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+from .config import load_env
+from .instrumentation import is_error_result
+
+# Each scenario is a list of (user message, fake model script) turns
+SCENARIOS = {
+    "greeting": [
+        ("Hello", [[("list_products", {})], "Welcome! Here are our products."]),
+    ],
+    "stock_check": [
+        ("What is the current stock of Laptop?",
+         [[("check_inventory", {"product_name": "Laptop"})], "We have Laptops in stock."]),
+    ],
+    "restock": [
+        ("Check laptop stock and restock if needed", [
+            [("check_inventory", {"product_name": "Laptop"})],
+            [("search_supplier", {"query": "Laptop"})],
+            [("place_supplier_order", {"product_id": 1, "quantity": 15})],
+            [("update_inventory", {"product_name": "Laptop", "quantity": 15})],
+            "Stock was low, ordered 15 units and updated our records.",
+        ]),
+    ],
+    "restock_all": [
+        ("Restock everything that is running low",
+         [[("execute_restock", {})], "All low-stock products were restocked."]),
+    ],
+    "batch": [
+        ("Check Laptop, Smartphone and Headphones",
+         [[("check_inventory_many", {"product_names": ["Laptop", "Smartphone", "Headphones"]})],
+          "Here are the stock levels."]),
+    ],
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max/mean of latency samples (seconds), in milliseconds."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1)]
+
+    return {
+        'p50_ms': round(rank(50) * 1000, 3),
+        'p90_ms': round(rank(90) * 1000, 3),
+        'p99_ms': round(rank(99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+
+
+def start_supplier_stub() -> ThreadingHTTPServer:
+    """Local stand-in for the supplier search API, so runs stay offline."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            body = json.dumps({'products': [
+                {'id': 1, 'title': f"{query.title()} Pro", 'price': 999.99, 'stock': 50},
+            ]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_plugin(tool_samples: Dict[str, List[float]], tool_errors: Dict[str, int]):
+    """Runner plugin recording wall time of every tool call."""
+    from google.adk.plugins import BasePlugin
+
+    class ToolTimingPlugin(BasePlugin):
+        def __init__(self):
+            super().__init__(name="tool_timing")
+            self._started = {}
+
+        async def before_tool_callback(self, *, tool, tool_args, tool_context):
+            self._started[tool_context.function_call_id] = time.perf_counter()
+
+        async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+            started = self._started.pop(tool_context.function_call_id, None)
+            if started is not None:
+                tool_samples.setdefault(tool.name, []).append(time.perf_counter() - started)
+            if is_error_result(result):
+                tool_errors[tool.name] = tool_errors.get(tool.name, 0) + 1
+
+    return ToolTimingPlugin()
+
+
+async def run_benchmark(
+    sessions: int,
+    concurrency: int,
+    scenario_names: List[str],
+    model_latency: float = 0.0,
+    trace_memory: bool = False
+) -> Dict:
+    from google.adk import Runner
+    from google.adk.apps import App
+    from google.genai import types
+    from .agent import create_inventory_agent
+    from .connection_pool import pool_stats
+    from .database import use_mysql, use_sqlite
+    from .fake_llm import ScriptedLlm
+    from .session_store import create_session_service
+
+    scripts = {}
+    for name in scenario_names:
+        for message, script in SCENARIOS[name]:
+            scripts[message] = script
+    model = ScriptedLlm(scripts=scripts, latency=model_latency)
+
+    tool_samples: Dict[str, List[float]] = {}
+    tool_errors: Dict[str, int] = {}
+    app = App(
+        name="inventory_benchmark",
+        root_agent=create_inventory_agent(model),
+        plugins=[build_plugin(tool_samples, tool_errors)]
+    )
+    session_service = create_session_service()
+    runner = Runner(app=app, session_service=session_service)
+
+    turn_samples: List[float] = []
+    failures = []
+    model_calls = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_session(i: int):
+        nonlocal model_calls
+        scenario = SCENARIOS[scenario_names[i % len(scenario_names)]]
+        user_id = f"bench-user-{i}"
+        session_id = str(uuid.uuid4())
+        async with semaphore:
+            await session_service.create_session(app_name=app.name, user_id=user_id, session_id=session_id)
+            for message, _ in scenario:
+                content = types.Content(role="user", parts=[types.Part(text=message)])
+                started = time.perf_counter()
+                try:
+                    async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+                        if event.author != "user" and event.content and not event.partial:
+                            model_calls += 1 if any(p.function_call or p.text for p in event.content.parts) else 0
+                except Exception as e:
+                    failures.append(f"{type(e).__name__}: {e}")
+                    continue
+                turn_samples.append(time.perf_counter() - started)
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(i) for i in range(sessions)))
+    wall_time = time.perf_counter() - started
+
+    memory = {}
+    if trace_memory:
+        memory['tracemalloc_peak_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    try:
+        import resource
+        memory['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+
+    pools = pool_stats()
+    return {
+        'config': {
+            'sessions': sessions,
+            'concurrency': concurrency,
+            'scenarios': scenario_names,
+            'backend': 'mysql' if use_mysql() else 'sqlite' if use_sqlite() else 'memory',
+            'model_latency_s': model_latency,
+        },
+        'wall_time_s': round(wall_time, 4),
+        'turns': len(turn_samples),
+        'turns_per_sec': round(len(turn_samples) / wall_time, 2) if wall_time else 0.0,
+        'model_calls': model_calls,
+        'failed_turns': len(failures),
+        'failures': failures[:10],
+        'turn_latency': percentiles(turn_samples),
+        'tools': {
+            name: {'calls': len(samples), 'errors': tool_errors.get(name, 0), **percentiles(samples)}
+            for name, samples in sorted(tool_samples.items())
+        },
+        'db_connections_opened': sum(p['opened'] for p in pools.values()),
+        'connection_pools': pools,
+        'memory': memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test with a scripted fake model")
+    parser.add_argument("--sessions", type=int, default=100, help="number of sessions to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions in flight at once")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="simulated seconds per model call")
+    parser.add_argument("--supplier-url", help="supplier API base URL (default: local stand-in server)")
+    parser.add_argument("--trace-memory", action="store_true", help="also report the Python heap peak (slower)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    load_env()
+
+    scenario_names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    stub = None
+    if args.supplier_url:
+        os.environ['SUPPLIER_API_URL'] = args.supplier_url
+    else:
+        stub = start_supplier_stub()
+        os.environ['SUPPLIER_API_URL'] = f"http://127.0.0.1:{stub.server_port}"
+    try:
+        report = asyncio.run(run_benchmark(
+            args.sessions, args.concurrency, scenario_names, args.model_latency, args.trace_memory
+        ))
+    finally:
+        if stub:
+            stub.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✓ Report written to {args.output}")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Compact in-memory inventory for large catalogs.
+
+Product names are interned to integer IDs and quantities live in one typed
+int64 buffer, so a catalog of hundreds of thousands of SKUs costs a few
+bytes per quantity instead of a dict slot plus a Python int each. Bulk
+updates and threshold scans are vectorized with NumPy when it is installed,
+and the whole store can be snapshotted to a file and restored via mmap.
+"""
+
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from .database import InventoryBackend, _insufficient
+from .results import StockChange, StockError, StockLevel
+
+# Snapshot layout: header, little-endian int64 quantities, then the
+# NUL-separated UTF-8 product names
+SNAPSHOT_MAGIC = b"INVSNAP1"
+SNAPSHOT_HEADER = struct.Struct("<8sQQ")  # magic, product count, names length
+
+_numpy = None
+
+
+def numpy_module():
+    """NumPy if it is installed, else None (imported on first use)."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
+
+
+class CompactInventory(InventoryBackend):
+    """In-memory inventory storing quantities in a typed array indexed by product ID."""
+
+    def __init__(self, products: Optional[Dict[str, int]] = None):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._quantities = array('q')
+        # Product IDs ordered by casefolded name, backing list_products
+        self._order = array('q')
+        self._lock = threading.Lock()
+        self.load(
+            {"Laptop": 5, "Smartphone": 20, "Headphones": 50}.items()
+            if products is None else products.items()
+        )
+
+    def _fold(self, product_id: int) -> str:
+        return self._names[product_id].casefold()
+
+    def _intern(self, product_name: str) -> int:
+        """ID of a product, creating it with 0 stock; caller holds the lock."""
+        product_id = self._ids.get(product_name)
+        if product_id is None:
+            product_id = self._ids[product_name] = len(self._names)
+            self._names.append(product_name)
+            self._quantities.append(0)
+            insort(self._order, product_id, key=self._fold)
+        return product_id
+
+    def _rebuild_order(self):
+        folded = [name.casefold() for name in self._names]
+        self._order = array('q', sorted(range(len(folded)), key=folded.__getitem__))
+
+    def load(self, items: Iterable[Tuple[str, int]]):
+        """Bulk-load (name, quantity) pairs, replacing existing quantities."""
+        with self._lock:
+            added = False
+            for name, quantity in items:
+                product_id = self._ids.get(name)
+                if product_id is None:
+                    self._ids[name] = len(self._names)
+                    self._names.append(name)
+                    added = True
+                    self._quantities.append(quantity)
+                else:
+                    self._quantities[product_id] = quantity
+            if added:
+                # One sort instead of an insort per product
+                self._rebuild_order()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        product_id = self._ids.get(product_name)
+        return StockLevel(product_name, 0 if product_id is None else self._quantities[product_id])
+
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        with self._lock:
+            product_id = self._ids.get(product_name)
+            current = 0 if product_id is None else self._quantities[product_id]
+            new_quantity = current + quantity_change
+            if new_quantity < 0:
+                return _insufficient([(product_name, current)])
+
+            self._quantities[self._intern(product_name)] = new_quantity
+        return StockChange(product_name, current, new_quantity)
+
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        ids, quantities = self._ids, self._quantities
+        levels = []
+        for name in dict.fromkeys(product_names):
+            product_id = ids.get(name)
+            levels.append(StockLevel(name, 0 if product_id is None else quantities[product_id]))
+        return levels
+
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        if not changes:
+            return []
+        names = list(changes)
+        with self._lock:
+            ids = [self._ids.get(name, -1) for name in names]
+            old, new = self._plan_deltas(ids, [changes[name] for name in names])
+            insufficient = [(name, o) for name, o, n in zip(names, old, new) if n < 0]
+            if insufficient:
+                return _insufficient(insufficient)
+            self._store([i if i >= 0 else self._intern(name) for name, i in zip(names, ids)], new)
+        return [StockChange(name, o, n) for name, o, n in zip(names, old, new)]
+
+    def _plan_deltas(self, ids: List[int], deltas: List[int]) -> Tuple[List[int], List[int]]:
+        """Old and new quantities for distinct product IDs (-1: not yet created).
+
+        Vectorized with NumPy for large batches. Caller holds the lock.
+        """
+        np = numpy_module()
+        if np is not None and len(ids) > 32 and len(self._quantities):
+            # Views must not outlive the call: the array cannot grow while exported
+            view = np.frombuffer(self._quantities, dtype=np.int64)
+            index = np.asarray(ids, dtype=np.int64)
+            old = np.where(index >= 0, view[np.maximum(index, 0)], 0)
+            del view
+            return old.tolist(), (old + np.asarray(deltas, dtype=np.int64)).tolist()
+
+        quantities = self._quantities
+        old = [quantities[i] if i >= 0 else 0 for i in ids]
+        return old, [q + d for q, d in zip(old, deltas)]
+
+    def _store(self, ids: List[int], new_quantities: List[int]):
+        """Write quantities for existing product IDs; caller holds the lock."""
+        np = numpy_module()
+        if np is not None and len(ids) > 32:
+            view = np.frombuffer(self._quantities, dtype=np.int64)
+            view[np.asarray(ids, dtype=np.int64)] = new_quantities
+            del view
+            return
+        quantities = self._quantities
+        for product_id, quantity in zip(ids, new_quantities):
+            quantities[product_id] = quantity
+
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        """(name, quantity) of every product with fewer than `threshold` units, by name."""
+        with self._lock:
+            np = numpy_module()
+            if np is not None:
+                view = np.frombuffer(self._quantities, dtype=np.int64)
+                ids = np.flatnonzero(view < threshold).tolist()
+                del view
+            else:
+                ids = [i for i, q in enumerate(self._quantities) if q < threshold]
+            rows = [(self._names[i], self._quantities[i]) for i in ids]
+        rows.sort(key=lambda row: row[0].casefold())
+        return rows
+
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        key = prefix.casefold()
+        page = []
+        with self._lock:
+            order, names, quantities = self._order, self._names, self._quantities
+            for i in range(bisect_left(order, key, key=self._fold) + max(offset, 0), len(order)):
+                product_id = order[i]
+                if len(page) >= limit or not names[product_id].casefold().startswith(key):
+                    break
+                page.append((names[product_id], quantities[product_id]))
+        return page
+
+    def snapshot(self, path: str):
+        """Write all products and quantities to `path` (atomically replaced)."""
+        with self._lock:
+            if any("\0" in name for name in self._names):
+                raise ValueError("Product names containing NUL cannot be snapshotted")
+            names = "\0".join(self._names).encode("utf-8")
+            quantities = array('q', self._quantities)
+        if sys.byteorder != "little":
+            quantities.byteswap()
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(quantities), len(names)))
+            f.write(memoryview(quantities))
+            f.write(names)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def restore(cls, path: str) -> "CompactInventory":
+        """Build an inventory from a file written by snapshot().
+
+        A missing or empty file (mmap cannot map one) holds no snapshot: the
+        inventory starts with the default products.
+        """
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return cls()
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < SNAPSHOT_HEADER.size:
+                raise ValueError(f"{path} is truncated or corrupt")
+            magic, count, names_length = SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not an inventory snapshot")
+            start = SNAPSHOT_HEADER.size
+            end = start + count * 8
+            quantities = array('q')
+            quantities.frombytes(mm[start:end])
+            names = mm[end:end + names_length].decode("utf-8").split("\0") if count else []
+        if sys.byteorder != "little":
+            quantities.byteswap()
+        if len(names) != count:
+            raise ValueError(f"{path} is truncated or corrupt")
+
+        inventory = cls(products={})
+        inventory._names = names
+        inventory._ids = {name: i for i, name in enumerate(names)}
+        inventory._quantities = quantities
+        inventory._rebuild_order()
+        return inventory
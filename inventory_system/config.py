@@ -0,0 +1,26 @@
+"""
+Environment configuration helpers.
+Loads .env on first use instead of at import time.
+"""
+
+import os
+import threading
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+def load_env():
+    """Load .env into the process environment (once)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+def env_flag(name: str, default: str = 'false') -> bool:
+    """Read a true/false environment variable, loading .env first."""
+    load_env()
+    return os.getenv(name, default).lower() == 'true'
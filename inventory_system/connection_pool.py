@@ -0,0 +1,283 @@
+"""
+Bounded MySQL connection pool shared by the inventory backend and the
+conversation logger.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from .config import load_env
+
+
+def mysql_error():
+    """Return mysql.connector.Error, importing the driver on first use.
+
+    Safe to use in except clauses (`except mysql_error() as e:`): Python only
+    evaluates the expression when an exception is being matched, so in-memory
+    deployments never pay for loading the MySQL driver.
+    """
+    from mysql.connector import Error
+    return Error
+
+
+class PooledConnection:
+    """Proxy around a pooled connection; ``close()`` returns it to the pool."""
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise mysql_error()("Connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def is_connected(self) -> bool:
+        return self._conn is not None and self._conn.is_connected()
+
+    def close(self):
+        """Return the underlying connection to the pool (idempotent)."""
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of MySQL connections.
+
+    Idle connections are re-validated with a ping when they have been idle
+    longer than ``ping_interval`` seconds and transparently replaced if the
+    server dropped them.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], object],
+        max_size: int = 5,
+        timeout: float = 10.0,
+        ping_interval: float = 30.0,
+        name: str = "mysql"
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.name = name
+
+        self._idle = deque()  # (connection, returned_at)
+        self._size = 0
+        self._cond = threading.Condition()
+        self._metrics = {
+            'checkouts': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'stale_reconnects': 0,
+            'opened': 0,
+            'closed': 0,
+        }
+
+    def _open(self):
+        conn = self._connect()
+        with self._cond:
+            self._metrics['opened'] += 1
+        return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._metrics['closed'] += 1
+            self._cond.notify()
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        if idle_for < self.ping_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection, waiting up to ``timeout`` seconds for one."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = 0.0
+
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    raise ConnectionError(
+                        f"Timed out after {timeout}s waiting for a MySQL connection "
+                        f"(pool '{self.name}', size {self.max_size})"
+                    )
+                start = time.monotonic()
+                self._cond.wait(remaining)
+                waited += time.monotonic() - start
+
+            if waited:
+                self._metrics['waits'] += 1
+                self._metrics['wait_time_total'] += waited
+                self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], waited)
+            self._metrics['checkouts'] += 1
+
+            if self._idle:
+                conn, returned_at = self._idle.pop()
+            else:
+                conn, returned_at = None, None
+                self._size += 1
+                self._metrics['misses'] += 1
+
+        if conn is not None and not self._is_healthy(conn, time.monotonic() - returned_at):
+            with self._cond:
+                self._metrics['stale_reconnects'] += 1
+                self._metrics['closed'] += 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn = None
+
+        if conn is None:
+            try:
+                conn = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        return PooledConnection(self, conn)
+
+    def _release(self, conn):
+        try:
+            healthy = conn.is_connected()
+            if healthy and getattr(conn, 'in_transaction', False):
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        if not healthy:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def health_check(self) -> int:
+        """Ping every idle connection and drop the dead ones.
+
+        Returns:
+            The number of connections that were discarded.
+        """
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+
+        dropped = 0
+        for conn, returned_at in idle:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                dropped += 1
+                self._discard(conn)
+                continue
+            with self._cond:
+                self._idle.append((conn, returned_at))
+                self._cond.notify()
+        return dropped
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict:
+        """Snapshot of pool metrics for monitoring."""
+        with self._cond:
+            stats = dict(self._metrics)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['max_size'] = self.max_size
+        checkouts = stats['checkouts']
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        stats['miss_rate'] = stats['misses'] / checkouts if checkouts else 0.0
+        return stats
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: Dict) -> ConnectionPool:
+    """Return the process-wide pool for a MySQL config, creating it on first use.
+
+    Pool behaviour is configured through environment variables:
+    MYSQL_POOL_SIZE (default 5), MYSQL_POOL_TIMEOUT (seconds to wait for a free
+    connection, default 10) and MYSQL_POOL_PING_INTERVAL (seconds a connection
+    may sit idle before it is re-validated, default 30).
+    """
+    key = tuple(sorted(config.items()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            import mysql.connector
+            load_env()
+            pool = ConnectionPool(
+                lambda: mysql.connector.connect(**config),
+                max_size=int(os.getenv('MYSQL_POOL_SIZE', 5)),
+                timeout=float(os.getenv('MYSQL_POOL_TIMEOUT', 10)),
+                ping_interval=float(os.getenv('MYSQL_POOL_PING_INTERVAL', 30)),
+                name=f"{config.get('user')}@{config.get('host')}:{config.get('port')}/{config.get('database')}"
+            )
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Metrics for every pool in this process, keyed by pool name."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def close_pools():
+    """Close the idle connections of every pool in this process (on shutdown)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def _forget_pools_after_fork():
+    # A forked worker must not share the parent's sockets: start with no pools
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_pools_after_fork)
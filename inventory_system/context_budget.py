@@ -0,0 +1,225 @@
+"""
+Context budgeting for long inventory sessions.
+
+Every model call re-sends the whole conversation, including each
+list_products page and supplier search made so far, so prompt size grows
+with session length. Once a request's history goes over
+INVENTORY_CONTEXT_BUDGET estimated tokens, stale tool outputs in the
+outgoing request (never in the stored session) are replaced by short
+summaries, in this order until the request fits:
+
+1. outputs superseded by a later call: a newer reading or update of the
+   same products, a newer search for the same query, a newer restock plan;
+2. outputs of earlier turns, oldest first.
+
+A superseded output becomes {"superseded": true} and an earlier one a
+{"stale": ...} count of what it held; the calls themselves stay in the
+history. Outputs of the current turn that nothing superseded are always
+kept whole.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .config import load_env
+from .supplier_client import normalize_query
+
+# Sessions whose counters are kept for stats()
+MAX_TRACKED_SESSIONS = 1000
+
+# Keys of tool outputs that report stock by product name, and what the tool did
+_STOCK_KEYS = {'products': 'listed', 'stock': 'read', 'updated': 'updated'}
+
+
+def estimate_tokens(contents) -> int:
+    """Rough token count (~4 characters per token) of a request's contents."""
+    chars = 0
+    for content in contents:
+        for part in content.parts or ():
+            if part.text:
+                chars += len(part.text)
+            if part.function_call:
+                chars += len(part.function_call.name or "") + len(str(part.function_call.args or {}))
+            if part.function_response:
+                chars += len(part.function_response.name or "") + len(str(part.function_response.response or {}))
+    return max(1, chars // 4)
+
+
+def _subjects(name: str, args: Dict, response: Dict) -> Tuple:
+    """What a tool output reports on, so later outputs can supersede it."""
+    if 'error' in response:
+        return ()
+    for key in _STOCK_KEYS:
+        if isinstance(response.get(key), dict):
+            return tuple(('stock', product) for product in response[key])
+    if name == 'search_supplier':
+        return (('search', normalize_query(str(args.get('query', '')))),)
+    if name == 'plan_restock':
+        return (('restock_plan',),)
+    return ()
+
+
+def summarize(name: str, args: Dict, response: Dict, superseded: bool) -> Dict:
+    """Short stand-in for a stale tool output. The call's arguments stay in
+    the history, so the summary only needs to say what became of it."""
+    if 'error' in response:
+        return {'error': response['error']}
+    if superseded:
+        return {'superseded': True}
+    for key, verb in _STOCK_KEYS.items():
+        if isinstance(response.get(key), dict):
+            return {'stale': f"{verb} {len(response[key])} products"}
+    if name == 'search_supplier':
+        return {'stale': f"{len(response.get('results') or [])} supplier results"}
+    if name == 'plan_restock':
+        return {'stale': f"plan for {len(response.get('plan') or {})} products"}
+    return {'stale': True}
+
+
+class ContextCompactor:
+    """Keeps the history sent to the model within a token budget.
+
+    Installed as the agent's before/after model callbacks; counts prompt
+    tokens per session before and after compaction.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._sessions = OrderedDict()  # session id -> counters
+        self._lock = threading.Lock()
+
+    def _tool_outputs(self, contents) -> List[Dict]:
+        """Every function response in the request, with its call's arguments
+        and whether it belongs to the current turn."""
+        last_user = max(
+            (i for i, content in enumerate(contents)
+             if content.role == "user" and any(part.text for part in content.parts or ())),
+            default=-1
+        )
+        pending, outputs = {}, []
+        for i, content in enumerate(contents):
+            for j, part in enumerate(content.parts or ()):
+                if part.function_call:
+                    # Call ids may be stripped from the request: pair by name and order
+                    pending.setdefault(part.function_call.name, []).append(dict(part.function_call.args or {}))
+                elif part.function_response and isinstance(part.function_response.response, dict):
+                    name = part.function_response.name
+                    calls = pending.get(name)
+                    outputs.append({
+                        'position': (i, j),
+                        'name': name,
+                        'args': calls.pop(0) if calls else {},
+                        'response': part.function_response.response,
+                        'current_turn': i > last_user,
+                    })
+        return outputs
+
+    def _stale(self, outputs: List[Dict]) -> List[Tuple[Dict, bool]]:
+        """Outputs that may be compacted, most stale first, with whether
+        each one was superseded."""
+        seen, superseded = set(), []
+        for output in reversed(outputs):
+            subjects = _subjects(output['name'], output['args'], output['response'])
+            output['superseded'] = bool(subjects) and all(subject in seen for subject in subjects)
+            seen.update(subjects)
+            if output['superseded']:
+                superseded.append(output)
+        superseded.reverse()
+        earlier = [o for o in outputs if not o['superseded'] and not o['current_turn']]
+        return [(o, True) for o in superseded] + [(o, False) for o in earlier]
+
+    def compact(self, contents) -> Tuple[int, int, int]:
+        """Compact `contents` in place until they fit the budget.
+
+        Only Part objects are replaced: the request's parts are copies, but
+        their payloads are shared with the session events.
+        Returns (tokens before, tokens after, outputs compacted).
+        """
+        from google.genai import types
+
+        before = tokens = estimate_tokens(contents)
+        compacted = 0
+        if tokens <= self.budget:
+            return before, tokens, compacted
+        for output, superseded in self._stale(self._tool_outputs(contents)):
+            i, j = output['position']
+            part = contents[i].parts[j]
+            summary = summarize(output['name'], output['args'], output['response'], superseded)
+            saved = (len(str(output['response'])) - len(str(summary))) // 4
+            if saved <= 0:
+                continue
+            contents[i].parts[j] = types.Part(function_response=types.FunctionResponse(
+                id=part.function_response.id, name=output['name'], response=summary
+            ))
+            tokens -= saved
+            compacted += 1
+            if tokens <= self.budget:
+                break
+        return before, max(1, tokens), compacted
+
+    def _counters(self, session_id: str) -> Dict:
+        counters = self._sessions.get(session_id)
+        if counters is None:
+            counters = self._sessions[session_id] = {
+                'model_calls': 0, 'prompt_tokens': 0, 'sent_tokens': 0, 'tokens_saved': 0,
+                'compacted_outputs': 0, 'last_prompt_tokens': 0, 'reported_prompt_tokens': 0,
+            }
+            while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return counters
+
+    def before_model_callback(self, callback_context, llm_request):
+        before, after, compacted = self.compact(llm_request.contents)
+        with self._lock:
+            counters = self._counters(callback_context.session.id)
+            counters['model_calls'] += 1
+            counters['prompt_tokens'] += before
+            counters['sent_tokens'] += after
+            counters['tokens_saved'] += before - after
+            counters['compacted_outputs'] += compacted
+            counters['last_prompt_tokens'] = after
+        return None
+
+    def after_model_callback(self, callback_context, llm_response):
+        # Prompt tokens as counted by the model, when it reports usage
+        usage = llm_response.usage_metadata
+        if usage and usage.prompt_token_count:
+            with self._lock:
+                self._counters(callback_context.session.id)['reported_prompt_tokens'] += usage.prompt_token_count
+        return None
+
+    def session_stats(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            counters = self._sessions.get(session_id)
+            return dict(counters) if counters is not None else None
+
+    def stats(self) -> Dict:
+        """Totals over the tracked sessions, for monitoring."""
+        with self._lock:
+            totals = {'budget': self.budget, 'sessions': len(self._sessions)}
+            for key in ('model_calls', 'prompt_tokens', 'sent_tokens', 'tokens_saved', 'compacted_outputs'):
+                totals[key] = sum(counters[key] for counters in self._sessions.values())
+        return totals
+
+
+def context_budget() -> int:
+    """INVENTORY_CONTEXT_BUDGET in estimated tokens (0 or unset: no compaction)."""
+    load_env()
+    return int(os.getenv('INVENTORY_CONTEXT_BUDGET') or 0)
+
+
+_compactor: Optional[ContextCompactor] = None
+_compactor_lock = threading.Lock()
+
+
+def get_context_compactor() -> Optional[ContextCompactor]:
+    """Process-wide compactor, or None when no context budget is set."""
+    global _compactor
+    if _compactor is None:
+        with _compactor_lock:
+            budget = context_budget()
+            if _compactor is None and budget > 0:
+                _compactor = ContextCompactor(budget)
+    return _compactor
@@ -0,0 +1,128 @@
+"""
+Compressed on-disk archive of old conversation turns.
+
+Turns older than the retention period are moved out of the `conversations`
+table into one gzip-compressed JSONL file per month, where the logger can
+still read them when archived history is asked for.
+
+Usage (e.g. from cron):
+    uv run python -m inventory_system.conversation_archive --days 90
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+MONTH_FILE = re.compile(r"conversations-(\d{4})-(\d{2})\.jsonl\.gz$")
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+class ConversationArchive:
+    """Monthly `conversations-YYYY-MM.jsonl.gz` files in one directory.
+
+    Each archiving run appends a new gzip member to the month's file, which
+    gzip readers treat as one continuous stream. A turn archived twice (a
+    run interrupted between writing and deleting) is returned once.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, year: int, month: int) -> str:
+        return os.path.join(self.directory, f"conversations-{year:04d}-{month:02d}.jsonl.gz")
+
+    def months(self) -> List[Tuple[int, int]]:
+        """(year, month) of every archive file, oldest first."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, "conversations-*.jsonl.gz")):
+            match = MONTH_FILE.search(path)
+            if match:
+                found.append((int(match.group(1)), int(match.group(2))))
+        return sorted(found)
+
+    def write(self, rows: Sequence[Dict]) -> int:
+        """Append turns to their month's file and fsync it; returns rows written."""
+        by_month: Dict[Tuple[int, int], List[Dict]] = {}
+        for row in rows:
+            created_at = _as_datetime(row['created_at'])
+            by_month.setdefault((created_at.year, created_at.month), []).append(row)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for (year, month), month_rows in by_month.items():
+            with open(self._path(year, month), "ab") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                    for row in month_rows:
+                        f.write((json.dumps(row, default=str) + "\n").encode("utf-8"))
+                raw.flush()
+                os.fsync(raw.fileno())
+        return len(rows)
+
+    def _read_month(self, year: int, month: int) -> List[Dict]:
+        seen = set()
+        rows = []
+        with gzip.open(self._path(year, month), "rt", encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                if row['id'] in seen:
+                    continue
+                seen.add(row['id'])
+                row['created_at'] = _as_datetime(row['created_at'])
+                rows.append(row)
+        rows.sort(key=lambda r: (r['created_at'], r['id']))
+        return rows
+
+    def iter_rows(
+        self,
+        session_id: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        after: Optional[Tuple[datetime, int]] = None,
+        before: Optional[Tuple[datetime, int]] = None,
+        newest_first: bool = False
+    ) -> Iterator[Dict]:
+        """Archived turns in (created_at, id) order, strictly between the
+        `after` and `before` keys when given. Only one month is decoded at a time."""
+        months = self.months()
+        if after is not None:
+            months = [m for m in months if m >= (after[0].year, after[0].month)]
+        if before is not None:
+            months = [m for m in months if m <= (before[0].year, before[0].month)]
+        if newest_first:
+            months.reverse()
+
+        for year, month in months:
+            rows = self._read_month(year, month)
+            if newest_first:
+                rows.reverse()
+            for row in rows:
+                key = (row['created_at'], row['id'])
+                if session_id is not None and row['session_id'] != session_id:
+                    continue
+                if (after is not None and key <= after) or (before is not None and key >= before):
+                    continue
+                yield {col: row.get(col) for col in columns} if columns else row
+
+
+def main():
+    from .conversation_logger import get_conversation_logger
+
+    parser = argparse.ArgumentParser(description="Move old conversation turns to the compressed archive")
+    parser.add_argument("--days", type=int, help="archive turns older than this (default: CONVERSATION_RETENTION_DAYS or 90)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logger = get_conversation_logger()
+    days = args.days if args.days is not None else logger.retention_days
+    moved = logger.archive_old_turns(days, batch_size=args.batch_size)
+    print(f"✓ Archived {moved} turns older than {days} days to {logger.archive.directory}")
+
+
+if __name__ == "__main__":
+    main()
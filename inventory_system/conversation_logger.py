@@ -3,19 +3,49 @@ Conversation persistence for MySQL.
 Stores user questions, agent reasoning, and responses.
 """
 
+import atexit
+import base64
+import json
 import os
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict
-import mysql.connector
-from mysql.connector import Error
-from dotenv import load_dotenv
+from typing import Iterator, Optional, List, Dict, Sequence, Tuple
+from .config import load_env
+from .connection_pool import get_pool, mysql_error
+from .conversation_archive import ConversationArchive
+from .log_writer import BatchedLogWriter
 
-load_dotenv()
+# Columns callers may project in history queries
+HISTORY_COLUMNS = ('id', 'session_id', 'user_message', 'agent_reasoning', 'agent_response', 'tools_used', 'created_at')
+
+# Always returned: they form the pagination key
+KEY_COLUMNS = ('id', 'session_id', 'created_at')
+
+def encode_cursor(row: Dict) -> str:
+    """Opaque page cursor for the (session_id, created_at, id) key of a row."""
+    key = [row['session_id'], str(row['created_at']), row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str, int]:
+    session_id, created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return session_id, created_at, int(row_id)
+
+def _next_month(year: int, month: int) -> Tuple[int, int]:
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+def _month_partition(year: int, month: int) -> str:
+    """Partition holding the turns of one month."""
+    end_year, end_month = _next_month(year, month)
+    return (
+        f"PARTITION p{year:04d}{month:02d} VALUES LESS THAN "
+        f"(UNIX_TIMESTAMP('{end_year:04d}-{end_month:02d}-01 00:00:00'))"
+    )
 
 class ConversationLogger:
     """Logs conversations to MySQL for persistence and analysis."""
     
     def __init__(self):
+        load_env()
         self.config = {
             'host': os.getenv('MYSQL_HOST', 'localhost'),
             'user': os.getenv('MYSQL_USER', 'root'),
@@ -24,14 +54,30 @@ class ConversationLogger:
             'port': int(os.getenv('MYSQL_PORT', 3306))
         }
         self.use_mysql = os.getenv('USE_MYSQL', 'false').lower() == 'true'
+        self.partitioned = os.getenv('CONVERSATION_PARTITIONED', 'false').lower() == 'true'
+        self.retention_days = int(os.getenv('CONVERSATION_RETENTION_DAYS', 90))
+        self.archive = ConversationArchive(os.getenv('CONVERSATION_ARCHIVE_DIR', 'conversation_archive'))
+        self.writer = None
+        if self.use_mysql and os.getenv('CONVERSATION_LOG_ASYNC', 'true').lower() == 'true':
+            overflow = os.getenv('CONVERSATION_LOG_OVERFLOW', 'block')
+            self.writer = BatchedLogWriter(
+                self._insert_rows,
+                batch_size=int(os.getenv('CONVERSATION_LOG_BATCH_SIZE', 50)),
+                flush_interval=float(os.getenv('CONVERSATION_LOG_FLUSH_INTERVAL', 1.0)),
+                max_queue=int(os.getenv('CONVERSATION_LOG_MAX_QUEUE', 10000)),
+                overflow=overflow,
+                block_timeout=float(os.getenv('CONVERSATION_LOG_BLOCK_TIMEOUT', 5.0)),
+                spill_path=os.getenv('CONVERSATION_LOG_SPILL_PATH', 'conversation_log_spill.jsonl') if overflow == 'spill' else None
+            )
+            atexit.register(self.close)
     
     def _get_connection(self):
-        """Create database connection."""
+        """Check out a connection from the shared pool."""
         if not self.use_mysql:
             return None
         try:
-            return mysql.connector.connect(**self.config)
-        except Error as e:
+            return get_pool(self.config).get_connection()
+        except (mysql_error(), ConnectionError) as e:
             print(f"Warning: Could not connect to MySQL for conversation logging: {e}")
             return None
     
@@ -48,29 +94,113 @@ class ConversationLogger:
             cursor = conn.cursor()
             
             # Create conversations table
-            create_table = """
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                session_id VARCHAR(255),
-                user_message TEXT,
-                agent_reasoning TEXT,
-                agent_response TEXT,
-                tools_used TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                INDEX idx_session (session_id),
-                INDEX idx_created (created_at)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-            """
+            if self.partitioned:
+                # Partitioning needs created_at in the primary key
+                now = datetime.now()
+                create_table = f"""
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INT AUTO_INCREMENT,
+                    session_id VARCHAR(255),
+                    user_message TEXT,
+                    agent_reasoning TEXT,
+                    agent_response TEXT,
+                    tools_used TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id, created_at),
+                    INDEX idx_session_created (session_id, created_at, id),
+                    INDEX idx_created (created_at, id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+                PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+                    {_month_partition(now.year, now.month)},
+                    PARTITION pmax VALUES LESS THAN MAXVALUE
+                );
+                """
+            else:
+                create_table = """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    session_id VARCHAR(255),
+                    user_message TEXT,
+                    agent_reasoning TEXT,
+                    agent_response TEXT,
+                    tools_used TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_session_created (session_id, created_at, id),
+                    INDEX idx_created (created_at, id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+                """
             cursor.execute(create_table)
+            self._migrate_indexes(cursor)
             conn.commit()
+            self._ensure_partitions(cursor)
             print("✓ Conversation logging tables ready")
             
-        except Error as e:
+        except mysql_error() as e:
             print(f"Error creating conversation tables: {e}")
         finally:
             if conn.is_connected():
                 cursor.close()
-                conn.close()
+            conn.close()
+    
+    def _migrate_indexes(self, cursor):
+        """Bring indexes of an existing conversations table up to date.
+
+        History pages are found through (session_id, created_at, id) alone,
+        so the old single-column session index is replaced by it.
+        """
+        cursor.execute("""
+            SELECT DISTINCT index_name FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'conversations'
+        """)
+        indexes = {row[0] for row in cursor.fetchall()}
+        if 'idx_session_created' not in indexes:
+            cursor.execute("ALTER TABLE conversations ADD INDEX idx_session_created (session_id, created_at, id)")
+        if 'idx_session' in indexes:
+            cursor.execute("ALTER TABLE conversations DROP INDEX idx_session")
+    
+    def _partitions(self, cursor) -> List[Tuple[str, Optional[int]]]:
+        """(name, upper bound as a unix time or None for MAXVALUE) of each
+        partition of the conversations table; empty if it is not partitioned."""
+        cursor.execute("""
+            SELECT partition_name, partition_description FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = 'conversations'
+              AND partition_name IS NOT NULL
+            ORDER BY partition_ordinal_position
+        """)
+        return [
+            (name, None if bound == 'MAXVALUE' else int(bound))
+            for name, bound in cursor.fetchall()
+        ]
+    
+    def _ensure_partitions(self, cursor, months_ahead: int = 3):
+        """Split pmax so every month up to `months_ahead` has its own partition.
+
+        Runs on init_db and on every archive run, so a daily archive job keeps
+        months ahead of time partitioned.
+        """
+        partitions = self._partitions(cursor)
+        if not partitions:
+            if self.partitioned:
+                # CREATE TABLE IF NOT EXISTS kept a table made before partitioning was enabled
+                print(
+                    "Warning: CONVERSATION_PARTITIONED is set but the conversations table is not "
+                    "partitioned; old turns are deleted row by row until it is rebuilt partitioned"
+                )
+            return
+        names = {name for name, _ in partitions}
+        year, month = datetime.now().year, datetime.now().month
+        last = max((name for name in names if name != 'pmax'), default=None)
+        new = []
+        for _ in range(months_ahead + 1):
+            name = f"p{year:04d}{month:02d}"
+            if name not in names and (last is None or name > last):
+                new.append(_month_partition(year, month))
+            year, month = _next_month(year, month)
+        if new:
+            cursor.execute(
+                "ALTER TABLE conversations REORGANIZE PARTITION pmax INTO "
+                f"({', '.join(new)}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            )
     
     def log_conversation(
         self,
@@ -80,81 +210,275 @@ class ConversationLogger:
         agent_response: Optional[str] = None,
         tools_used: Optional[List[str]] = None
     ):
-        """Log a conversation turn to MySQL."""
+        """Log a conversation turn to MySQL.
+
+        With CONVERSATION_LOG_ASYNC enabled (the default) the turn is queued
+        and written in a batch by a background thread.
+        """
         if not self.use_mysql:
             return
         
+        tools_str = ", ".join(tools_used) if tools_used else None
+        row = (session_id, user_message, agent_reasoning, agent_response, tools_str)
+        
+        if self.writer:
+            self.writer.submit(row)
+            return
+        
+        try:
+            self._insert_rows([row])
+        except (mysql_error(), ConnectionError) as e:
+            print(f"Error logging conversation: {e}")
+    
+    def _insert_rows(self, rows: List[tuple]):
+        """Insert conversation rows in one multi-row INSERT."""
         conn = self._get_connection()
         if not conn:
-            return
+            raise ConnectionError("MySQL unavailable for conversation logging")
         
         try:
             cursor = conn.cursor()
             
-            tools_str = ", ".join(tools_used) if tools_used else None
-            
             insert_query = """
             INSERT INTO conversations 
             (session_id, user_message, agent_reasoning, agent_response, tools_used)
             VALUES (%s, %s, %s, %s, %s)
             """
-            cursor.execute(insert_query, (
-                session_id,
-                user_message,
-                agent_reasoning,
-                agent_response,
-                tools_str
-            ))
+            # executemany batches INSERTs into a single multi-row statement
+            cursor.executemany(insert_query, rows)
             conn.commit()
-            
-        except Error as e:
-            print(f"Error logging conversation: {e}")
+            cursor.close()
         finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            conn.close()
     
-    def get_conversation_history(
-        self,
-        session_id: Optional[str] = None,
-        limit: int = 50
-    ) -> List[Dict]:
-        """Retrieve conversation history."""
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued turn has been written."""
+        return self.writer.flush(timeout) if self.writer else True
+    
+    def close(self, timeout: Optional[float] = 10.0):
+        """Flush queued turns and stop the background writer."""
+        if self.writer:
+            self.writer.close(timeout)
+    
+    def stats(self) -> Dict:
+        """Queued/flushed/dropped counters of the background writer."""
+        return self.writer.stats() if self.writer else {}
+    
+    def _archive_batches(self, conn, where: str, params: list, batch_size: int, partition: Optional[str] = None) -> int:
+        """Copy matching turns to the archive in keyset batches, deleting each
+        batch from the table unless a whole partition is being archived."""
+        source = f"conversations PARTITION ({partition})" if partition else "conversations"
+        cursor = conn.cursor(dictionary=True)
+        moved, last = 0, None
+        while True:
+            keyset = " AND (created_at, id) > (%s, %s)" if last else ""
+            cursor.execute(
+                f"SELECT {', '.join(HISTORY_COLUMNS)} FROM {source} WHERE {where}{keyset} "
+                "ORDER BY created_at, id LIMIT %s",
+                params + (list(last) if last else []) + [batch_size]
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            # Durable in the archive before it leaves the table
+            self.archive.write(rows)
+            if not partition:
+                placeholders = ", ".join(["%s"] * len(rows))
+                cursor.execute(
+                    f"DELETE FROM conversations WHERE {where} AND id IN ({placeholders})",
+                    params + [row['id'] for row in rows]
+                )
+                conn.commit()
+            moved += len(rows)
+            last = (rows[-1]['created_at'], rows[-1]['id'])
+        cursor.close()
+        return moved
+    
+    def archive_old_turns(self, days: Optional[int] = None, batch_size: int = 1000) -> int:
+        """Move turns older than `days` (default CONVERSATION_RETENTION_DAYS)
+        to the compressed archive. Returns the number of turns moved.
+
+        On a partitioned table, months entirely past the cutoff are archived
+        and then dropped as whole partitions instead of deleted row by row.
+        """
         if not self.use_mysql:
-            return []
-        
+            return 0
+        days = self.retention_days if days is None else days
         conn = self._get_connection()
         if not conn:
-            return []
+            return 0
         
+        moved = 0
         try:
-            cursor = conn.cursor(dictionary=True)
-            
-            if session_id:
-                query = """
-                SELECT * FROM conversations 
-                WHERE session_id = %s 
-                ORDER BY created_at DESC 
-                LIMIT %s
-                """
-                cursor.execute(query, (session_id, limit))
-            else:
-                query = """
-                SELECT * FROM conversations 
-                ORDER BY created_at DESC 
-                LIMIT %s
-                """
-                cursor.execute(query, (limit,))
+            cursor = conn.cursor()
+            cursor.execute("SELECT NOW() - INTERVAL %s DAY, UNIX_TIMESTAMP(NOW() - INTERVAL %s DAY)", (days, days))
+            cutoff, cutoff_ts = cursor.fetchone()
+            # Otherwise turns of months past the last partition pile up in pmax
+            self._ensure_partitions(cursor)
             
-            return cursor.fetchall()
+            for name, bound in self._partitions(cursor):
+                if bound is not None and bound <= cutoff_ts:
+                    moved += self._archive_batches(conn, "1 = 1", [], batch_size, partition=name)
+                    cursor.execute(f"ALTER TABLE conversations DROP PARTITION {name}")
             
-        except Error as e:
+            moved += self._archive_batches(conn, "created_at < %s", [cutoff], batch_size)
+            cursor.close()
+        except mysql_error() as e:
+            print(f"Error archiving conversations: {e}")
+        finally:
+            conn.close()
+        return moved
+    
+    def get_history_page(
+        self,
+        session_id: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        newest_first: bool = True,
+        include_archived: bool = False
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of conversation history, using keyset pagination.
+
+        Args:
+            session_id: Only turns of this session, or None for all turns.
+            columns: Columns to return besides id, session_id and created_at;
+                by default none of the large text columns are read.
+            limit: Maximum number of turns in the page.
+            cursor: The cursor returned with the previous page.
+            newest_first: Page backwards in time instead of forwards.
+            include_archived: Also return turns already moved to the archive,
+                as if they were still in the table.
+
+        Returns:
+            (rows, cursor of the next page or None when there are no more).
+        """
+        if not self.use_mysql or limit <= 0:
+            return [], None
+        selected = list(KEY_COLUMNS) + [c for c in (columns or ()) if c not in KEY_COLUMNS]
+        unknown = [c for c in selected if c not in HISTORY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown history columns: {', '.join(unknown)}")
+        
+        order = "DESC" if newest_first else "ASC"
+        compare = "<" if newest_first else ">"
+        where, params = [], []
+        if session_id is not None:
+            where.append("session_id = %s")
+            params.append(session_id)
+        if cursor:
+            cursor_session, created_at, row_id = decode_cursor(cursor)
+            if session_id is not None and cursor_session != session_id:
+                raise ValueError("Cursor belongs to a different session")
+            where.append(f"(created_at, id) {compare} (%s, %s)")
+            params.extend([created_at, row_id])
+        order_by = f"created_at {order}, id {order}"
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+        
+        # Find the page's ids from an index alone (idx_session_created, or
+        # idx_created across sessions), then read the projected columns of
+        # just those rows
+        query = f"""
+            SELECT {', '.join('c.' + col for col in selected)}
+            FROM conversations c
+            JOIN (
+                SELECT id FROM conversations {where_sql}
+                ORDER BY {order_by}
+                LIMIT %s
+            ) page ON c.id = page.id
+            ORDER BY {', '.join('c.' + part for part in order_by.split(', '))}
+        """
+        params.append(limit + 1)
+        
+        conn = self._get_connection()
+        if not conn:
+            return [], None
+        try:
+            db_cursor = conn.cursor(dictionary=True)
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
+            db_cursor.close()
+        except mysql_error() as e:
             print(f"Error retrieving conversation history: {e}")
-            return []
+            return [], None
         finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
+            conn.close()
+        
+        if include_archived and not (newest_first and len(rows) > limit):
+            # Archived turns are older than every turn left in the table
+            rows = self._merge_archived(rows, session_id, selected, limit, cursor, newest_first)
+        
+        # One extra row tells whether another page exists
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    
+    def _merge_archived(self, rows, session_id, columns, limit, cursor, newest_first) -> List[Dict]:
+        """Combine a table page with the archived turns that follow the cursor."""
+        key = None
+        if cursor:
+            _, created_at, row_id = decode_cursor(cursor)
+            key = (datetime.fromisoformat(created_at), row_id)
+        archived = []
+        for row in self.archive.iter_rows(
+            session_id, columns,
+            after=None if newest_first else key,
+            before=key if newest_first else None,
+            newest_first=newest_first
+        ):
+            archived.append(row)
+            if len(archived) > limit:
+                break
+        merged = sorted(rows + archived, key=lambda r: (r['created_at'], r['id']), reverse=newest_first)
+        return merged[:limit + 1]
+    
+    def iter_history(
+        self,
+        session_id: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+        newest_first: bool = False,
+        include_archived: bool = False
+    ) -> Iterator[Dict]:
+        """Stream every matching turn, e.g. for export.
+
+        Rows are fetched one keyset page at a time, and no connection is held
+        while the caller processes them.
+        """
+        cursor = None
+        while True:
+            rows, cursor = self.get_history_page(
+                session_id, columns, batch_size, cursor, newest_first, include_archived
+            )
+            yield from rows
+            if cursor is None:
+                return
+    
+    def get_conversation_history(
+        self,
+        session_id: Optional[str] = None,
+        limit: int = 50,
+        include_archived: bool = False
+    ) -> List[Dict]:
+        """Retrieve the latest conversation turns with every column."""
+        rows, _ = self.get_history_page(session_id, HISTORY_COLUMNS, limit, include_archived=include_archived)
+        return rows
+
+_logger = None
+_logger_lock = threading.Lock()
+
+def get_conversation_logger() -> ConversationLogger:
+    """Process-wide conversation logger, constructed on first use."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = ConversationLogger()
+    return _logger
 
-# Global conversation logger
-conversation_logger = ConversationLogger()
+def __getattr__(name):
+    # Compatibility with the global this module used to build at import time
+    if name == 'conversation_logger':
+        return get_conversation_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,29 +1,68 @@
 """
 Database backend for inventory management.
-Supports both in-memory and MySQL storage.
+Supports in-memory, SQLite and MySQL storage.
 """
 
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from bisect import bisect_left, insort
 from abc import ABC, abstractmethod
-from typing import Optional
-import mysql.connector
-from mysql.connector import Error
-from dotenv import load_dotenv
-
-load_dotenv()
+from typing import Dict, List, Optional, Tuple, Union
+from .config import env_flag, load_env
+from .connection_pool import get_pool, mysql_error
+from .instrumentation import instrument, metrics_enabled, is_error_result
+from .results import DATABASE_ERROR, INSUFFICIENT_STOCK, StockChange, StockError, StockLevel
+from .single_flight import Generation, SingleFlight
+from .stock_ledger import StockLedger, ledger_enabled
 
 class InventoryBackend(ABC):
     """Abstract base class for inventory storage backends."""
     
     @abstractmethod
-    def check_stock(self, product_name: str) -> str:
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
         """Check stock level for a product."""
         pass
     
     @abstractmethod
-    def update_stock(self, product_name: str, quantity_change: int) -> str:
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
         """Update stock level for a product."""
         pass
+    
+    @abstractmethod
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        """Check stock levels for several products in one call, one reading
+        per distinct name in the order given."""
+        pass
+    
+    @abstractmethod
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        """Apply several stock changes atomically: all of them or none."""
+        pass
+    
+    @abstractmethod
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        """Return up to `limit` (name, quantity) pairs ordered by name.
+
+        Names are compared case-insensitively; `prefix` restricts the listing
+        to products whose name starts with it and `offset` skips that many
+        matching products.
+        """
+        pass
+    
+    @abstractmethod
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        """Return (name, quantity) of every product below `threshold` units, ordered by name."""
+        pass
+
+def _insufficient(insufficient: List[Tuple[str, int]]) -> StockError:
+    """Refusal of a change that would take these (name, current) products below zero."""
+    return StockError(
+        INSUFFICIENT_STOCK, "Cannot reduce stock below 0",
+        tuple(StockLevel(name, current) for name, current in insufficient)
+    )
 
 class InMemoryInventory(InventoryBackend):
     """In-memory inventory storage (original implementation)."""
@@ -34,24 +73,73 @@ class InMemoryInventory(InventoryBackend):
             "Smartphone": 20,
             "Headphones": 50
         }
+        self._lock = threading.Lock()
+        # Sorted (casefolded name, name) index backing list_products
+        self._index = sorted((name.casefold(), name) for name in self._db)
     
-    def check_stock(self, product_name: str) -> str:
-        quantity = self._db.get(product_name, 0)
-        return f"Product: {product_name}, Quantity: {quantity}"
+    def _add_to_index(self, product_name: str):
+        """Index a newly created product; caller holds the lock."""
+        if product_name not in self._db:
+            insort(self._index, (product_name.casefold(), product_name))
     
-    def update_stock(self, product_name: str, quantity_change: int) -> str:
-        current = self._db.get(product_name, 0)
-        new_quantity = current + quantity_change
-        if new_quantity < 0:
-            return f"Error: Cannot reduce stock below 0. Current: {current}"
-        
-        self._db[product_name] = new_quantity
-        return f"Updated {product_name}. Old: {current}, New: {new_quantity}"
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return StockLevel(product_name, self._db.get(product_name, 0))
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        with self._lock:
+            current = self._db.get(product_name, 0)
+            new_quantity = current + quantity_change
+            if new_quantity < 0:
+                return _insufficient([(product_name, current)])
+            
+            self._add_to_index(product_name)
+            self._db[product_name] = new_quantity
+        return StockChange(product_name, current, new_quantity)
+    
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        db = self._db
+        return [StockLevel(name, db.get(name, 0)) for name in dict.fromkeys(product_names)]
+    
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        if not changes:
+            return []
+        with self._lock:
+            planned = []
+            insufficient = []
+            for name, delta in changes.items():
+                current = self._db.get(name, 0)
+                planned.append((name, current, current + delta))
+                if current + delta < 0:
+                    insufficient.append((name, current))
+            if insufficient:
+                return _insufficient(insufficient)
+            
+            for name, _, new_quantity in planned:
+                self._add_to_index(name)
+                self._db[name] = new_quantity
+        return [StockChange(name, old, new) for name, old, new in planned]
+    
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        key = prefix.casefold()
+        page = []
+        with self._lock:
+            index = self._index
+            for i in range(bisect_left(index, (key,)) + max(offset, 0), len(index)):
+                folded, name = index[i]
+                if len(page) >= limit or not folded.startswith(key):
+                    break
+                page.append((name, self._db[name]))
+        return page
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            return [(name, self._db[name]) for _, name in self._index if self._db[name] < threshold]
 
 class MySQLInventory(InventoryBackend):
     """MySQL-based inventory storage."""
     
     def __init__(self):
+        load_env()
         self.config = {
             'host': os.getenv('MYSQL_HOST', 'localhost'),
             'user': os.getenv('MYSQL_USER', 'root'),
@@ -59,87 +147,802 @@ class MySQLInventory(InventoryBackend):
             'database': os.getenv('MYSQL_DATABASE', 'inventory_db'),
             'port': int(os.getenv('MYSQL_PORT', 3306))
         }
+        # Movement ledger written alongside every stock change (INVENTORY_LEDGER)
+        self.ledger = StockLedger("mysql", self._get_connection) if ledger_enabled() else None
     
     def _get_connection(self):
-        """Create database connection."""
+        """Check out a connection from the shared pool."""
         try:
-            return mysql.connector.connect(**self.config)
-        except Error as e:
+            return get_pool(self.config).get_connection()
+        except mysql_error() as e:
             raise ConnectionError(f"Failed to connect to MySQL: {e}")
     
-    def check_stock(self, product_name: str) -> str:
+    def init_ledger(self) -> StockLedger:
+        """Create the stock ledger tables and take a baseline snapshot."""
+        ledger = self.ledger or StockLedger("mysql", self._get_connection)
+        ledger.init_tables()
+        return ledger
+    
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                
+                query = "SELECT quantity FROM products WHERE product_name = %s"
+                cursor.execute(query, (product_name,))
+                result = cursor.fetchone()
+                
+                if result:
+                    quantity = result[0]
+                else:
+                    quantity = 0
+                    # Auto-create product with 0 stock
+                    insert_query = "INSERT INTO products (product_name, quantity) VALUES (%s, 0)"
+                    cursor.execute(insert_query, (product_name,))
+                    conn.commit()
+                
+                cursor.close()
             
-            query = "SELECT quantity FROM products WHERE product_name = %s"
-            cursor.execute(query, (product_name,))
-            result = cursor.fetchone()
+            return StockLevel(product_name, quantity)
             
-            if result:
-                quantity = result[0]
-            else:
-                quantity = 0
-                # Auto-create product with 0 stock
-                insert_query = "INSERT INTO products (product_name, quantity) VALUES (%s, 0)"
-                cursor.execute(insert_query, (product_name,))
+        except mysql_error() as e:
+            return StockError(DATABASE_ERROR, str(e))
+    
+    def _apply_delta(self, cursor, product_name: str, quantity_change: int) -> Optional[Tuple[int, int]]:
+        """Apply a stock delta server-side in one guarded UPDATE.
+
+        The UPDATE row-locks the product, refuses to go below zero and hands the
+        new quantity back through LAST_INSERT_ID(expr), so no follow-up SELECT
+        is needed.
+
+        Returns:
+            (old, new) quantities, or None if the product does not exist or the
+            change would take its stock below zero.
+        """
+        update_query = """
+            UPDATE products
+            SET quantity = LAST_INSERT_ID(quantity + %s)
+            WHERE product_name = %s AND quantity + %s >= 0
+        """
+        cursor.execute(update_query, (quantity_change, product_name, quantity_change))
+        if cursor.rowcount != 1:
+            return None
+        new_quantity = cursor.lastrowid or 0
+        return new_quantity - quantity_change, new_quantity
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                
+                applied = self._apply_delta(cursor, product_name, quantity_change)
+                if applied:
+                    current, new_quantity = applied
+                else:
+                    # Missing product or not enough stock: lock the row (or gap) and decide
+                    query = "SELECT quantity FROM products WHERE product_name = %s FOR UPDATE"
+                    cursor.execute(query, (product_name,))
+                    result = cursor.fetchone()
+                    current = result[0] if result else 0
+                    
+                    new_quantity = current + quantity_change
+                    if new_quantity < 0:
+                        conn.rollback()
+                        cursor.close()
+                        return _insufficient([(product_name, current)])
+                    
+                    upsert_query = """
+                        INSERT INTO products (product_name, quantity)
+                        VALUES (%s, %s)
+                        ON DUPLICATE KEY UPDATE quantity = quantity + %s
+                    """
+                    cursor.execute(upsert_query, (product_name, new_quantity, quantity_change))
+                if self.ledger:
+                    last_id = self.ledger.record(cursor, [(product_name, quantity_change)])
                 conn.commit()
+                
+                cursor.close()
             
-            cursor.close()
-            conn.close()
+            if self.ledger:
+                self.ledger.recorded(last_id, 1)
+            return StockChange(product_name, current, new_quantity)
+            
+        except mysql_error() as e:
+            return StockError(DATABASE_ERROR, str(e))
+
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        names = list(dict.fromkeys(product_names))
+        if not names:
+            return []
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                
+                placeholders = ", ".join(["%s"] * len(names))
+                query = f"SELECT product_name, quantity FROM products WHERE product_name IN ({placeholders})"
+                cursor.execute(query, tuple(names))
+                # product_name uses a case-insensitive collation
+                found = {name.casefold(): quantity for name, quantity in cursor.fetchall()}
+                
+                missing = [name for name in names if name.casefold() not in found]
+                if missing:
+                    # Auto-create missing products with 0 stock, like check_stock
+                    insert_query = "INSERT IGNORE INTO products (product_name, quantity) VALUES (%s, 0)"
+                    cursor.executemany(insert_query, [(name,) for name in missing])
+                    conn.commit()
+                
+                cursor.close()
             
-            return f"Product: {product_name}, Quantity: {quantity}"
+            return [StockLevel(name, found.get(name.casefold(), 0)) for name in names]
             
-        except Error as e:
-            return f"Database error: {e}"
+        except mysql_error() as e:
+            return StockError(DATABASE_ERROR, str(e))
     
-    def update_stock(self, product_name: str, quantity_change: int) -> str:
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        # Merge names that the case-insensitive collation treats as one row
+        merged = {}
+        for name, delta in changes.items():
+            key = name.casefold()
+            spelling, total = merged.get(key, (name, 0))
+            merged[key] = (spelling, total + delta)
+        if not merged:
+            return []
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Get current quantity
-            query = "SELECT quantity FROM products WHERE product_name = %s"
-            cursor.execute(query, (product_name,))
-            result = cursor.fetchone()
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                
+                # Lock every affected row for the whole transaction
+                placeholders = ", ".join(["%s"] * len(merged))
+                query = f"""
+                    SELECT product_name, quantity FROM products
+                    WHERE product_name IN ({placeholders})
+                    FOR UPDATE
+                """
+                cursor.execute(query, tuple(name for name, _ in merged.values()))
+                current = {name.casefold(): quantity for name, quantity in cursor.fetchall()}
+                
+                planned = []
+                insufficient = []
+                for key, (name, delta) in merged.items():
+                    old = current.get(key, 0)
+                    planned.append((name, old, old + delta))
+                    if old + delta < 0:
+                        insufficient.append((name, old))
+                if insufficient:
+                    conn.rollback()
+                    cursor.close()
+                    return _insufficient(insufficient)
+                
+                values = ", ".join(["(%s, %s)"] * len(planned))
+                upsert_query = f"""
+                    INSERT INTO products (product_name, quantity)
+                    VALUES {values}
+                    ON DUPLICATE KEY UPDATE quantity = VALUES(quantity)
+                """
+                params = [value for name, _, new in planned for value in (name, new)]
+                cursor.execute(upsert_query, params)
+                if self.ledger:
+                    last_id = self.ledger.record(cursor, [(name, new - old) for name, old, new in planned])
+                conn.commit()
+                
+                cursor.close()
             
-            if result:
-                current = result[0]
-            else:
-                current = 0
-                # Create product if doesn't exist
-                insert_query = "INSERT INTO products (product_name, quantity) VALUES (%s, 0)"
-                cursor.execute(insert_query, (product_name,))
+            if self.ledger:
+                self.ledger.recorded(last_id, len(planned))
+            return [StockChange(name, old, new) for name, old, new in planned]
             
-            new_quantity = current + quantity_change
-            if new_quantity < 0:
-                cursor.close()
-                conn.close()
-                return f"Error: Cannot reduce stock below 0. Current: {current}"
+        except mysql_error() as e:
+            return StockError(DATABASE_ERROR, str(e))
+
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        if limit <= 0:
+            return []
+        with self._get_connection() as conn:
+            # Unbuffered cursor: rows are streamed from the server as we read them
+            cursor = conn.cursor(buffered=False)
             
-            # Update quantity
-            update_query = """
-                INSERT INTO products (product_name, quantity) 
-                VALUES (%s, %s)
-                ON DUPLICATE KEY UPDATE quantity = %s
+            escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = """
+                SELECT product_name, quantity FROM products
+                WHERE product_name LIKE %s
+                ORDER BY product_name
+                LIMIT %s OFFSET %s
             """
-            cursor.execute(update_query, (product_name, new_quantity, new_quantity))
-            conn.commit()
+            cursor.execute(query, (escaped + "%", limit, max(offset, 0)))
+            page = []
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                page.extend(rows)
             
             cursor.close()
-            conn.close()
-            
-            return f"Updated {product_name}. Old: {current}, New: {new_quantity}"
+        return page
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT product_name, quantity FROM products WHERE quantity < %s ORDER BY product_name",
+                (threshold,)
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+        return rows
+
+class SQLiteInventory(InventoryBackend):
+    """Embedded SQLite storage: persistent, with no server to run.
+
+    The database runs in WAL mode so readers never block the writer. Each
+    thread keeps its own connection, whose statement cache keeps the fixed
+    queries below prepared. Requires SQLite 3.35+ for RETURNING.
+    """
+    
+    SAMPLE_DATA = [
+        ('Laptop', 5),
+        ('Smartphone', 20),
+        ('Headphones', 50),
+        ('Monitor', 15),
+        ('Keyboard', 30),
+        ('Mouse', 40)
+    ]
+    
+    def __init__(self, path: Optional[str] = None):
+        load_env()
+        self.path = path or os.getenv('SQLITE_PATH', 'inventory.db')
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Movement ledger written alongside every stock change (INVENTORY_LEDGER)
+        self.ledger = StockLedger("sqlite", self._get_connection) if ledger_enabled() else None
+        self.init_schema()
+        if self.ledger:
+            self.ledger.init_tables()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: single statements are atomic, multi-statement
+            # work uses explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None,
+                check_same_thread=False, cached_statements=128
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def init_schema(self):
+        """Create the products table, seeded like init_db.init_database on first run."""
+        conn = self._get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    product_name VARCHAR(100) NOT NULL UNIQUE COLLATE NOCASE,
+                    quantity INTEGER NOT NULL DEFAULT 0,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_quantity ON products (quantity)")
+            if conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0:
+                conn.executemany(
+                    "INSERT INTO products (product_name, quantity) VALUES (?, ?)",
+                    self.SAMPLE_DATA
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        try:
+            conn = self._get_connection()
+            row = conn.execute(
+                "SELECT quantity FROM products WHERE product_name = ?", (product_name,)
+            ).fetchone()
+            if row:
+                quantity = row[0]
+            else:
+                quantity = 0
+                # Auto-create product with 0 stock, like the MySQL backend
+                conn.execute(
+                    "INSERT OR IGNORE INTO products (product_name, quantity) VALUES (?, 0)", (product_name,)
+                )
+            return StockLevel(product_name, quantity)
+        except sqlite3.Error as e:
+            return StockError(DATABASE_ERROR, str(e))
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        try:
+            conn = self._get_connection()
+            if self.ledger:
+                # The movement must commit together with the change
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Guarded delta applied in one statement; RETURNING saves a read
+                row = conn.execute("""
+                    UPDATE products
+                    SET quantity = quantity + ?, last_updated = CURRENT_TIMESTAMP
+                    WHERE product_name = ? AND quantity + ? >= 0
+                    RETURNING quantity
+                """, (quantity_change, product_name, quantity_change)).fetchone()
+                if row:
+                    new_quantity = row[0]
+                    current = new_quantity - quantity_change
+                else:
+                    # Missing product or not enough stock
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN IMMEDIATE")
+                    row = conn.execute(
+                        "SELECT quantity FROM products WHERE product_name = ?", (product_name,)
+                    ).fetchone()
+                    current = row[0] if row else 0
+                    new_quantity = current + quantity_change
+                    if new_quantity < 0:
+                        conn.execute("ROLLBACK")
+                        return _insufficient([(product_name, current)])
+                    conn.execute("""
+                        INSERT INTO products (product_name, quantity) VALUES (?, ?)
+                        ON CONFLICT(product_name) DO UPDATE
+                        SET quantity = excluded.quantity, last_updated = CURRENT_TIMESTAMP
+                    """, (product_name, new_quantity))
+                if self.ledger:
+                    last_id = self.ledger.record(conn.cursor(), [(product_name, quantity_change)])
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            if self.ledger:
+                self.ledger.recorded(last_id, 1)
+            return StockChange(product_name, current, new_quantity)
+        except sqlite3.Error as e:
+            return StockError(DATABASE_ERROR, str(e))
+    
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        names = list(dict.fromkeys(product_names))
+        if not names:
+            return []
+        try:
+            conn = self._get_connection()
+            placeholders = ", ".join(["?"] * len(names))
+            rows = conn.execute(
+                f"SELECT product_name, quantity FROM products WHERE product_name IN ({placeholders})", names
+            ).fetchall()
+            # product_name uses NOCASE collation
+            found = {name.casefold(): quantity for name, quantity in rows}
             
-        except Error as e:
-            return f"Database error: {e}"
-
-# Choose backend based on environment variable
-USE_MYSQL = os.getenv('USE_MYSQL', 'false').lower() == 'true'
-
-if USE_MYSQL:
-    print("📊 Using MySQL backend")
-    _inventory_backend = MySQLInventory()
-else:
-    print("💾 Using in-memory backend")
-    _inventory_backend = InMemoryInventory()
+            missing = [name for name in names if name.casefold() not in found]
+            if missing:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO products (product_name, quantity) VALUES (?, 0)",
+                    [(name,) for name in missing]
+                )
+            return [StockLevel(name, found.get(name.casefold(), 0)) for name in names]
+        except sqlite3.Error as e:
+            return StockError(DATABASE_ERROR, str(e))
+    
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        # Merge names that the NOCASE collation treats as one row
+        merged = {}
+        for name, delta in changes.items():
+            key = name.casefold()
+            spelling, total = merged.get(key, (name, 0))
+            merged[key] = (spelling, total + delta)
+        if not merged:
+            return []
+        try:
+            conn = self._get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ", ".join(["?"] * len(merged))
+                rows = conn.execute(
+                    f"SELECT product_name, quantity FROM products WHERE product_name IN ({placeholders})",
+                    [name for name, _ in merged.values()]
+                ).fetchall()
+                current = {name.casefold(): quantity for name, quantity in rows}
+                
+                planned = []
+                insufficient = []
+                for key, (name, delta) in merged.items():
+                    old = current.get(key, 0)
+                    planned.append((name, old, old + delta))
+                    if old + delta < 0:
+                        insufficient.append((name, old))
+                if insufficient:
+                    conn.execute("ROLLBACK")
+                    return _insufficient(insufficient)
+                
+                conn.executemany("""
+                    INSERT INTO products (product_name, quantity) VALUES (?, ?)
+                    ON CONFLICT(product_name) DO UPDATE
+                    SET quantity = excluded.quantity, last_updated = CURRENT_TIMESTAMP
+                """, [(name, new) for name, _, new in planned])
+                if self.ledger:
+                    last_id = self.ledger.record(conn.cursor(), [(name, new - old) for name, old, new in planned])
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            if self.ledger:
+                self.ledger.recorded(last_id, len(planned))
+            return [StockChange(name, old, new) for name, old, new in planned]
+        except sqlite3.Error as e:
+            return StockError(DATABASE_ERROR, str(e))
+    
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        if limit <= 0:
+            return []
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        cursor = self._get_connection().execute("""
+            SELECT product_name, quantity FROM products
+            WHERE product_name LIKE ? ESCAPE '\\'
+            ORDER BY product_name
+            LIMIT ? OFFSET ?
+        """, (escaped + "%", limit, max(offset, 0)))
+        return cursor.fetchall()
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        cursor = self._get_connection().execute(
+            "SELECT product_name, quantity FROM products WHERE quantity < ? ORDER BY product_name",
+            (threshold,)
+        )
+        return cursor.fetchall()
+    
+    def close(self):
+        """Close every per-thread connection."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+class CachedInventory(InventoryBackend):
+    """Read-through stock cache in front of another backend.
+
+    Writes go to the wrapped backend and invalidate the products they touch,
+    so a reading never outlives a change made through this process. Entries
+    also expire after `ttl` seconds to pick up changes made elsewhere, and the
+    least recently used ones are evicted beyond `max_entries`.
+    """
+    
+    def __init__(self, backend: InventoryBackend, ttl: float = 30.0, max_entries: int = 1024):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # product_name -> (expires_at, result)
+        self._names_by_fold = {}  # casefolded name -> cached spellings
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0, 'expirations': 0}
+    
+    def _get(self, product_name: str) -> Optional[StockLevel]:
+        """Return a fresh cached result and count the hit or miss; caller holds the lock."""
+        entry = self._entries.get(product_name)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(product_name)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['expirations'] += 1
+            self._remove(product_name)
+        self._stats['misses'] += 1
+        return None
+    
+    def _put(self, product_name: str, result: Union[StockLevel, StockError], writes_seen: int):
+        """Cache a backend result unless a write happened since it was read."""
+        if is_error_result(result):
+            return
+        with self._lock:
+            if self._writes != writes_seen:
+                return
+            self._entries[product_name] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(product_name)
+            self._names_by_fold.setdefault(product_name.casefold(), set()).add(product_name)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+    
+    def _remove(self, product_name: str):
+        self._entries.pop(product_name, None)
+        spellings = self._names_by_fold.get(product_name.casefold())
+        if spellings:
+            spellings.discard(product_name)
+            if not spellings:
+                del self._names_by_fold[product_name.casefold()]
+    
+    def _invalidate(self, product_names):
+        with self._lock:
+            self._writes += 1
+            for name in product_names:
+                # MySQL matches names case-insensitively, so drop every spelling
+                for spelling in list(self._names_by_fold.get(name.casefold(), ())):
+                    self._remove(spelling)
+                    self._stats['invalidations'] += 1
+    
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        with self._lock:
+            cached = self._get(product_name)
+            writes_seen = self._writes
+        if cached is not None:
+            return cached
+        result = self.backend.check_stock(product_name)
+        self._put(product_name, result, writes_seen)
+        return result
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        try:
+            return self.backend.update_stock(product_name, quantity_change)
+        finally:
+            self._invalidate([product_name])
+    
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        names = list(dict.fromkeys(product_names))
+        with self._lock:
+            results = {name: self._get(name) for name in names}
+            writes_seen = self._writes
+        missing = [name for name, result in results.items() if result is None]
+        if missing:
+            fetched = self.backend.check_stock_many(missing)
+            if is_error_result(fetched):
+                return fetched
+            for name, level in zip(missing, fetched):
+                results[name] = level
+                self._put(name, level, writes_seen)
+        return [results[name] for name in names]
+    
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        try:
+            return self.backend.update_stock_many(changes)
+        finally:
+            self._invalidate(changes)
+    
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return self.backend.list_products(offset, limit, prefix)
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return self.backend.low_stock(threshold)
+    
+    def stats(self) -> Dict:
+        """Cache hit/miss counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+class CoalescingInventory(InventoryBackend):
+    """Collapses concurrent identical reads into one backend call.
+
+    Reads made while the same read is in flight wait for it and share its
+    result, so a burst of sessions checking the same products costs one
+    query. A write through this backend starts a new generation: reads that
+    arrive after it completes never join a read started before it.
+    CoalescingAsyncInventory shares `generation`, so writes made on either
+    path start a new generation for both.
+    """
+    
+    def __init__(self, backend: InventoryBackend):
+        self.backend = backend
+        self.generation = Generation()
+        self._flights = SingleFlight()
+    
+    def _read(self, method, *args):
+        result = self._flights.do((method.__name__, args, self.generation.value), method, *args)
+        # Every caller gets its own list
+        return list(result) if isinstance(result, list) else result
+    
+    def _wrote(self):
+        self.generation.bump()
+    
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return self._read(self.backend.check_stock, product_name)
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        try:
+            return self.backend.update_stock(product_name, quantity_change)
+        finally:
+            self._wrote()
+    
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        return self._read(self.backend.check_stock_many, tuple(product_names))
+    
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        try:
+            return self.backend.update_stock_many(changes)
+        finally:
+            self._wrote()
+    
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return self._read(self.backend.list_products, offset, limit, prefix)
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return self._read(self.backend.low_stock, threshold)
+    
+    def stats(self) -> Dict:
+        """Coalescing counters for monitoring."""
+        return self._flights.stats()
+
+class InstrumentedInventory(InventoryBackend):
+    """Records call counts, errors and latency of every backend method."""
+    
+    def __init__(self, backend: InventoryBackend):
+        self.backend = backend
+    
+    @instrument("backend.check_stock", enabled=True)
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return self.backend.check_stock(product_name)
+    
+    @instrument("backend.update_stock", enabled=True)
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        return self.backend.update_stock(product_name, quantity_change)
+    
+    @instrument("backend.check_stock_many", enabled=True)
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        return self.backend.check_stock_many(product_names)
+    
+    @instrument("backend.update_stock_many", enabled=True)
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        return self.backend.update_stock_many(changes)
+    
+    @instrument("backend.list_products", enabled=True)
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return self.backend.list_products(offset, limit, prefix)
+    
+    @instrument("backend.low_stock", enabled=True)
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return self.backend.low_stock(threshold)
+
+class VersionedInventory(InventoryBackend):
+    """Counts the stock changes made through this process.
+
+    `version` goes up after every update that may have changed stock (all
+    but refused ones), so results derived from stock readings, such as
+    cached answers, can tell whether they are still current.
+    """
+    
+    def __init__(self, backend: InventoryBackend):
+        self.backend = backend
+        self.version = 0
+        self._lock = threading.Lock()
+    
+    def _changed(self, result):
+        refused = isinstance(result, StockError) and result.code == INSUFFICIENT_STOCK
+        if refused or result == []:
+            return
+        with self._lock:
+            self.version += 1
+    
+    def check_stock(self, product_name: str) -> Union[StockLevel, StockError]:
+        return self.backend.check_stock(product_name)
+    
+    def update_stock(self, product_name: str, quantity_change: int) -> Union[StockChange, StockError]:
+        result = None
+        try:
+            result = self.backend.update_stock(product_name, quantity_change)
+            return result
+        finally:
+            self._changed(result)
+    
+    def check_stock_many(self, product_names: List[str]) -> Union[List[StockLevel], StockError]:
+        return self.backend.check_stock_many(product_names)
+    
+    def update_stock_many(self, changes: Dict[str, int]) -> Union[List[StockChange], StockError]:
+        result = None
+        try:
+            result = self.backend.update_stock_many(changes)
+            return result
+        finally:
+            self._changed(result)
+    
+    def list_products(self, offset: int = 0, limit: int = 50, prefix: str = "") -> List[Tuple[str, int]]:
+        return self.backend.list_products(offset, limit, prefix)
+    
+    def low_stock(self, threshold: int) -> List[Tuple[str, int]]:
+        return self.backend.low_stock(threshold)
+
+def find_backend(backend, backend_type: type):
+    """The first backend of `backend_type` in a chain of wrappers, or None."""
+    while backend is not None:
+        if isinstance(backend, backend_type):
+            return backend
+        backend = getattr(backend, 'backend', None)
+    return None
+
+def inventory_version(backend: InventoryBackend) -> Optional[int]:
+    """Stock version of a backend, looking through cache and metrics
+    wrappers (None unless it is versioned)."""
+    versioned = find_backend(backend, VersionedInventory)
+    return versioned.version if versioned is not None else None
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def use_mysql() -> bool:
+    """Whether USE_MYSQL selects the MySQL backend."""
+    return env_flag('USE_MYSQL')
+
+def use_sqlite() -> bool:
+    """Whether USE_SQLITE selects the SQLite backend (USE_MYSQL takes precedence)."""
+    return env_flag('USE_SQLITE') and not use_mysql()
+
+def create_compact_inventory(snapshot_path: Optional[str] = None) -> InventoryBackend:
+    """Compact in-memory backend, restored from and saved to `snapshot_path` if given."""
+    import atexit
+    from .compact_inventory import CompactInventory
+    if not snapshot_path:
+        return CompactInventory()
+    backend = CompactInventory.restore(snapshot_path)
+    if os.path.exists(snapshot_path) and os.path.getsize(snapshot_path):
+        print(f"✓ Restored {len(backend)} products from {snapshot_path}")
+    atexit.register(backend.snapshot, snapshot_path)
+    return backend
+
+def create_inventory_backend() -> InventoryBackend:
+    """Build the backend chosen by the environment.
+
+    USE_MYSQL or USE_SQLITE pick the storage (in-memory otherwise, compact
+    with INVENTORY_COMPACT);
+    INVENTORY_COALESCE, INVENTORY_CACHE and INVENTORY_METRICS wrap it in
+    read coalescing, the stock cache and instrumentation, and ANSWER_CACHE
+    counts its stock changes.
+    """
+    if use_mysql():
+        print("📊 Using MySQL backend")
+        backend = MySQLInventory()
+    elif use_sqlite():
+        print("🗄️ Using SQLite backend")
+        backend = SQLiteInventory()
+    elif env_flag('INVENTORY_COMPACT'):
+        print("💾 Using compact in-memory backend")
+        backend = create_compact_inventory(os.getenv('INVENTORY_SNAPSHOT_PATH'))
+    else:
+        print("💾 Using in-memory backend")
+        backend = InMemoryInventory()
+    
+    if env_flag('INVENTORY_COALESCE'):
+        # Below the stock cache, so concurrent cache misses coalesce too
+        backend = CoalescingInventory(backend)
+    
+    if env_flag('INVENTORY_CACHE'):
+        print("⚡ Stock cache enabled")
+        backend = CachedInventory(
+            backend,
+            ttl=float(os.getenv('INVENTORY_CACHE_TTL', 30)),
+            max_entries=int(os.getenv('INVENTORY_CACHE_SIZE', 1024))
+        )
+    
+    if env_flag('ANSWER_CACHE'):
+        # Outside the stock cache so it sees every write
+        backend = VersionedInventory(backend)
+    
+    if metrics_enabled():
+        # Outermost, so cache hits are measured as well
+        backend = InstrumentedInventory(backend)
+    return backend
+
+def get_inventory_backend() -> InventoryBackend:
+    """Process-wide inventory backend, constructed on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_inventory_backend()
+    return _backend
+
+def __getattr__(name):
+    # Compatibility with the names this module used to build at import time
+    if name == '_inventory_backend':
+        return get_inventory_backend()
+    if name == 'USE_MYSQL':
+        return use_mysql()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
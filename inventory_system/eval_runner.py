@@ -0,0 +1,303 @@
+"""
+Parallel eval runner for the eval sets in `inventory_system/eval_sets`.
+
+Runs every case of an eval set through one agent and Runner, with bounded
+concurrency and a fresh session per case, then checks the tools called
+against `expected_tools` (in order, other calls allowed in between) and the
+reply against `expected_output` (case-insensitive substring).
+
+Model responses are cached on disk, keyed by the prompt (the request's
+conversation), the model name and a hash of the instruction and tool
+declarations, so reruns of an unchanged agent are instant and need no
+network or API key; changing the instruction or a tool's signature misses
+the cache. Cases whose expected tools change stock run one at a time after
+the others, so every case sees the same stock on every run.
+
+Usage:
+    uv run python -m inventory_system.eval_runner --concurrency 8
+    uv run python -m inventory_system.eval_runner --offline      # cached responses only
+    uv run python -m inventory_system.eval_runner --model scripted --output eval.json
+"""
+
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from typing import AsyncGenerator, Dict, List, Optional
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+EVAL_SETS_DIR = os.path.join(os.path.dirname(__file__), "eval_sets")
+
+# Tools that change stock or place orders: their cases run one at a time
+WRITE_TOOLS = frozenset({
+    'update_inventory', 'update_inventory_many', 'place_supplier_order', 'execute_restock'
+})
+
+# Tool calls standing in for the model on each eval case (--model scripted);
+# cases without a script get a plain text answer
+EVAL_SCRIPTS = {
+    "test_greeting": [[("list_products", {})], "Welcome! Here are our products."],
+    "test_stock_check_laptop": [[("check_inventory", {"product_name": "Laptop"})], "We have 5 Laptops."],
+    "test_stock_check_smartphone": [[("check_inventory", {"product_name": "Smartphone"})], "We have 20 Smartphones."],
+    "test_stock_check_headphones": [[("check_inventory", {"product_name": "Headphones"})], "We have 50 Headphones."],
+    "test_list_products": [[("list_products", {})], "Here are all available products."],
+    "test_low_stock_laptop": [
+        [("check_inventory", {"product_name": "Laptop"})],
+        [("search_supplier", {"query": "Laptop"})],
+        [("place_supplier_order", {"product_id": 1, "quantity": 15})],
+        [("update_inventory", {"product_name": "Laptop", "quantity": 15})],
+        "Stock was low, ordered 15 units and updated our records.",
+    ],
+    "test_spanish_cellphone": [[("check_inventory", {"product_name": "Smartphone"})], "Quedan 20 teléfonos."],
+}
+
+# Per-case model call counters, set by the task running the case
+_case_counters: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar('eval_case_counters', default=None)
+
+
+def load_eval_cases(eval_set: str) -> List[Dict]:
+    with open(os.path.join(EVAL_SETS_DIR, f"{eval_set}.json"), encoding="utf-8") as f:
+        return json.load(f)["eval_cases"]
+
+
+def _prompt(llm_request: LlmRequest) -> List[Dict]:
+    """The request's conversation without per-run ids, for the cache key."""
+    prompt = []
+    for content in llm_request.contents:
+        parts = []
+        for part in content.parts or ():
+            if part.text:
+                parts.append({'text': part.text})
+            if part.function_call:
+                parts.append({'call': part.function_call.name, 'args': part.function_call.args or {}})
+            if part.function_response:
+                parts.append({'response': part.function_response.name, 'data': part.function_response.response})
+        prompt.append({'role': content.role, 'parts': parts})
+    return prompt
+
+
+def _instruction_hash(llm_request: LlmRequest) -> str:
+    config = llm_request.config
+    instruction = {
+        'system_instruction': str(config.system_instruction) if config and config.system_instruction else "",
+        'tools': [tool.model_dump(mode='json', exclude_none=True) for tool in (config.tools or [])] if config else [],
+    }
+    return hashlib.sha256(json.dumps(instruction, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CachingLlm(BaseLlm):
+    """Model wrapper replaying responses from an on-disk cache.
+
+    Attributes:
+        inner: The model answering cache misses.
+        cache_dir: One JSON file of responses per cache key.
+        offline: Fail on a cache miss instead of calling `inner`.
+    """
+
+    model: str = "eval-cache"
+    inner: BaseLlm
+    cache_dir: str = ".eval_cache"
+    offline: bool = False
+
+    def cache_key(self, llm_request: LlmRequest) -> str:
+        key = {
+            'prompt': _prompt(llm_request),
+            'model': self.inner.model,
+            'instruction': _instruction_hash(llm_request),
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _count(self, key: str):
+        counters = _case_counters.get()
+        if counters is not None:
+            counters[key] += 1
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        path = os.path.join(self.cache_dir, f"{self.cache_key(llm_request)}.json")
+        if os.path.exists(path):
+            self._count('cache_hits')
+            with open(path, encoding="utf-8") as f:
+                for response in json.load(f)['responses']:
+                    yield LlmResponse.model_validate(response)
+            return
+        if self.offline:
+            raise RuntimeError(f"no cached model response for this prompt ({os.path.basename(path)})")
+
+        self._count('cache_misses')
+        responses = []
+        async for response in self.inner.generate_content_async(llm_request, stream=False):
+            responses.append(response)
+            yield response
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Written whole and renamed, so concurrent runs never read half a file
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({'responses': [r.model_dump(mode='json', exclude_none=True) for r in responses]}, f)
+        os.replace(tmp_path, path)
+
+
+def _create_model(model: str, cases: List[Dict]) -> BaseLlm:
+    if model == "scripted":
+        from .fake_llm import ScriptedLlm
+        return ScriptedLlm(scripts={
+            case["input"]: EVAL_SCRIPTS.get(case["id"], ["I'm an Inventory Manager agent."]) for case in cases
+        })
+    from google.adk.models.registry import LLMRegistry
+    return LLMRegistry.new_llm(model)
+
+
+def check_case(case: Dict, tools_used: List[str], response: str) -> Dict:
+    """Compare a case's run with its expectations."""
+    checks = {}
+    expected_tools = case.get("expected_tools")
+    if expected_tools:
+        remaining = iter(tools_used)
+        checks['tools'] = all(tool in remaining for tool in expected_tools)
+    if case.get("expected_output"):
+        checks['output'] = case["expected_output"].casefold() in response.casefold()
+    return checks
+
+
+async def run_eval(
+    eval_set: str,
+    model: str = "gemini-2.0-flash-exp",
+    concurrency: int = 4,
+    cache_dir: str = ".eval_cache",
+    offline: bool = False,
+    case_ids: Optional[List[str]] = None,
+) -> Dict:
+    from google.adk import Runner
+    from google.genai import types
+    from .agent import create_inventory_agent
+    from .session_store import create_session_service
+
+    cases = load_eval_cases(eval_set)
+    if case_ids:
+        cases = [case for case in cases if case["id"] in case_ids]
+    llm = CachingLlm(inner=_create_model(model, cases), cache_dir=cache_dir, offline=offline)
+    session_service = create_session_service()
+    runner = Runner(agent=create_inventory_agent(llm), app_name="eval_runner", session_service=session_service)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_case(case: Dict) -> Dict:
+        async with semaphore:
+            counters = {'cache_hits': 0, 'cache_misses': 0}
+            _case_counters.set(counters)
+            session_id = str(uuid.uuid4())
+            tools_used, response, error = [], [], None
+            started = time.perf_counter()
+            try:
+                await session_service.create_session(app_name="eval_runner", user_id="eval", session_id=session_id)
+                content = types.Content(role="user", parts=[types.Part(text=case["input"])])
+                async for event in runner.run_async(user_id="eval", session_id=session_id, new_message=content):
+                    if not event.content or event.partial:
+                        continue
+                    for part in event.content.parts or ():
+                        if part.function_call:
+                            tools_used.append(part.function_call.name)
+                        elif part.text and event.is_final_response():
+                            response.append(part.text)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            wall_time = time.perf_counter() - started
+
+        reply = "\n".join(response)
+        checks = check_case(case, tools_used, reply) if error is None else {}
+        return {
+            'id': case["id"],
+            'passed': error is None and all(checks.values()),
+            'checks': checks,
+            'tools_used': tools_used,
+            'expected_tools': case.get("expected_tools", []),
+            'response': reply,
+            'error': error,
+            'wall_time_s': round(wall_time, 4),
+            **counters,
+        }
+
+    # Stock-changing cases run after the rest, one at a time
+    writes = [case for case in cases if WRITE_TOOLS.intersection(case.get("expected_tools", ()))]
+    reads = [case for case in cases if case not in writes]
+    started = time.perf_counter()
+    results = list(await asyncio.gather(*(run_case(case) for case in reads)))
+    for case in writes:
+        results.append(await run_case(case))
+    wall_time = time.perf_counter() - started
+
+    order = {case["id"]: i for i, case in enumerate(cases)}
+    results.sort(key=lambda result: order[result['id']])
+    return {
+        'eval_set': eval_set,
+        'model': model,
+        'concurrency': concurrency,
+        'cases': len(results),
+        'passed': sum(result['passed'] for result in results),
+        'failed': sum(not result['passed'] for result in results),
+        'wall_time_s': round(wall_time, 4),
+        'case_time_total_s': round(sum(result['wall_time_s'] for result in results), 4),
+        'cache_hits': sum(result['cache_hits'] for result in results),
+        'cache_misses': sum(result['cache_misses'] for result in results),
+        'results': results,
+    }
+
+
+def format_report(report: Dict) -> str:
+    lines = []
+    for result in report['results']:
+        mark = "✅" if result['passed'] else "❌"
+        detail = result['error'] or ", ".join(f"{name}={'ok' if ok else 'FAIL'}" for name, ok in result['checks'].items())
+        lines.append(f"{mark} {result['id']:<32} {result['wall_time_s'] * 1000:8.1f}ms  {detail}")
+        if not result['passed'] and result['checks'].get('tools') is False:
+            lines.append(f"     expected tools {result['expected_tools']}, called {result['tools_used']}")
+    lines.append(
+        f"{report['passed']}/{report['cases']} passed in {report['wall_time_s']:.2f}s "
+        f"(cases total {report['case_time_total_s']:.2f}s), "
+        f"model cache {report['cache_hits']} hits / {report['cache_misses']} misses"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an eval set concurrently with cached model responses")
+    parser.add_argument("--eval-set", default="basic_inventory_tests")
+    parser.add_argument("--model", default=os.getenv('EVAL_MODEL', 'gemini-2.0-flash-exp'),
+                        help="model name, or 'scripted' for the offline fake model")
+    parser.add_argument("--concurrency", type=int, default=4, help="cases run at once")
+    parser.add_argument("--cache-dir", default=os.getenv('EVAL_CACHE_DIR', '.eval_cache'))
+    parser.add_argument("--offline", action="store_true", help="only replay cached model responses")
+    parser.add_argument("--case", action="append", dest="cases", help="run only this case id (repeatable)")
+    parser.add_argument("--supplier-stub", action="store_true",
+                        help="answer supplier searches from a local stub (default with --model scripted)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    stub = None
+    if args.supplier_stub or args.model == "scripted":
+        from .benchmark import start_supplier_stub
+        stub = start_supplier_stub()
+        os.environ['SUPPLIER_API_URL'] = f"http://127.0.0.1:{stub.server_port}"
+    try:
+        report = asyncio.run(run_eval(
+            args.eval_set, args.model, args.concurrency, args.cache_dir, args.offline, args.cases
+        ))
+    finally:
+        if stub is not None:
+            stub.shutdown()
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+        print(f"✓ Report written to {args.output}")
+    sys.exit(0 if report['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Deterministic stand-in for Gemini used by benchmarks and offline runs.
+Replays scripted tool calls instead of calling a real model.
+"""
+
+import asyncio
+from typing import AsyncGenerator, Dict, List, Optional, Tuple, Union
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from .context_budget import estimate_tokens
+
+# A script step is either a list of (tool_name, args) calls or the final text
+ScriptStep = Union[List[Tuple[str, Dict]], str]
+
+
+def _last_user_text(contents: List[types.Content]) -> Tuple[Optional[str], int]:
+    """Return the latest user text message and its index in `contents`."""
+    for i in range(len(contents) - 1, -1, -1):
+        content = contents[i]
+        if content.role == "user" and content.parts and any(p.text for p in content.parts):
+            return "".join(p.text for p in content.parts if p.text), i
+    return None, -1
+
+
+class ScriptedLlm(BaseLlm):
+    """Fake model that answers each user message with a fixed tool-call script.
+
+    The step to replay is derived from the request itself (how many model
+    turns followed the latest user message), so one instance can serve any
+    number of concurrent sessions.
+
+    Attributes:
+        scripts: User message -> list of steps. Each step is a list of
+            (tool_name, args) calls or, for the last step, the reply text.
+        default_script: Steps used for messages with no script of their own.
+        latency: Simulated model latency per call, in seconds.
+    """
+
+    model: str = "scripted-fake"
+    scripts: Dict[str, List[ScriptStep]] = {}
+    default_script: List[ScriptStep] = ["I can only help with inventory management."]
+    latency: float = 0.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        contents = llm_request.contents
+        message, index = _last_user_text(contents)
+        script = self.scripts.get(message, self.default_script)
+        step_index = sum(1 for c in contents[index + 1:] if c.role == "model")
+        step = script[min(step_index, len(script) - 1)]
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if isinstance(step, str):
+            parts = [types.Part(text=step)]
+        else:
+            parts = [
+                types.Part(function_call=types.FunctionCall(name=name, args=args))
+                for name, args in step
+            ]
+
+        yield LlmResponse(
+            content=types.Content(role="model", parts=parts),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=estimate_tokens(contents),
+                candidates_token_count=estimate_tokens([types.Content(role="model", parts=parts)]),
+            ),
+            turn_complete=True,
+        )
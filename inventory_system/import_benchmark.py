@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark: time importing inventory_system modules, and building
+the agent on first use, each in a fresh interpreter.
+
+Usage:
+    uv run python -m inventory_system.import_benchmark --runs 5 --output import_times.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules whose import cost every worker, test and CLI pays
+MODULES = [
+    "inventory_system.database",
+    "inventory_system.conversation_logger",
+    "inventory_system.tools",
+    "inventory_system.agent",
+]
+
+# Code run after importing inventory_system.agent to force full construction
+FIRST_USE = "m.get_root_agent()"
+
+CHILD = """
+import time
+start = time.perf_counter()
+import importlib
+m = importlib.import_module({module!r})
+imported = time.perf_counter()
+{first_use}
+print(imported - start, time.perf_counter() - imported)
+"""
+
+
+def time_in_child(module: str, first_use: str = "") -> tuple:
+    """(import seconds, first-use seconds) measured in a fresh interpreter."""
+    env = dict(os.environ)
+    if first_use:
+        # Building the agent checks for a key; no request is ever sent
+        env.setdefault("GOOGLE_API_KEY", "import-benchmark")
+    else:
+        # Imports alone must work without an API key
+        env.pop("GOOGLE_API_KEY", None)
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(module=module, first_use=first_use)],
+        capture_output=True, text=True, env=env, check=True
+    ).stdout.strip().splitlines()[-1]
+    imported, used = output.split()
+    return float(imported), float(used)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure inventory_system cold-start times")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {'python': sys.version.split()[0], 'runs': args.runs, 'import_ms': {}}
+    for module in MODULES:
+        samples = [time_in_child(module)[0] for _ in range(args.runs)]
+        report['import_ms'][module] = round(statistics.median(samples) * 1000, 1)
+        print(f"import {module:<40} {report['import_ms'][module]:>8.1f} ms")
+
+    samples = [time_in_child("inventory_system.agent", FIRST_USE) for _ in range(args.runs)]
+    report['agent_first_use_ms'] = round(statistics.median(s[1] for s in samples) * 1000, 1)
+    report['agent_import_plus_first_use_ms'] = round(statistics.median(sum(s) for s in samples) * 1000, 1)
+    print(f"first use get_root_agent() {'':<25} {report['agent_first_use_ms']:>8.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+        print(f"✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -42,7 +42,8 @@ def init_database():
             product_name VARCHAR(100) NOT NULL UNIQUE,
             quantity INT NOT NULL DEFAULT 0,
             last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-            INDEX idx_product_name (product_name)
+            INDEX idx_product_name (product_name),
+            INDEX idx_quantity (quantity)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
         """
         cursor.execute(create_table_query)
@@ -78,8 +79,17 @@ def init_database():
         print(f"\n✅ Database initialization complete!")
         
         # Initialize conversation logging tables
-        from inventory_system.conversation_logger import conversation_logger
-        conversation_logger.init_tables()
+        from inventory_system.conversation_logger import get_conversation_logger
+        get_conversation_logger().init_tables()
+        
+        # Initialize ADK session tables
+        from inventory_system.session_store import MySQLSessionService
+        MySQLSessionService().init_tables()
+        
+        # Initialize the stock movement ledger (see stock_ledger.py)
+        from inventory_system.database import MySQLInventory
+        MySQLInventory().init_ledger()
+        print("✓ Stock ledger tables ready")
         
     except Error as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,232 @@
+"""
+Call counts, error counts and latency histograms for tools and backend
+methods, exportable as Prometheus text or a periodic log line.
+
+Enabled with INVENTORY_METRICS=true. When disabled, `instrument` returns the
+function unchanged, so there is no per-call overhead at all.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Optional
+from .config import env_flag
+from .results import StockError
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def metrics_enabled() -> bool:
+    """Whether INVENTORY_METRICS turns instrumentation on."""
+    return env_flag('INVENTORY_METRICS')
+
+
+def is_error_result(result) -> bool:
+    """Whether a call failed: a backend StockError or a tool response
+    carrying an "error" code."""
+    if isinstance(result, StockError):
+        return True
+    return isinstance(result, dict) and 'error' in result
+
+
+class Metric:
+    """Call/error counters and a latency histogram for one instrumented name."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool):
+        index = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.calls += 1
+            self.errors += error
+            self.total_seconds += seconds
+            self.buckets[index] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile."""
+        with self._lock:
+            buckets, calls = list(self.buckets), self.calls
+        if not calls:
+            return 0.0
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), buckets):
+            seen += count
+            if seen >= q * calls:
+                return bound
+        return float('inf')
+
+
+_metrics: Dict[str, Metric] = {}
+_metrics_lock = threading.Lock()
+
+
+def get_metric(name: str) -> Metric:
+    with _metrics_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = Metric()
+        return metric
+
+
+def instrument(name: str, enabled: Optional[bool] = None) -> Callable:
+    """Decorator recording calls, errors and latency of a sync or async function.
+
+    Args:
+        name: Metric name, e.g. "tool.check_inventory".
+        enabled: Override INVENTORY_METRICS for this function.
+    """
+    enabled = metrics_enabled() if enabled is None else enabled
+
+    def decorator(func):
+        if not enabled:
+            return func
+        metric = get_metric(name)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                error = True
+                try:
+                    result = await func(*args, **kwargs)
+                    error = is_error_result(result)
+                    return result
+                finally:
+                    metric.observe(time.perf_counter() - start, error)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = is_error_result(result)
+                return result
+            finally:
+                metric.observe(time.perf_counter() - start, error)
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Current metrics keyed by instrumented name."""
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+    return {
+        name: {
+            'calls': metric.calls,
+            'errors': metric.errors,
+            'total_seconds': metric.total_seconds,
+            'p50_le_seconds': metric.quantile(0.5),
+            'p99_le_seconds': metric.quantile(0.99),
+        }
+        for name, metric in items
+    }
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        items = sorted(_metrics.items())
+    lines = [
+        "# HELP inventory_calls_total Instrumented calls.",
+        "# TYPE inventory_calls_total counter",
+    ]
+    lines.extend(f'inventory_calls_total{{name="{name}"}} {m.calls}' for name, m in items)
+    lines.append("# HELP inventory_errors_total Calls that raised or returned an error result.")
+    lines.append("# TYPE inventory_errors_total counter")
+    lines.extend(f'inventory_errors_total{{name="{name}"}} {m.errors}' for name, m in items)
+    lines.append("# HELP inventory_latency_seconds Call latency.")
+    lines.append("# TYPE inventory_latency_seconds histogram")
+    for name, metric in items:
+        with metric._lock:
+            buckets, calls, total = list(metric.buckets), metric.calls, metric.total_seconds
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, buckets):
+            cumulative += count
+            lines.append(f'inventory_latency_seconds_bucket{{name="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f'inventory_latency_seconds_bucket{{name="{name}",le="+Inf"}} {calls}')
+        lines.append(f'inventory_latency_seconds_sum{{name="{name}"}} {total}')
+        lines.append(f'inventory_latency_seconds_count{{name="{name}"}} {calls}')
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """One-line summary suitable for periodic logging."""
+    parts = []
+    for name, stats in snapshot().items():
+        parts.append(
+            f"{name} calls={stats['calls']} errors={stats['errors']} "
+            f"p50<={stats['p50_le_seconds'] * 1000:g}ms p99<={stats['p99_le_seconds'] * 1000:g}ms"
+        )
+    return "📈 " + (" | ".join(parts) if parts else "no calls recorded")
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Serve render_prometheus() at /metrics from a daemon thread."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def start_periodic_logging(interval: float) -> threading.Event:
+    """Print format_summary() every `interval` seconds; set the event to stop."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            print(format_summary())
+
+    threading.Thread(target=run, name="metrics-logger", daemon=True).start()
+    return stop
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters_from_env():
+    """Start the exporters configured by INVENTORY_METRICS_PORT and
+    INVENTORY_METRICS_LOG_INTERVAL (once per process, only when enabled)."""
+    global _exporters_started
+    if not metrics_enabled():
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.getenv('INVENTORY_METRICS_PORT')
+    if port:
+        start_metrics_server(int(port))
+        print(f"📈 Metrics at http://0.0.0.0:{port}/metrics")
+    interval = os.getenv('INVENTORY_METRICS_LOG_INTERVAL')
+    if interval:
+        start_periodic_logging(float(interval))
@@ -0,0 +1,240 @@
+"""
+Background, batched writer for conversation log rows.
+Keeps database round trips off the request path.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence
+
+OVERFLOW_POLICIES = ("block", "drop", "spill")
+
+
+class BatchedLogWriter:
+    """Queues rows and writes them from a worker thread in batches.
+
+    A batch is flushed when `batch_size` rows are waiting or the oldest row
+    has waited `flush_interval` seconds. The queue holds at most `max_queue`
+    rows; when it is full the `overflow` policy applies:
+
+    - "block": wait up to `block_timeout` seconds for room, then drop
+    - "drop": drop the row immediately
+    - "spill": append the row to `spill_path` (JSON lines); spilled rows are
+      replayed once the queue drains. Batches that fail to write are spilled
+      too.
+    """
+
+    def __init__(
+        self,
+        write_rows: Callable[[List[Sequence]], None],
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        max_queue: int = 10000,
+        overflow: str = "block",
+        block_timeout: float = 5.0,
+        spill_path: Optional[str] = None
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("overflow='spill' requires a spill_path")
+        self._write_rows = write_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+
+        self._queue = deque()  # (enqueued_at, row)
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._inflight = 0
+        self._flush_waiters = 0
+        self._closed = False
+        self._healthy = True
+        self._thread = None
+        self._counters = {
+            'queued': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'flushes': 0,
+            'failed_flushes': 0,
+        }
+
+    def _ensure_started(self):
+        """Start the worker on first use; caller holds the lock."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="conversation-log-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, row: Sequence) -> bool:
+        """Queue a row for writing.
+
+        Returns:
+            False if the row was dropped, True if it was queued or spilled.
+        """
+        with self._cond:
+            if self._closed:
+                self._counters['dropped'] += 1
+                return False
+            self._ensure_started()
+
+            if len(self._queue) >= self.max_queue and self.overflow == "block":
+                deadline = time.monotonic() + self.block_timeout
+                while len(self._queue) >= self.max_queue and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            if len(self._queue) < self.max_queue and not self._closed:
+                self._queue.append((time.monotonic(), row))
+                self._counters['queued'] += 1
+                if len(self._queue) >= min(self.batch_size, self.max_queue):
+                    self._cond.notify_all()
+                return True
+
+            if self.overflow != "spill":
+                self._counters['dropped'] += 1
+                return False
+
+        self._spill([row])
+        return True
+
+    def _spill(self, rows: List[Sequence], count: bool = True):
+        if not rows:
+            return
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(list(row)) + "\n" for row in rows)
+            if count:
+                with self._cond:
+                    self._counters['spilled'] += len(rows)
+        except OSError as e:
+            print(f"Error spilling conversation log rows: {e}")
+            with self._cond:
+                self._counters['dropped'] += len(rows)
+
+    def _replay_spill(self):
+        """Write back rows spilled to disk while the queue was full."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        replay_path = self.spill_path + ".replay"
+        with self._spill_lock:
+            try:
+                os.replace(self.spill_path, replay_path)
+            except OSError:
+                return
+        with open(replay_path, encoding="utf-8") as f:
+            rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        os.remove(replay_path)
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            if not self._write(batch):
+                # Still failing: put the rest back without counting it twice
+                self._spill(rows[start:], count=False)
+                return
+            with self._cond:
+                self._counters['replayed'] += len(batch)
+
+    def _write(self, batch: List[Sequence]) -> bool:
+        try:
+            self._write_rows(batch)
+        except Exception as e:
+            print(f"Error flushing {len(batch)} conversation log rows: {e}")
+            with self._cond:
+                self._counters['failed_flushes'] += 1
+                self._healthy = False
+            return False
+        with self._cond:
+            self._counters['flushes'] += 1
+            self._counters['flushed'] += len(batch)
+            self._healthy = True
+        return True
+
+    def _batch_ready(self) -> bool:
+        """Whether the worker should flush now; caller holds the lock."""
+        if not self._queue:
+            return False
+        if self._closed or self._flush_waiters or len(self._queue) >= min(self.batch_size, self.max_queue):
+            return True
+        return time.monotonic() - self._queue[0][0] >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._batch_ready() and not (self._closed and not self._queue):
+                    if self._queue:
+                        self._cond.wait(self._queue[0][0] + self.flush_interval - time.monotonic())
+                    else:
+                        self._cond.wait(self.flush_interval)
+                        if not self._queue:
+                            break
+                batch = [self._queue.popleft()[1] for _ in range(min(self.batch_size, len(self._queue)))]
+                self._inflight = len(batch)
+                # Room was freed for blocked producers
+                self._cond.notify_all()
+
+            if batch and not self._write(batch):
+                if self.spill_path:
+                    self._spill(batch)
+                else:
+                    with self._cond:
+                        self._counters['dropped'] += len(batch)
+            if self.spill_path:
+                with self._cond:
+                    # Only retry spilled rows once the database accepts writes again
+                    replay = self._healthy and not self._queue
+                if replay:
+                    self._replay_spill()
+
+            with self._cond:
+                self._inflight = 0
+                self._cond.notify_all()
+                if self._closed and not self._queue:
+                    return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued row has been written.
+
+        Returns:
+            True if the queue drained within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                while self._queue or self._inflight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flush_waiters -= 1
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """Stop accepting rows, flush what is queued and stop the worker."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> Dict:
+        """Counters of queued/flushed/dropped rows for monitoring."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats['pending'] = len(self._queue) + self._inflight
+        return stats
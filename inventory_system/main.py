@@ -2,9 +2,10 @@ import asyncio
 import uuid
 from dotenv import load_dotenv
 from google.adk import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.runners import types
 from .agent import create_inventory_agent
+from .session_store import create_session_service
+from .instrumentation import format_summary, metrics_enabled
 
 # Load environment variables from .env file
 load_dotenv()
@@ -13,7 +14,7 @@ async def run_simulation():
     print("--- Starting Inventory Simulation ---")
     
     agent = create_inventory_agent()
-    session_service = InMemorySessionService()
+    session_service = create_session_service()
     app_name = "inventory_app"
     
     runner = Runner(
@@ -94,6 +95,8 @@ async def run_simulation():
         print("--- Simulation Complete ---")
         print(f"Total Turns: {turn_count}")
         print(f"{'='*60}")
+        if metrics_enabled():
+            print(format_summary())
         
     except Exception as e:
         print(f"Error running agent: {e}")
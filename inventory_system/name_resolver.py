@@ -0,0 +1,213 @@
+"""
+Product-name resolution in front of the storage backend.
+
+Model-supplied names ("laptops", "Smart phone", "Labtop") are mapped to the
+catalog's canonical names through a precomputed index: an exact table of
+folded names (case, whitespace, punctuation and plural endings) and a
+trigram index for ranked suggestions when nothing folds to the same key.
+Unknown-but-similar names never reach storage, so typos no longer
+auto-create junk products.
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .config import env_flag, load_env
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+# Suggestions must share at least this fraction of trigrams (Jaccard)
+MIN_SIMILARITY = 0.3
+
+# Candidates scored per suggestion lookup, gathered from the rarest trigrams first
+MAX_CANDIDATES = 2000
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith(("ses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_name(name: str) -> str:
+    """Fold a product name for matching: "Smart-Phones " -> "smartphone"."""
+    words = [_singular(word) for word in _NON_WORD.sub(" ", name.casefold()).split()]
+    return "".join(words)
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ProductNameResolver:
+    """Maps requested product names to canonical catalog names.
+
+    `resolve` returns (canonical name or None, ranked suggestions). Products
+    created through this process are added incrementally with `add`; the
+    whole index is rebuilt from storage every `refresh_interval` seconds to
+    pick up products added elsewhere.
+    """
+
+    def __init__(self, backend=None, refresh_interval: float = 300.0):
+        self.backend = backend
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # Products added while a background refresh reads the backend
+        self._added_during_refresh: List[str] = []
+        self._clear()
+        if backend is not None:
+            self.refresh()
+
+    def _clear(self):
+        self._names: Set[str] = set()
+        self._by_key: Dict[str, List[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        self._built_at = time.monotonic()
+
+    def _add_locked(self, name: str):
+        if name in self._names:
+            return
+        self._names.add(name)
+        key = normalize_name(name)
+        if not key:
+            return
+        names = self._by_key.setdefault(key, [])
+        names.append(name)
+        if len(names) == 1:
+            grams = trigrams(key)
+            self._gram_counts[key] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def add(self, names: Iterable[str]):
+        """Index products created since the last refresh."""
+        with self._lock:
+            for name in names:
+                self._add_locked(name)
+                if self._refreshing:
+                    self._added_during_refresh.append(name)
+
+    def refresh(self):
+        """Rebuild the index from every product in the backend."""
+        names = []
+        offset, page_size = 0, 1000
+        while True:
+            page = self.backend.list_products(offset, page_size, "")
+            names.extend(name for name, _ in page)
+            if len(page) < page_size:
+                break
+            offset += page_size
+
+        # Build the new index without holding the lock, then swap it in
+        fresh = ProductNameResolver()
+        fresh.add(names)
+        with self._lock:
+            self._names, self._by_key = fresh._names, fresh._by_key
+            self._postings, self._gram_counts = fresh._postings, fresh._gram_counts
+            self._built_at = time.monotonic()
+            for name in self._added_during_refresh:
+                self._add_locked(name)
+            self._added_during_refresh = []
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️ Product name index refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+                    # Retry after another interval rather than on every call
+                    self._built_at = time.monotonic()
+
+        threading.Thread(target=run, name="name-resolver-refresh", daemon=True).start()
+
+    def suggest(self, name: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """Canonical names most similar to `name`, with their similarity in [0, 1]."""
+        key = normalize_name(name)
+        if not key:
+            return []
+        grams = trigrams(key)
+        with self._lock:
+            # Trigrams shared by most of the catalog ("pro", "ion") would make
+            # every product a candidate; collect from the rarest ones instead
+            postings = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+            candidates = set()
+            for keys in postings:
+                if candidates and len(candidates) + len(keys) > MAX_CANDIDATES:
+                    break
+                candidates.update(keys)
+            scored = []
+            for candidate in candidates:
+                common = len(grams & trigrams(candidate))
+                score = common / (len(grams) + self._gram_counts[candidate] - common)
+                if score >= MIN_SIMILARITY:
+                    scored.append((score, candidate))
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            return [
+                (canonical, round(score, 3))
+                for score, candidate in scored[:limit]
+                for canonical in self._by_key[candidate]
+            ][:limit]
+
+    def resolve(self, name: str, limit: int = 3) -> Tuple[Optional[str], List[Tuple[str, float]]]:
+        """(canonical name, []) on an exact or folded match, else (None, suggestions)."""
+        if self.backend is not None and time.monotonic() - self._built_at > self.refresh_interval:
+            self._refresh_in_background()
+        with self._lock:
+            if name in self._names:
+                return name, []
+            matches = self._by_key.get(normalize_name(name), ())
+            if len(matches) == 1:
+                return matches[0], []
+        if matches:
+            # Several products fold to the same key: let the caller pick
+            return None, [(match, 1.0) for match in matches[:limit]]
+        return None, self.suggest(name, limit)
+
+
+def resolver_enabled() -> bool:
+    """Whether PRODUCT_RESOLVER puts the resolver in front of the tools."""
+    return env_flag('PRODUCT_RESOLVER', 'true')
+
+
+_resolver: Optional[ProductNameResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def peek_name_resolver() -> Optional[ProductNameResolver]:
+    """The process-wide resolver if it has been built already."""
+    return _resolver
+
+
+def get_name_resolver() -> ProductNameResolver:
+    """Process-wide resolver over get_inventory_backend(), built on first use.
+
+    PRODUCT_RESOLVER_REFRESH sets the full-rebuild interval (default 300s).
+    """
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                from .database import get_inventory_backend
+                load_env()
+                _resolver = ProductNameResolver(
+                    get_inventory_backend(),
+                    refresh_interval=float(os.getenv('PRODUCT_RESOLVER_REFRESH', 300))
+                )
+    return _resolver
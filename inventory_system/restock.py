@@ -0,0 +1,141 @@
+"""
+Deterministic restock planner.
+
+Applies the restocking rule (below RESTOCK_THRESHOLD units, order up to
+RESTOCK_TARGET) to the whole catalog at once: one low-stock query against
+the backend, one supplier lookup per distinct product run concurrently, and
+one atomic stock update, with no model round trips per product.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from .database import InventoryBackend
+from .instrumentation import is_error_result
+from .results import RESTOCK_FAILED, StockError
+from .supplier_client import SupplierClient, normalize_query
+
+RESTOCK_THRESHOLD = 10
+RESTOCK_TARGET = 20
+
+# Concurrent supplier searches while planning
+MAX_SUPPLIER_LOOKUPS = 8
+
+
+def find_supplier_offers(supplier: SupplierClient, product_names: List[str]) -> Dict[str, Optional[Dict]]:
+    """Best supplier offer per product name (None if there is none).
+
+    Names that normalize to the same query share a single search.
+    """
+    queries = {}
+    for name in product_names:
+        queries.setdefault(normalize_query(name), []).append(name)
+
+    def lookup(query):
+        try:
+            products = supplier.search(query, limit=1)
+            return products[0] if products else None
+        except Exception as e:
+            return {'error': str(e)}
+
+    offers = {}
+    if not queries:
+        return offers
+    with ThreadPoolExecutor(max_workers=min(MAX_SUPPLIER_LOOKUPS, len(queries))) as pool:
+        for (query, names), offer in zip(queries.items(), pool.map(lookup, queries)):
+            for name in names:
+                offers[name] = offer
+    return offers
+
+
+def plan_restock(
+    backend: InventoryBackend,
+    supplier: SupplierClient,
+    threshold: int = RESTOCK_THRESHOLD,
+    target: int = RESTOCK_TARGET
+) -> List[Dict]:
+    """Restock plan for every product below `threshold` units.
+
+    Each entry holds the product, its current quantity, the quantity to
+    order to reach `target`, and the chosen supplier offer (None if no
+    supplier carries it, or a dict with an 'error' if the lookup failed).
+    """
+    low = [(name, quantity) for name, quantity in backend.low_stock(threshold) if quantity < target]
+    offers = find_supplier_offers(supplier, [name for name, _ in low])
+    return [
+        {'product': name, 'current': quantity, 'order_quantity': target - quantity, 'offer': offers.get(name)}
+        for name, quantity in low
+    ]
+
+
+def execute_restock(backend: InventoryBackend, supplier: SupplierClient, plan: List[Dict]) -> Dict:
+    """Order every planned product that has a supplier offer, then record the
+    incoming stock in one all-or-nothing update.
+
+    Returns the orders placed, the entries skipped and the backend's result.
+    """
+    ordered, skipped = [], []
+    for item in plan:
+        offer = item['offer']
+        if not offer or 'error' in offer:
+            skipped.append(item)
+            continue
+        confirmation = supplier.place_order(offer['id'], item['order_quantity'])
+        ordered.append(dict(item, confirmation=confirmation))
+
+    update = None
+    if ordered:
+        update = backend.update_stock_many({item['product']: item['order_quantity'] for item in ordered})
+    return {'ordered': ordered, 'skipped': skipped, 'update': update}
+
+
+def _skip_reason(offer: Optional[Dict]) -> Optional[str]:
+    """Why a planned product cannot be ordered (None if it can)."""
+    if offer is None:
+        return "no supplier match"
+    if 'error' in offer:
+        return f"supplier lookup failed: {offer['error']}"
+    return None
+
+
+def summarize_plan(plan: List[Dict], max_items: int = 50) -> Dict:
+    """Compact plan_restock tool response, listing at most `max_items` products."""
+    products = {}
+    for item in plan[:max_items]:
+        entry = {'current': item['current'], 'order': item['order_quantity']}
+        reason = _skip_reason(item['offer'])
+        if reason:
+            entry['skipped'] = reason
+        else:
+            entry.update(supplier_id=item['offer']['id'], price=item['offer']['price'])
+        products[item['product']] = entry
+    summary = {'plan': products}
+    if len(plan) > max_items:
+        summary['more'] = len(plan) - max_items
+    if plan:
+        summary['units'] = sum(item['order_quantity'] for item in plan)
+        summary['cost'] = round(sum(
+            item['offer']['price'] * item['order_quantity']
+            for item in plan if not _skip_reason(item['offer'])
+        ), 2)
+    return summary
+
+
+def summarize_execution(result: Dict, max_items: int = 50) -> Dict:
+    """Compact execute_restock tool response."""
+    ordered, skipped, update = result['ordered'], result['skipped'], result['update']
+    restocked = {item['product']: item['order_quantity'] for item in ordered[:max_items]}
+    if is_error_result(update):
+        cause = update.to_dict() if isinstance(update, StockError) else {'message': str(update)}
+        return {
+            'error': RESTOCK_FAILED,
+            'message': "Orders were placed but updating the inventory failed",
+            'cause': cause,
+            'ordered': restocked,
+        }
+
+    summary = {'restocked': restocked}
+    if len(ordered) > max_items:
+        summary['more'] = len(ordered) - max_items
+    if skipped:
+        summary['skipped'] = {item['product']: _skip_reason(item['offer']) for item in skipped[:max_items]}
+    return summary
@@ -0,0 +1,52 @@
+"""
+Typed results of inventory backend calls.
+
+Backends return these instead of formatted sentences, so callers can tell
+failures from readings without string matching; the tools turn them into
+compact dicts for the model.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+# Error codes of backend results and tool responses
+INSUFFICIENT_STOCK = "insufficient_stock"
+DATABASE_ERROR = "database_error"
+NO_PRODUCTS = "no_products"
+UNKNOWN_PRODUCT = "unknown_product"
+SUPPLIER_ERROR = "supplier_error"
+RESTOCK_FAILED = "restock_failed"
+
+
+@dataclass(slots=True, frozen=True)
+class StockLevel:
+    """Current quantity of one product."""
+    product: str
+    quantity: int
+
+
+@dataclass(slots=True, frozen=True)
+class StockChange:
+    """Quantity of one product before and after an update."""
+    product: str
+    old: int
+    new: int
+
+
+@dataclass(slots=True, frozen=True)
+class StockError:
+    """A backend call that failed or was refused.
+
+    For INSUFFICIENT_STOCK, `insufficient` holds the current stock of every
+    product the change would have taken below zero.
+    """
+    code: str
+    message: str
+    insufficient: Tuple[StockLevel, ...] = ()
+
+    def to_dict(self) -> Dict:
+        """Tool response for this error."""
+        result = {'error': self.code, 'message': self.message}
+        if self.insufficient:
+            result['current'] = {level.product: level.quantity for level in self.insufficient}
+        return result
@@ -0,0 +1,158 @@
+"""
+Throughput scaling of the multi-process server with its worker count.
+
+Starts `inventory_system.server` with the scripted fake model once per
+worker count, drives it with concurrent /chat requests over HTTP, shuts it
+down with SIGTERM and reports turns/s, speedup over the smallest worker
+count and latency percentiles as JSON.
+
+Usage:
+    uv run python -m inventory_system.serve_benchmark --workers 1,2,4 --requests 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List
+from .benchmark import SCENARIOS, percentiles, start_supplier_stub
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_healthy(client, url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            if (await client.get(f"{url}/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become healthy in time")
+
+
+async def _drive(url: str, process: subprocess.Popen, requests: int, concurrency: int, messages: List[str]) -> Dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60.0, limits=limits) as client:
+        await _wait_healthy(client, url, process)
+        semaphore = asyncio.Semaphore(concurrency)
+        samples, failures, workers_seen = [], [], set()
+
+        async def turn(i: int, record: bool = True):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{url}/chat", json={
+                        'user_id': f"bench-user-{i}", 'message': messages[i % len(messages)]
+                    })
+                    response.raise_for_status()
+                    workers_seen.add(response.json()['worker'])
+                except Exception as e:
+                    if record:
+                        failures.append(f"{type(e).__name__}: {e}")
+                    return
+                if record:
+                    samples.append(time.perf_counter() - started)
+
+        # Warm up: let every worker build its agent before measuring
+        await asyncio.gather(*(turn(i, record=False) for i in range(concurrency * 2)))
+        started = time.perf_counter()
+        await asyncio.gather(*(turn(i) for i in range(requests)))
+        wall_time = time.perf_counter() - started
+
+    return {
+        'wall_time_s': round(wall_time, 4),
+        'turns': len(samples),
+        'turns_per_sec': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+        'failed_turns': len(failures),
+        'failures': failures[:10],
+        'workers_seen': len(workers_seen),
+        'turn_latency': percentiles(samples),
+    }
+
+
+def run_workers(workers: int, requests: int, concurrency: int, model_latency: float, env: Dict[str, str]) -> Dict:
+    """Serve with `workers` processes, measure, then shut down gracefully."""
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "inventory_system.server", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        env=dict(env, SERVE_SCRIPTED_MODEL="true", SERVE_MODEL_LATENCY=str(model_latency)),
+    )
+    messages = [message for turns in SCENARIOS.values() for message, _ in turns]
+    try:
+        result = asyncio.run(_drive(f"http://127.0.0.1:{port}", process, requests, concurrency, messages))
+    finally:
+        stopping = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return {
+        'workers': workers,
+        **result,
+        'shutdown_s': round(time.perf_counter() - stopping, 3),
+        # uvicorn re-raises the SIGTERM it handled once shutdown completes
+        'clean_exit': process.returncode in (0, -signal.SIGTERM),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the multi-process server by worker count")
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts to compare")
+    parser.add_argument("--requests", type=int, default=1000, help="measured /chat requests per run")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight at once")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="simulated seconds per model call")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(",") if count.strip()]
+    stub = start_supplier_stub()
+    env = dict(os.environ, SUPPLIER_API_URL=f"http://127.0.0.1:{stub.server_port}")
+    try:
+        runs = []
+        for workers in worker_counts:
+            print(f"⏱️ {workers} worker(s)...", file=sys.stderr)
+            runs.append(run_workers(workers, args.requests, args.concurrency, args.model_latency, env))
+    finally:
+        stub.shutdown()
+
+    baseline = runs[0]['turns_per_sec'] if runs else 0.0
+    for run in runs:
+        run['speedup'] = round(run['turns_per_sec'] / baseline, 2) if baseline else None
+
+    report = {
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'model_latency_s': args.model_latency,
+            'cpu_count': os.cpu_count(),
+        },
+        'runs': runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✓ Report written to {args.output}")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
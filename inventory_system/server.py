@@ -0,0 +1,220 @@
+"""
+Multi-process HTTP serving entry point for the inventory agent.
+
+uvicorn spawns SERVE_WORKERS worker processes sharing one listening socket.
+Each worker builds its own agent, Runner and MySQL connection pool, while
+sessions live in the shared session store (MySQL with USE_MYSQL=true), so
+any worker can serve any turn of a conversation. On SIGTERM/SIGINT workers
+stop accepting connections, finish in-flight turns and drain the
+conversation log queue before exiting.
+
+Usage:
+    uv run python -m inventory_system.server --workers 4 --port 8080
+    curl -X POST localhost:8080/chat -H 'Content-Type: application/json' \\
+        -d '{"user_id": "u1", "message": "What is the stock of Laptop?"}'
+"""
+
+import argparse
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import Optional
+from .config import env_flag, load_env
+
+APP_NAME = "inventory_app"
+
+
+def _create_model():
+    """Gemini by default; the scripted fake model with SERVE_SCRIPTED_MODEL=true
+    (benchmarks and offline runs)."""
+    if not env_flag('SERVE_SCRIPTED_MODEL'):
+        return os.getenv('SERVE_MODEL', 'gemini-2.0-flash-exp')
+    from .benchmark import SCENARIOS
+    from .fake_llm import ScriptedLlm
+    scripts = {message: script for turns in SCENARIOS.values() for message, script in turns}
+    return ScriptedLlm(scripts=scripts, latency=float(os.getenv('SERVE_MODEL_LATENCY', 0)))
+
+
+def create_app():
+    """FastAPI app for one worker process (uvicorn factory)."""
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import PlainTextResponse
+    from google.adk import Runner
+    from google.genai import types
+    from pydantic import BaseModel
+    from google.adk.events import Event, EventActions
+    from .agent import create_inventory_agent
+    from .answer_cache import SESSION_STATE_KEY, conversation_digest, get_answer_cache, session_uses_cache
+    from .async_backend import CoalescingAsyncInventory, get_async_inventory_backend
+    from .connection_pool import close_pools, pool_stats
+    from .context_budget import get_context_compactor
+    from .conversation_logger import get_conversation_logger
+    from .database import CoalescingInventory, find_backend, get_inventory_backend
+    from .instrumentation import render_prometheus
+    from .session_store import create_session_service
+
+    load_env()
+    session_service = create_session_service()
+    agent = create_inventory_agent(_create_model())
+    runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+    drain_timeout = float(os.getenv('SERVE_DRAIN_TIMEOUT', 10))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        # Runs once uvicorn has finished the in-flight requests
+        logger = get_conversation_logger()
+        if not logger.flush(drain_timeout):
+            print(f"⚠️ Worker {os.getpid()}: conversation log not drained, {logger.stats()}")
+        logger.close(drain_timeout)
+        close_pools()
+
+    app = FastAPI(title="Inventory Agent", lifespan=lifespan)
+
+    class ChatRequest(BaseModel):
+        user_id: str
+        message: str
+        session_id: Optional[str] = None
+        # False opts the session out of the answer cache from this turn on
+        answer_cache: Optional[bool] = None
+
+    async def answer_from_cache(session, content, answer) -> None:
+        """Record a cached answer in the session like a turn the agent ran."""
+        invocation_id = Event.new_id()
+        await session_service.append_event(session, Event(
+            invocation_id=invocation_id, author="user", content=content
+        ))
+        await session_service.append_event(session, Event(
+            invocation_id=invocation_id, author=agent.name,
+            content=types.Content(role="model", parts=[types.Part(text=answer.response)])
+        ))
+
+    @app.post("/chat")
+    async def chat(request: ChatRequest):
+        session_id = request.session_id or str(uuid.uuid4())
+        session = await session_service.get_session(
+            app_name=APP_NAME, user_id=request.user_id, session_id=session_id
+        )
+        if session is None:
+            session = await session_service.create_session(
+                app_name=APP_NAME, user_id=request.user_id, session_id=session_id
+            )
+        if request.answer_cache is not None and session_uses_cache(session.state) != request.answer_cache:
+            await session_service.append_event(session, Event(
+                invocation_id=Event.new_id(), author="user",
+                actions=EventActions(state_delta={SESSION_STATE_KEY: request.answer_cache})
+            ))
+
+        content = types.Content(role="user", parts=[types.Part(text=request.message)])
+        cache = get_answer_cache()
+        if cache is not None and not session_uses_cache(session.state):
+            cache.bypassed()
+            cache = None
+        if cache is not None:
+            context = conversation_digest(session.events)
+            answer = cache.lookup(request.message, context)
+            if answer is not None:
+                await answer_from_cache(session, content, answer)
+                get_conversation_logger().log_conversation(
+                    session_id, request.message, None, answer.response, list(answer.tools_used)
+                )
+                return {
+                    'session_id': session_id, 'response': answer.response,
+                    'tools_used': list(answer.tools_used), 'worker': os.getpid(), 'cached': True,
+                }
+            version = cache.version()
+
+        reasoning, response, tools_used = [], [], []
+        try:
+            async for event in runner.run_async(
+                user_id=request.user_id, session_id=session_id, new_message=content
+            ):
+                if not event.content or event.partial:
+                    continue
+                for part in event.content.parts or ():
+                    if part.function_call:
+                        tools_used.append(part.function_call.name)
+                    elif part.text:
+                        (response if event.is_final_response() else reasoning).append(part.text)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error running agent: {e}")
+
+        reply = "\n".join(response)
+        if cache is not None:
+            cache.store(request.message, context, version, reply, tools_used)
+        get_conversation_logger().log_conversation(
+            session_id, request.message, "\n".join(reasoning) or None, reply, tools_used
+        )
+        return {
+            'session_id': session_id, 'response': reply, 'tools_used': tools_used,
+            'worker': os.getpid(), 'cached': False,
+        }
+
+    @app.get("/health")
+    async def health():
+        return {'status': 'ok', 'worker': os.getpid()}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        # This worker's metrics only: scrape each worker or aggregate downstream
+        return render_prometheus()
+
+    @app.get("/stats")
+    async def stats():
+        compactor, cache = get_context_compactor(), get_answer_cache()
+        coalescing = {
+            'async': find_backend(get_async_inventory_backend(), CoalescingAsyncInventory),
+            'threads': find_backend(get_inventory_backend(), CoalescingInventory),
+        }
+        return {
+            'worker': os.getpid(),
+            'connection_pools': pool_stats(),
+            'conversation_log': get_conversation_logger().stats(),
+            'context_budget': compactor.stats() if compactor else None,
+            'answer_cache': cache.stats() if cache else None,
+            'read_coalescing': {name: backend.stats() for name, backend in coalescing.items() if backend} or None,
+        }
+
+    return app
+
+
+def main():
+    import uvicorn
+    from .database import use_mysql, use_sqlite
+
+    load_env()
+    parser = argparse.ArgumentParser(description="Serve the inventory agent over HTTP with several worker processes")
+    parser.add_argument("--host", default=os.getenv('SERVE_HOST', '0.0.0.0'))
+    parser.add_argument("--port", type=int, default=int(os.getenv('SERVE_PORT', 8080)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv('SERVE_WORKERS') or os.cpu_count() or 1))
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=float(os.getenv('SERVE_GRACEFUL_TIMEOUT', 30)),
+        help="seconds to wait for in-flight turns on shutdown"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1 and not use_mysql():
+        print("⚠️ Without USE_MYSQL=true each worker keeps its own sessions (and in-memory "
+              "stock): multi-turn conversations need sticky routing")
+    if args.workers > 1 and env_flag('ANSWER_CACHE') and (use_mysql() or use_sqlite()):
+        # Each worker only sees its own stock changes: the others' answers would go stale
+        print("⚠️ ANSWER_CACHE is off: workers sharing storage cannot invalidate each other's answers")
+        os.environ['ANSWER_CACHE'] = ''
+    # Every worker serves /metrics itself; a shared exporter port would clash.
+    # Blanked rather than removed so the workers' .env loading keeps it off
+    os.environ['INVENTORY_METRICS_PORT'] = ''
+
+    print(f"🚀 Serving inventory agent on http://{args.host}:{args.port} with {args.workers} workers")
+    uvicorn.run(
+        "inventory_system.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        log_level=os.getenv('SERVE_LOG_LEVEL', 'warning'),
+    )
+
+
+if __name__ == "__main__":
+    main()
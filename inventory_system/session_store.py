@@ -0,0 +1,643 @@
+"""
+MySQL-backed ADK session service.
+
+Sessions, their events and app/user-scoped state live in MySQL, so any
+worker process can serve any session. Each process keeps an LRU of hot
+sessions whose events are loaded lazily and revalidated against the stored
+revision (at most every few seconds; writes made through this process keep
+them current), evicts sessions idle for longer than the TTL, and compacts
+the event history of long sessions.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from .config import load_env
+from .connection_pool import get_pool, mysql_error
+
+from google.adk.errors import StaleSessionError
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, InMemorySessionService, Session
+from google.adk.sessions import _session_util
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+# MySQL error code for a duplicate primary key
+DUPLICATE_ENTRY = 1062
+
+SCOPED_PREFIXES = (State.APP_PREFIX, State.USER_PREFIX, State.TEMP_PREFIX)
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS adk_sessions (
+        app_name VARCHAR(128) NOT NULL,
+        user_id VARCHAR(128) NOT NULL,
+        id VARCHAR(128) NOT NULL,
+        state LONGTEXT NOT NULL,
+        create_time DOUBLE NOT NULL,
+        update_time DOUBLE NOT NULL,
+        revision INT NOT NULL DEFAULT 0,
+        event_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (app_name, user_id, id),
+        INDEX idx_update_time (update_time)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS adk_session_events (
+        seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+        app_name VARCHAR(128) NOT NULL,
+        user_id VARCHAR(128) NOT NULL,
+        session_id VARCHAR(128) NOT NULL,
+        event_id VARCHAR(128) NOT NULL,
+        author VARCHAR(256),
+        timestamp DOUBLE NOT NULL,
+        event_data LONGTEXT NOT NULL,
+        INDEX idx_session_seq (app_name, user_id, session_id, seq)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS adk_app_state (
+        app_name VARCHAR(128) NOT NULL,
+        state_key VARCHAR(255) NOT NULL,
+        value LONGTEXT,
+        PRIMARY KEY (app_name, state_key)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS adk_user_state (
+        app_name VARCHAR(128) NOT NULL,
+        user_id VARCHAR(128) NOT NULL,
+        state_key VARCHAR(255) NOT NULL,
+        value LONGTEXT,
+        PRIMARY KEY (app_name, user_id, state_key)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    """,
+]
+
+SESSION_KEY = "app_name = %s AND user_id = %s AND id = %s"
+EVENT_KEY = "app_name = %s AND user_id = %s AND session_id = %s"
+
+
+def _session_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Only the session-scoped keys of a (merged) session state."""
+    return {key: value for key, value in state.items() if not key.startswith(SCOPED_PREFIXES)}
+
+
+def _filter_events(events: List[Event], config: Optional[GetSessionConfig]) -> List[Event]:
+    if config is None:
+        return events
+    if config.num_recent_events is not None:
+        events = events[-config.num_recent_events:] if config.num_recent_events else []
+    if config.after_timestamp is not None:
+        events = [event for event in events if event.timestamp >= config.after_timestamp]
+    return events
+
+
+def _is_tool_response(event: Event) -> bool:
+    return bool(event.get_function_responses())
+
+
+class _CachedSession:
+    """A hot session: session-scoped state, app/user state, and its events once loaded."""
+
+    __slots__ = ('session', 'revision', 'events_loaded', 'event_count', 'scoped', 'touched_at', 'validated_at')
+
+    def __init__(self, session: Session, revision: int, events_loaded: bool, event_count: int, scoped: Dict):
+        self.session = session
+        self.revision = revision
+        self.events_loaded = events_loaded
+        self.event_count = event_count
+        self.scoped = scoped
+        self.touched_at = self.validated_at = time.monotonic()
+
+
+class MySQLSessionService(BaseSessionService):
+    """ADK session service persisted in MySQL, with an in-process LRU of hot sessions.
+
+    Args:
+        cache_size: Hot sessions kept in memory per process.
+        cache_ttl: Seconds after which an untouched session leaves the cache.
+        revalidate_interval: Seconds a hot session is served from memory
+            before its stored revision is checked again, which is how long
+            changes made by other processes may take to show up.
+        max_events: Once a session has more stored events than this, its
+            oldest events are deleted down to roughly `keep_events`, cutting
+            at the start of a user turn (or, if none is close, at the next
+            event that is not a tool response). The session state is kept.
+        keep_events: Events kept by compaction.
+        idle_ttl: If set, sessions not updated for this many seconds are
+            deleted from MySQL (checked at most every `purge_interval`).
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 1000,
+        cache_ttl: float = 600.0,
+        revalidate_interval: float = 2.0,
+        max_events: int = 200,
+        keep_events: int = 100,
+        idle_ttl: Optional[float] = None,
+        purge_interval: float = 600.0
+    ):
+        load_env()
+        self.config = {
+            'host': os.getenv('MYSQL_HOST', 'localhost'),
+            'user': os.getenv('MYSQL_USER', 'root'),
+            'password': os.getenv('MYSQL_PASSWORD', ''),
+            'database': os.getenv('MYSQL_DATABASE', 'inventory_db'),
+            'port': int(os.getenv('MYSQL_PORT', 3306))
+        }
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.revalidate_interval = revalidate_interval
+        self.max_events = max_events
+        self.keep_events = min(keep_events, max_events)
+        self.idle_ttl = idle_ttl
+        self.purge_interval = purge_interval
+        self._cache: "OrderedDict[tuple, _CachedSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_purge = time.monotonic()
+        self._stats = {
+            'hits': 0, 'memory_hits': 0, 'misses': 0, 'event_loads': 0,
+            'evictions': 0, 'compactions': 0, 'purged': 0,
+        }
+
+    def _get_connection(self):
+        """Check out a connection from the shared pool."""
+        try:
+            return get_pool(self.config).get_connection()
+        except mysql_error() as e:
+            raise ConnectionError(f"Failed to connect to MySQL: {e}")
+
+    def init_tables(self):
+        """Create the session tables if they don't exist."""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            for statement in TABLES:
+                cursor.execute(statement)
+            conn.commit()
+            cursor.close()
+        print("✓ Session tables ready")
+
+    # --- hot session cache ---
+
+    def _cache_get(self, key: tuple, revision: int) -> Optional[_CachedSession]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry.revision != revision or time.monotonic() - entry.touched_at > self.cache_ttl:
+                if entry is not None:
+                    del self._cache[key]
+                self._stats['misses'] += 1
+                return None
+            entry.touched_at = time.monotonic()
+            self._cache.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+
+    def _memory_hit(self, key: tuple, config: Optional[GetSessionConfig]) -> Optional[Session]:
+        """The session straight from the cache, if it was validated against
+        storage recently and holds the events `config` asks for."""
+        with self._lock:
+            entry = self._cache.get(key)
+            now = time.monotonic()
+            if (entry is None or now - entry.validated_at > self.revalidate_interval
+                    or now - entry.touched_at > self.cache_ttl):
+                return None
+            if entry.events_loaded:
+                events = _filter_events(entry.session.events, config)
+            elif config is not None and config.num_recent_events == 0:
+                events = []
+            else:
+                return None
+            entry.touched_at = now
+            self._cache.move_to_end(key)
+            self._stats['memory_hits'] += 1
+            return self._returned_copy(entry, events)
+
+    def _cache_put(self, key: tuple, entry: _CachedSession):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            now = time.monotonic()
+            # Least recently touched first: drop idle entries, then any beyond capacity
+            while self._cache:
+                oldest_key, oldest = next(iter(self._cache.items()))
+                if len(self._cache) <= self.cache_size and now - oldest.touched_at <= self.cache_ttl:
+                    break
+                del self._cache[oldest_key]
+                self._stats['evictions'] += 1
+
+    def _cache_drop(self, key: tuple):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Cache and maintenance counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached_sessions'] = len(self._cache)
+        return stats
+
+    # --- storage helpers (blocking; called off the event loop) ---
+
+    def _scoped_state(self, cursor, app_name: str, user_id: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        """App state, and user state keyed by user, as prefixed state keys."""
+        cursor.execute("SELECT state_key, value FROM adk_app_state WHERE app_name = %s", (app_name,))
+        app_state = {State.APP_PREFIX + key: json.loads(value) for key, value in cursor.fetchall()}
+        if user_id is None:
+            cursor.execute("SELECT user_id, state_key, value FROM adk_user_state WHERE app_name = %s", (app_name,))
+        else:
+            cursor.execute(
+                "SELECT user_id, state_key, value FROM adk_user_state WHERE app_name = %s AND user_id = %s",
+                (app_name, user_id)
+            )
+        user_states: Dict[str, Dict[str, Any]] = {}
+        for uid, key, value in cursor.fetchall():
+            user_states.setdefault(uid, {})[State.USER_PREFIX + key] = json.loads(value)
+        return {'app': app_state, 'users': user_states}
+
+    def _write_scoped_state(self, cursor, app_name: str, user_id: str, deltas: Dict[str, Dict[str, Any]]):
+        if deltas['app']:
+            cursor.executemany(
+                "INSERT INTO adk_app_state (app_name, state_key, value) VALUES (%s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+                [(app_name, key, json.dumps(value)) for key, value in deltas['app'].items()]
+            )
+        if deltas['user']:
+            cursor.executemany(
+                "INSERT INTO adk_user_state (app_name, user_id, state_key, value) VALUES (%s, %s, %s, %s) "
+                "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+                [(app_name, user_id, key, json.dumps(value)) for key, value in deltas['user'].items()]
+            )
+
+    def _load_events(self, cursor, key: tuple, config: Optional[GetSessionConfig]) -> List[Event]:
+        """Stored events, fetching only the tail the config asks for."""
+        with self._lock:
+            self._stats['event_loads'] += 1
+        query = f"SELECT event_data FROM adk_session_events WHERE {EVENT_KEY}"
+        params = list(key)
+        if config is not None and config.after_timestamp is not None:
+            query += " AND timestamp >= %s"
+            params.append(config.after_timestamp)
+        if config is not None and config.num_recent_events is not None:
+            cursor.execute(query + " ORDER BY seq DESC LIMIT %s", params + [config.num_recent_events])
+            rows = cursor.fetchall()[::-1]
+        else:
+            cursor.execute(query + " ORDER BY seq", params)
+            rows = cursor.fetchall()
+        return [Event.model_validate_json(data) for data, in rows]
+
+    def _returned_copy(self, entry: _CachedSession, events: List[Event]) -> Session:
+        """A copy for the caller: its own events list and state, with app/user state merged."""
+        session = entry.session.model_copy(update={'events': list(events), 'state': dict(entry.session.state)})
+        session.state.update(entry.scoped['app'])
+        session.state.update(entry.scoped['users'].get(session.user_id, {}))
+        session._storage_update_marker = str(entry.revision)
+        return session
+
+    def _create_session_sync(self, app_name, user_id, state, session_id) -> Session:
+        session_id = (session_id.strip() if session_id else None) or str(uuid.uuid4())
+        deltas = _session_util.extract_state_delta(state or {})
+        now = time.time()
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "INSERT INTO adk_sessions (app_name, user_id, id, state, create_time, update_time) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (app_name, user_id, session_id, json.dumps(deltas['session']), now, now)
+                )
+            except mysql_error() as e:
+                conn.rollback()
+                if getattr(e, 'errno', None) == DUPLICATE_ENTRY:
+                    raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+                raise
+            self._write_scoped_state(cursor, app_name, user_id, deltas)
+            conn.commit()
+            scoped = self._scoped_state(cursor, app_name, user_id)
+            cursor.close()
+
+        session = Session(app_name=app_name, user_id=user_id, id=session_id, state=deltas['session'], last_update_time=now)
+        entry = _CachedSession(session, revision=0, events_loaded=True, event_count=0, scoped=scoped)
+        self._cache_put((app_name, user_id, session_id), entry)
+        self._maybe_purge()
+        return self._returned_copy(entry, [])
+
+    def _get_session_sync(self, app_name, user_id, session_id, config) -> Optional[Session]:
+        key = (app_name, user_id, session_id.strip() if session_id else session_id)
+        session = self._memory_hit(key, config)
+        if session is not None:
+            return session
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT state, update_time, revision, event_count FROM adk_sessions WHERE {SESSION_KEY}", key)
+            row = cursor.fetchone()
+            if row is None:
+                cursor.close()
+                self._cache_drop(key)
+                return None
+            state, update_time, revision, event_count = row
+            scoped = self._scoped_state(cursor, app_name, user_id)
+
+            entry = self._cache_get(key, revision)
+            if entry is None:
+                session = Session(
+                    app_name=app_name, user_id=user_id, id=key[2],
+                    state=json.loads(state), last_update_time=update_time
+                )
+                entry = _CachedSession(session, revision, events_loaded=False, event_count=event_count, scoped=scoped)
+            entry.scoped = scoped
+            entry.validated_at = time.monotonic()
+
+            if entry.events_loaded:
+                events = _filter_events(entry.session.events, config)
+            elif config is not None and config.num_recent_events == 0:
+                events = []
+            elif config is None or (config.num_recent_events is None and config.after_timestamp is None):
+                # Full history requested: load it once and keep it hot
+                entry.session.events = self._load_events(cursor, key, None)
+                entry.events_loaded = True
+                events = entry.session.events
+            else:
+                # Only a tail: fetch just that, without caching a partial history
+                events = self._load_events(cursor, key, config)
+            cursor.close()
+
+        self._cache_put(key, entry)
+        return self._returned_copy(entry, events)
+
+    def _list_sessions_sync(self, app_name, user_id) -> ListSessionsResponse:
+        query = "SELECT user_id, id, state, update_time FROM adk_sessions WHERE app_name = %s"
+        params = [app_name]
+        if user_id is not None:
+            query += " AND user_id = %s"
+            params.append(user_id)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query + " ORDER BY update_time, user_id, id", params)
+            rows = cursor.fetchall()
+            scoped = self._scoped_state(cursor, app_name, user_id)
+            cursor.close()
+
+        sessions = []
+        for uid, sid, state, update_time in rows:
+            state = json.loads(state)
+            state.update(scoped['app'])
+            state.update(scoped['users'].get(uid, {}))
+            sessions.append(Session(app_name=app_name, user_id=uid, id=sid, state=state, last_update_time=update_time))
+        return ListSessionsResponse(sessions=sessions)
+
+    def _delete_session_sync(self, app_name, user_id, session_id):
+        key = (app_name, user_id, session_id.strip() if session_id else session_id)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"DELETE FROM adk_session_events WHERE {EVENT_KEY}", key)
+            cursor.execute(f"DELETE FROM adk_sessions WHERE {SESSION_KEY}", key)
+            conn.commit()
+            cursor.close()
+        self._cache_drop(key)
+
+    def _get_user_state_sync(self, app_name, user_id) -> Dict[str, Any]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT state_key, value FROM adk_user_state WHERE app_name = %s AND user_id = %s",
+                (app_name, user_id)
+            )
+            state = {key: json.loads(value) for key, value in cursor.fetchall()}
+            cursor.close()
+        return state
+
+    def _append_event_sync(self, session: Session, event: Event):
+        """Persist an event and its state delta; raises StaleSessionError if
+        another writer updated the session since `session` was read."""
+        key = (session.app_name, session.user_id, session.id)
+        deltas = _session_util.extract_json_safe_state_delta(event.actions.state_delta or {})
+        new_state = _session_state(session.state)
+        new_state.update(deltas['session'])
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT revision, update_time, event_count FROM adk_sessions WHERE {SESSION_KEY} FOR UPDATE", key
+            )
+            row = cursor.fetchone()
+            if row is None:
+                conn.rollback()
+                cursor.close()
+                raise SessionNotFoundError(f"Session {session.id} not found.")
+            revision, update_time, event_count = row
+            marker = session._storage_update_marker
+            if (marker is not None and marker != str(revision)) or (marker is None and update_time > session.last_update_time):
+                conn.rollback()
+                cursor.close()
+                self._cache_drop(key)
+                raise StaleSessionError(
+                    "The session has been modified in storage since it was loaded. "
+                    "Please reload the session before appending more events."
+                )
+
+            cursor.execute(
+                "INSERT INTO adk_session_events "
+                "(app_name, user_id, session_id, event_id, author, timestamp, event_data) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                key + (event.id, event.author, event.timestamp, event.model_dump_json(exclude_none=True))
+            )
+            cursor.execute(
+                "UPDATE adk_sessions SET state = %s, update_time = %s, revision = revision + 1, "
+                f"event_count = event_count + 1 WHERE {SESSION_KEY}",
+                (json.dumps(new_state, default=str), event.timestamp) + key
+            )
+            self._write_scoped_state(cursor, session.app_name, session.user_id, deltas)
+            conn.commit()
+            cursor.close()
+
+        session._storage_update_marker = str(revision + 1)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry.revision == revision:
+                entry.revision = revision + 1
+                entry.session.state = new_state
+                entry.session.last_update_time = event.timestamp
+                entry.event_count = event_count + 1
+                # The row was locked at `revision`: the entry is current
+                entry.touched_at = entry.validated_at = time.monotonic()
+                if entry.events_loaded:
+                    entry.session.events.append(event)
+            elif entry is not None:
+                del self._cache[key]
+            if deltas['app'] or deltas['user']:
+                self._update_scoped_locked(session.app_name, session.user_id, deltas)
+
+        if event_count + 1 > self.max_events:
+            self.compact_session(*key)
+
+    def _update_scoped_locked(self, app_name: str, user_id: str, deltas: Dict[str, Dict[str, Any]]):
+        """Apply app/user state just written to every hot session sharing it.
+
+        The dicts are replaced, not updated, as copies are made from them
+        outside the lock.
+        """
+        app = {State.APP_PREFIX + key: value for key, value in deltas['app'].items()}
+        user = {State.USER_PREFIX + key: value for key, value in deltas['user'].items()}
+        for entry in self._cache.values():
+            if entry.session.app_name != app_name:
+                continue
+            users = entry.scoped['users']
+            if user and (user_id in users or entry.session.user_id == user_id):
+                users = dict(users, **{user_id: {**users.get(user_id, {}), **user}})
+            entry.scoped = {'app': {**entry.scoped['app'], **app}, 'users': users}
+
+    def compact_session(self, app_name: str, user_id: str, session_id: str) -> int:
+        """Delete all but about `keep_events` of a session's newest events.
+
+        The cut is moved forward to the start of a user turn, or when no user
+        message is among the kept events, to the first one that is not a tool
+        response, so a tool call is never separated from its response.
+        Returns the number of events deleted.
+        """
+        key = (app_name, user_id, session_id)
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT seq FROM adk_session_events WHERE {EVENT_KEY} ORDER BY seq DESC LIMIT 1 OFFSET %s",
+                key + (self.keep_events - 1,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.close()
+                return 0
+            cursor.execute(
+                f"SELECT seq FROM adk_session_events WHERE {EVENT_KEY} AND author = 'user' AND seq >= %s "
+                "ORDER BY seq LIMIT 1",
+                key + (row[0],)
+            )
+            cut = cursor.fetchone()
+            if cut is None:
+                # One long run of tool calls: cut before the first event that is not a tool response
+                cursor.execute(
+                    f"SELECT seq, event_data FROM adk_session_events WHERE {EVENT_KEY} AND seq >= %s ORDER BY seq",
+                    key + (row[0],)
+                )
+                cut = next(
+                    (seq for seq, data in cursor.fetchall() if not _is_tool_response(Event.model_validate_json(data))),
+                    None
+                )
+                cut = (cut,) if cut is not None else None
+            if cut is None:
+                cursor.close()
+                return 0
+            cursor.execute(f"DELETE FROM adk_session_events WHERE {EVENT_KEY} AND seq < %s", key + (cut[0],))
+            deleted = cursor.rowcount
+            cursor.execute(
+                f"UPDATE adk_sessions SET event_count = GREATEST(event_count - %s, 0) WHERE {SESSION_KEY}",
+                (deleted,) + key
+            )
+            conn.commit()
+            cursor.close()
+
+        # The hot copy still holds the deleted events; reload on next use
+        self._cache_drop(key)
+        with self._lock:
+            self._stats['compactions'] += 1
+        return deleted
+
+    def purge_idle_sessions(self, max_idle_seconds: float) -> int:
+        """Delete sessions (and their events) not updated for `max_idle_seconds`."""
+        cutoff = time.time() - max_idle_seconds
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE e FROM adk_session_events e JOIN adk_sessions s "
+                "ON e.app_name = s.app_name AND e.user_id = s.user_id AND e.session_id = s.id "
+                "WHERE s.update_time < %s",
+                (cutoff,)
+            )
+            cursor.execute("DELETE FROM adk_sessions WHERE update_time < %s", (cutoff,))
+            purged = cursor.rowcount
+            conn.commit()
+            cursor.close()
+        with self._lock:
+            self._stats['purged'] += purged
+        return purged
+
+    def _maybe_purge(self):
+        if not self.idle_ttl:
+            return
+        with self._lock:
+            if time.monotonic() - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = time.monotonic()
+        try:
+            self.purge_idle_sessions(self.idle_ttl)
+        except Exception as e:
+            print(f"⚠️ Purging idle sessions failed: {e}")
+
+    # --- BaseSessionService ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        return await asyncio.to_thread(self._create_session_sync, app_name, user_id, state, session_id)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        return await asyncio.to_thread(self._get_session_sync, app_name, user_id, session_id, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await asyncio.to_thread(self._list_sessions_sync, app_name, user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await asyncio.to_thread(self._delete_session_sync, app_name, user_id, session_id)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._get_user_state_sync, app_name, user_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        # Temp state is visible for the rest of the invocation but never stored
+        self._apply_temp_state(session, event)
+        event = self._trim_temp_delta_state(event)
+        await asyncio.to_thread(self._append_event_sync, session, event)
+        return self._commit_event_to_session(session, event)
+
+
+def create_session_service() -> BaseSessionService:
+    """MySQL-backed session service when USE_MYSQL is set, in-memory otherwise.
+
+    SESSION_CACHE_SIZE (1000), SESSION_CACHE_TTL (600s),
+    SESSION_REVALIDATE_INTERVAL (2s), SESSION_MAX_EVENTS (200),
+    SESSION_KEEP_EVENTS (100) and SESSION_IDLE_TTL (unset: keep forever)
+    tune the MySQL service.
+    """
+    from .database import use_mysql
+    if not use_mysql():
+        return InMemorySessionService()
+    idle_ttl = os.getenv('SESSION_IDLE_TTL')
+    return MySQLSessionService(
+        cache_size=int(os.getenv('SESSION_CACHE_SIZE', 1000)),
+        cache_ttl=float(os.getenv('SESSION_CACHE_TTL', 600)),
+        revalidate_interval=float(os.getenv('SESSION_REVALIDATE_INTERVAL', 2)),
+        max_events=int(os.getenv('SESSION_MAX_EVENTS', 200)),
+        keep_events=int(os.getenv('SESSION_KEEP_EVENTS', 100)),
+        idle_ttl=float(idle_ttl) if idle_ttl else None
+    )
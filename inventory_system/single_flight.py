@@ -0,0 +1,147 @@
+"""
+Single-flight call coalescing.
+
+Concurrent calls with the same key share one execution: the first caller
+runs it and every caller that arrives while it is in flight gets the same
+result (or exception) instead of running it again. Nothing is cached once
+the call returns. SingleFlight serves threads; AsyncSingleFlight serves
+coroutines without blocking the event loop. A Generation shared by the
+wrappers of one backend keys reads by the writes made before them.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'executions': 0, 'coalesced': 0}
+
+    def count(self, coalesced: bool):
+        with self._lock:
+            self._stats['calls'] += 1
+            self._stats['coalesced' if coalesced else 'executions'] += 1
+
+    def stats(self, in_flight: int) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats['in_flight'] = in_flight
+        stats['coalesced_rate'] = stats['coalesced'] / stats['calls'] if stats['calls'] else 0.0
+        return stats
+
+
+class Generation:
+    """Thread-safe count of completed writes to a backend.
+
+    Reads keyed by the current value never join a read started before the
+    last write finished.
+    """
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+
+
+class SingleFlight:
+    """Coalesces concurrent calls across threads."""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        """Run fn(*args), or wait for the in-flight call with the same key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        self._counters.count(coalesced=not leader)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict:
+        """Calls, executions and calls served by another caller's execution."""
+        with self._lock:
+            in_flight = len(self._flights)
+        return self._counters.stats(in_flight)
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutine calls on an event loop.
+
+    The shared call runs as its own task, so cancelling the caller that
+    started it does not cancel it for the others. Calls only coalesce with
+    calls on the same event loop; one instance may serve several loops in
+    different threads.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        # Held without awaiting, so it never blocks a loop for long
+        self._lock = threading.Lock()
+        self._counters = _Counters()
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable], *args) -> Any:
+        """Await fn(*args), or the in-flight call with the same key."""
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop
+        key = (id(loop), key)
+        with self._lock:
+            task = self._flights.get(key)
+            leader = task is None
+            if leader:
+                task = self._flights[key] = loop.create_task(fn(*args))
+        self._counters.count(coalesced=not leader)
+        if leader:
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        with self._lock:
+            if self._flights.get(key) is task:
+                del self._flights[key]
+        if not task.cancelled():
+            # Retrieved here so an error nobody waited for is not logged as lost
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Calls, executions and calls served by another caller's execution."""
+        with self._lock:
+            in_flight = len(self._flights)
+        return self._counters.stats(in_flight)
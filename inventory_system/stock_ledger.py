@@ -0,0 +1,467 @@
+"""
+Append-only stock movement ledger for the SQL backends.
+
+With INVENTORY_LEDGER=true every stock change made through the MySQL or
+SQLite backend is recorded as a movement (product, delta, session, tool,
+time) in the same transaction as the change itself. The `products` table
+stays the source of current stock, so reads are unchanged; the ledger adds
+auditing and point-in-time reconstruction. Every
+INVENTORY_LEDGER_SNAPSHOT_EVERY movements the whole table is snapshotted,
+so an as-of query replays at most that many movements.
+
+Usage:
+    uv run python -m inventory_system.stock_ledger history --product Laptop
+    uv run python -m inventory_system.stock_ledger as-of Laptop --at "2026-10-01 12:00"
+    uv run python -m inventory_system.stock_ledger reconcile
+    uv run python -m inventory_system.stock_ledger snapshot
+"""
+
+import argparse
+import contextvars
+import os
+import sys
+import threading
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .config import env_flag, load_env
+
+# Movements inserted per statement (SQLite allows 32766 parameters)
+INSERT_CHUNK = 500
+
+MOVEMENT_COLUMNS = ('id', 'product_name', 'delta', 'session_id', 'tool', 'created_at')
+
+MYSQL_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS stock_movements (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        product_name VARCHAR(100) NOT NULL,
+        delta INT NOT NULL,
+        session_id VARCHAR(255),
+        tool VARCHAR(64),
+        created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+        INDEX idx_product_id (product_name, id),
+        INDEX idx_created (created_at, id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stock_snapshots (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        movement_id BIGINT NOT NULL,
+        taken_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+        INDEX idx_taken (taken_at, id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+        snapshot_id BIGINT NOT NULL,
+        product_name VARCHAR(100) NOT NULL,
+        quantity INT NOT NULL,
+        PRIMARY KEY (snapshot_id, product_name)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+)
+
+# Local time with milliseconds, comparable as text like MySQL's TIMESTAMP
+_SQLITE_NOW = "(strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))"
+
+SQLITE_TABLES = (
+    f"""
+    CREATE TABLE IF NOT EXISTS stock_movements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_name VARCHAR(100) NOT NULL COLLATE NOCASE,
+        delta INTEGER NOT NULL,
+        session_id VARCHAR(255),
+        tool VARCHAR(64),
+        created_at TEXT NOT NULL DEFAULT {_SQLITE_NOW}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_movements_product_id ON stock_movements (product_name, id)",
+    "CREATE INDEX IF NOT EXISTS idx_movements_created ON stock_movements (created_at, id)",
+    f"""
+    CREATE TABLE IF NOT EXISTS stock_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        movement_id INTEGER NOT NULL,
+        taken_at TEXT NOT NULL DEFAULT {_SQLITE_NOW}
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_snapshots_taken ON stock_snapshots (taken_at, id)",
+    """
+    CREATE TABLE IF NOT EXISTS stock_snapshot_items (
+        snapshot_id INTEGER NOT NULL,
+        product_name VARCHAR(100) NOT NULL COLLATE NOCASE,
+        quantity INTEGER NOT NULL,
+        PRIMARY KEY (snapshot_id, product_name)
+    )
+    """,
+)
+
+# (session_id, tool) the stock changes of the current task belong to
+_source: contextvars.ContextVar[Tuple[Optional[str], Optional[str]]] = contextvars.ContextVar(
+    'stock_movement_source', default=(None, None)
+)
+
+
+def ledger_enabled() -> bool:
+    """Whether INVENTORY_LEDGER records stock movements."""
+    return env_flag('INVENTORY_LEDGER')
+
+
+def current_source() -> Tuple[Optional[str], Optional[str]]:
+    """(session_id, tool) recorded with movements made in this context."""
+    return _source.get()
+
+
+@contextmanager
+def movement_source(session_id: Optional[str] = None, tool: Optional[str] = None):
+    """Attribute the stock changes made inside the block to a session and tool."""
+    token = _source.set((session_id, tool))
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+# Tokens of the sources set by record_tool_call, per tool call
+_tool_call_tokens = weakref.WeakKeyDictionary()
+_tool_call_tokens_lock = threading.Lock()
+
+
+def record_tool_call(tool, args, tool_context):
+    """ADK before_tool_callback attributing a tool's stock changes to its session.
+
+    The tool runs in the same task right after this callback, and the
+    context is copied into the threads the backends run on. end_tool_call
+    and end_failed_tool_call restore the previous source once it returns
+    or raises, so later writes in the task are not tagged with this call.
+    """
+    token = _source.set((tool_context.session.id, tool.name))
+    with _tool_call_tokens_lock:
+        _tool_call_tokens[tool_context] = token
+    return None
+
+
+def _end_tool_call(tool_context):
+    with _tool_call_tokens_lock:
+        token = _tool_call_tokens.pop(tool_context, None)
+    if token is not None:
+        try:
+            _source.reset(token)
+        except ValueError:
+            # Set in another context, which ends with its own task
+            pass
+
+
+def end_tool_call(tool, args, tool_context, tool_response):
+    """ADK after_tool_callback pairing record_tool_call."""
+    _end_tool_call(tool_context)
+    return None
+
+
+def end_failed_tool_call(tool, args, tool_context, error):
+    """ADK on_tool_error_callback pairing record_tool_call; the error still propagates."""
+    _end_tool_call(tool_context)
+    return None
+
+
+def _time_param(at: datetime, dialect: str):
+    if dialect == "sqlite":
+        return at.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return at
+
+
+class StockLedger:
+    """Movement and snapshot tables of one SQL database.
+
+    `record` runs inside the backend's own transaction; everything else
+    opens a connection through `connect` (a pooled MySQL connection or the
+    thread's SQLite connection).
+
+    Args:
+        dialect: "mysql" or "sqlite".
+        connect: Returns a connection usable as a context manager.
+        snapshot_every: Movements between automatic snapshots (0 disables them).
+    """
+
+    def __init__(self, dialect: str, connect: Callable, snapshot_every: Optional[int] = None):
+        if dialect not in ("mysql", "sqlite"):
+            raise ValueError(f"Unsupported ledger dialect: {dialect}")
+        load_env()
+        self.dialect = dialect
+        self._connect = connect
+        self.snapshot_every = (
+            int(os.getenv('INVENTORY_LEDGER_SNAPSHOT_EVERY', 10000)) if snapshot_every is None else snapshot_every
+        )
+        self._snapshot_lock = threading.Lock()
+
+    def _sql(self, query: str) -> str:
+        return query.replace("%s", "?") if self.dialect == "sqlite" else query
+
+    @contextmanager
+    def _transaction(self, write: bool = False) -> Iterator:
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            try:
+                if self.dialect == "sqlite":
+                    # Deferred for reads: WAL gives them a consistent snapshot
+                    cursor.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+                yield cursor
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def create_tables(self, cursor):
+        for statement in (MYSQL_TABLES if self.dialect == "mysql" else SQLITE_TABLES):
+            cursor.execute(statement)
+
+    def init_tables(self):
+        """Create the ledger tables, with a baseline snapshot of current stock
+        so that products predating the ledger replay correctly."""
+        with self._transaction(write=True) as cursor:
+            self.create_tables(cursor)
+        with self._transaction(write=True) as cursor:
+            cursor.execute("SELECT 1 FROM stock_snapshots LIMIT 1")
+            if cursor.fetchone() is None:
+                self._snapshot(cursor)
+
+    def record(self, cursor, changes: List[Tuple[str, int]]) -> Optional[int]:
+        """Insert movements in the caller's transaction; returns the last movement ID.
+
+        Zero deltas are not recorded. Call `recorded` once the transaction commits.
+        """
+        rows = [(name, delta) for name, delta in changes if delta]
+        if not rows:
+            return None
+        session_id, tool = current_source()
+        last_id = None
+        if self.dialect == "mysql":
+            # Concurrent multi-row inserts may interleave auto-increment IDs
+            # (innodb_autoinc_lock_mode=2), so each row is inserted on its own
+            # and reports its ID
+            for name, delta in rows:
+                cursor.execute(
+                    "INSERT INTO stock_movements (product_name, delta, session_id, tool) VALUES (%s, %s, %s, %s)",
+                    (name, delta, session_id, tool)
+                )
+                last_id = max(last_id or 0, cursor.lastrowid)
+            return last_id
+        for start in range(0, len(rows), INSERT_CHUNK):
+            chunk = rows[start:start + INSERT_CHUNK]
+            values = ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+            cursor.execute(
+                self._sql(f"INSERT INTO stock_movements (product_name, delta, session_id, tool) VALUES {values}"),
+                [value for name, delta in chunk for value in (name, delta, session_id, tool)]
+            )
+            # BEGIN IMMEDIATE serializes SQLite writers: the IDs are consecutive
+            # and lastrowid is the last one
+            last_id = cursor.lastrowid
+        return last_id
+
+    def recorded(self, last_id: Optional[int], count: int):
+        """Start a background snapshot when committed movements crossed a
+        multiple of `snapshot_every`."""
+        if not last_id or self.snapshot_every <= 0:
+            return
+        if last_id // self.snapshot_every == (last_id - count) // self.snapshot_every:
+            return
+        if not self._snapshot_lock.acquire(blocking=False):
+            return  # One is already running
+
+        def run():
+            try:
+                self.take_snapshot()
+            except Exception as e:
+                print(f"⚠️ Stock snapshot failed: {e}")
+            finally:
+                self._snapshot_lock.release()
+
+        threading.Thread(target=run, name="stock-snapshot", daemon=True).start()
+
+    def _snapshot(self, cursor) -> Tuple[int, int]:
+        if self.dialect == "mysql":
+            # Wait for in-flight stock changes and hold off new ones, so the
+            # copy matches the movement ID exactly (SQLite: BEGIN IMMEDIATE)
+            cursor.execute("SELECT COUNT(*) FROM products LOCK IN SHARE MODE")
+            cursor.fetchone()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM stock_movements")
+        movement_id = cursor.fetchone()[0]
+        cursor.execute(self._sql("INSERT INTO stock_snapshots (movement_id) VALUES (%s)"), (movement_id,))
+        snapshot_id = cursor.lastrowid
+        cursor.execute(self._sql("""
+            INSERT INTO stock_snapshot_items (snapshot_id, product_name, quantity)
+            SELECT %s, product_name, quantity FROM products
+        """), (snapshot_id,))
+        return snapshot_id, movement_id
+
+    def take_snapshot(self) -> Tuple[int, int]:
+        """Snapshot every product's quantity; returns (snapshot ID, last movement ID)."""
+        with self._transaction(write=True) as cursor:
+            return self._snapshot(cursor)
+
+    def _base_snapshot(self, cursor, at: Optional[datetime]) -> Tuple[Optional[int], int]:
+        """(snapshot ID, movement ID) of the latest snapshot taken by `at`."""
+        if at is None:
+            cursor.execute("SELECT id, movement_id FROM stock_snapshots ORDER BY id DESC LIMIT 1")
+        else:
+            cursor.execute(self._sql("""
+                SELECT id, movement_id FROM stock_snapshots
+                WHERE taken_at <= %s ORDER BY taken_at DESC, id DESC LIMIT 1
+            """), (_time_param(at, self.dialect),))
+        row = cursor.fetchone()
+        return (row[0], row[1]) if row else (None, 0)
+
+    def quantity_as_of(self, product_name: str, at: datetime) -> int:
+        """Stock of one product at `at`: its snapshot quantity plus the
+        movements recorded after that snapshot up to `at`."""
+        with self._transaction() as cursor:
+            snapshot_id, movement_id = self._base_snapshot(cursor, at)
+            quantity = 0
+            if snapshot_id is not None:
+                cursor.execute(self._sql(
+                    "SELECT quantity FROM stock_snapshot_items WHERE snapshot_id = %s AND product_name = %s"
+                ), (snapshot_id, product_name))
+                row = cursor.fetchone()
+                quantity = row[0] if row else 0
+            cursor.execute(self._sql("""
+                SELECT COALESCE(SUM(delta), 0) FROM stock_movements
+                WHERE product_name = %s AND id > %s AND created_at <= %s
+            """), (product_name, movement_id, _time_param(at, self.dialect)))
+            return quantity + int(cursor.fetchone()[0])
+
+    def _replay(self, cursor, at: Optional[datetime]) -> Dict[str, Tuple[str, int]]:
+        """casefolded name -> (name, quantity) replayed from the latest snapshot."""
+        snapshot_id, movement_id = self._base_snapshot(cursor, at)
+        stock = {}
+        if snapshot_id is not None:
+            cursor.execute(self._sql(
+                "SELECT product_name, quantity FROM stock_snapshot_items WHERE snapshot_id = %s"
+            ), (snapshot_id,))
+            stock = {name.casefold(): (name, quantity) for name, quantity in cursor.fetchall()}
+
+        query = "SELECT product_name, SUM(delta) FROM stock_movements WHERE id > %s"
+        params = [movement_id]
+        if at is not None:
+            query += " AND created_at <= %s"
+            params.append(_time_param(at, self.dialect))
+        cursor.execute(self._sql(query + " GROUP BY product_name"), params)
+        for name, delta in cursor.fetchall():
+            spelling, quantity = stock.get(name.casefold(), (name, 0))
+            stock[name.casefold()] = (spelling, quantity + int(delta))
+        return stock
+
+    def stock_as_of(self, at: Optional[datetime] = None) -> Dict[str, int]:
+        """Quantity of every product at `at` (None: replay everything recorded)."""
+        with self._transaction() as cursor:
+            return dict(self._replay(cursor, at).values())
+
+    def movements(
+        self,
+        product_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        after_id: int = 0,
+        limit: int = 100
+    ) -> List[Dict]:
+        """Movements in recording order, paged by passing the last `id` as `after_id`."""
+        query = f"SELECT {', '.join(MOVEMENT_COLUMNS)} FROM stock_movements WHERE id > %s"
+        params = [after_id]
+        if product_name is not None:
+            query += " AND product_name = %s"
+            params.append(product_name)
+        if since is not None:
+            query += " AND created_at >= %s"
+            params.append(_time_param(since, self.dialect))
+        if until is not None:
+            query += " AND created_at <= %s"
+            params.append(_time_param(until, self.dialect))
+        query += " ORDER BY id LIMIT %s"
+        params.append(limit)
+        with self._transaction() as cursor:
+            cursor.execute(self._sql(query), params)
+            return [dict(zip(MOVEMENT_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def reconcile(self) -> List[Tuple[str, int, int]]:
+        """(product, stored quantity, replayed quantity) for every product
+        whose `products` row disagrees with the ledger, e.g. after a change
+        made outside the backends."""
+        with self._transaction() as cursor:
+            replayed = self._replay(cursor, None)
+            cursor.execute("SELECT product_name, quantity FROM products")
+            stored = {name.casefold(): (name, quantity) for name, quantity in cursor.fetchall()}
+        mismatches = []
+        for key in sorted(stored.keys() | replayed.keys()):
+            name, quantity = stored.get(key) or replayed[key]
+            expected = replayed.get(key, (name, 0))[1]
+            actual = stored.get(key, (name, 0))[1]
+            if actual != expected:
+                mismatches.append((name, actual, expected))
+        return mismatches
+
+
+def find_ledger(backend) -> Optional[StockLedger]:
+    """The ledger of a backend, looking through cache and metrics wrappers."""
+    while backend is not None:
+        ledger = getattr(backend, 'ledger', None)
+        if ledger is not None:
+            return ledger
+        backend = getattr(backend, 'backend', None)
+    return None
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main():
+    from .database import get_inventory_backend
+
+    parser = argparse.ArgumentParser(description="Inspect the stock movement ledger")
+    commands = parser.add_subparsers(dest="command", required=True)
+    history = commands.add_parser("history", help="list recorded movements")
+    history.add_argument("--product")
+    history.add_argument("--since", type=_parse_time)
+    history.add_argument("--until", type=_parse_time)
+    history.add_argument("--after-id", type=int, default=0)
+    history.add_argument("--limit", type=int, default=50)
+    as_of = commands.add_parser("as-of", help="reconstruct stock at a point in time")
+    as_of.add_argument("product", nargs="?", help="one product (default: all)")
+    as_of.add_argument("--at", type=_parse_time, default=None, help="e.g. '2026-10-01 12:00' (default: now)")
+    commands.add_parser("reconcile", help="compare stored stock with the ledger")
+    commands.add_parser("snapshot", help="snapshot current stock now")
+    args = parser.parse_args()
+
+    ledger = find_ledger(get_inventory_backend())
+    if ledger is None:
+        print("❌ Stock ledger is disabled: set INVENTORY_LEDGER=true with USE_MYSQL or USE_SQLITE")
+        sys.exit(1)
+
+    if args.command == "history":
+        for m in ledger.movements(args.product, args.since, args.until, args.after_id, args.limit):
+            source = ", ".join(filter(None, (m['tool'], m['session_id']))) or "no session"
+            print(f"#{m['id']} {m['created_at']} {m['product_name']}: {m['delta']:+d} ({source})")
+    elif args.command == "as-of":
+        at = args.at or datetime.now()
+        if args.product:
+            print(f"{args.product}: {ledger.quantity_as_of(args.product, at)} units at {at}")
+        else:
+            print(f"📦 Stock at {at}:")
+            for name, quantity in sorted(ledger.stock_as_of(at).items(), key=lambda item: item[0].casefold()):
+                print(f"   {name}: {quantity} units")
+    elif args.command == "reconcile":
+        mismatches = ledger.reconcile()
+        if not mismatches:
+            print("✅ Stored stock matches the ledger")
+        for name, stored, replayed in mismatches:
+            print(f"⚠️ {name}: stored {stored}, ledger {replayed}")
+        sys.exit(1 if mismatches else 0)
+    else:
+        snapshot_id, movement_id = ledger.take_snapshot()
+        print(f"✓ Snapshot {snapshot_id} taken at movement {movement_id}")
+
+
+if __name__ == "__main__":
+    main()
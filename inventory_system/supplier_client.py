@@ -0,0 +1,208 @@
+"""
+HTTP client for the supplier API.
+Reuses keep-alive connections, bounds every request with a timeout, retries
+transient failures and caches search results. Searches can be made from
+threads (requests) or from the event loop (httpx), sharing one cache.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from .config import load_env
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a search: case-insensitive, whitespace-collapsed."""
+    return " ".join(query.split()).casefold()
+
+
+class SupplierClient:
+    """Client for the supplier product search API."""
+
+    def __init__(
+        self,
+        base_url: str = "https://dummyjson.com",
+        timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.25,
+        cache_ttl: float = 300.0,
+        cache_size: int = 256,
+        pool_size: int = 10
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.pool_size = pool_size
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # httpx clients by event loop: their connections belong to the loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+        self._cache = OrderedDict()  # normalized query -> (expires_at, products)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'requests': 0, 'retries': 0, 'errors': 0}
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: a random fraction of the exponential backoff
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _get(self, path: str, params: Dict) -> Dict:
+        """GET with a timeout, retrying transient failures with jittered backoff."""
+        import requests
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self._count('errors')
+                    raise
+            except requests.RequestException:
+                self._count('errors')
+                raise
+            self._count('retries')
+            time.sleep(self._backoff(attempt))
+
+    def _async_client(self):
+        """This event loop's httpx client, opened on first use."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            import httpx
+            client = self._async_clients[loop] = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+        return client
+
+    async def _get_async(self, path: str, params: Dict) -> Dict:
+        """_get for the event loop: the same timeout, retries and backoff."""
+        import httpx
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            self._count('requests')
+            try:
+                response = await self._async_client().get(url, params=params)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response.json()
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    self._count('errors')
+                    raise
+            except httpx.HTTPError:
+                self._count('errors')
+                raise
+            self._count('retries')
+            await asyncio.sleep(self._backoff(attempt))
+
+    def _cached(self, key: str, limit: int) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1][:limit]
+            self._stats['misses'] += 1
+        return None
+
+    def _store(self, key: str, data: Dict) -> List[Dict]:
+        products = data.get('products', [])
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, products)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return products
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Search supplier products, serving repeated queries from the cache.
+
+        Args:
+            query: The product name to search for.
+            limit: Maximum number of products to return. The cache keeps
+                every result, so callers with different limits share entries.
+        """
+        key = normalize_query(query)
+        products = self._cached(key, limit)
+        if products is None:
+            products = self._store(key, self._get("/products/search", {'q': key}))[:limit]
+        return products
+
+    async def search_async(self, query: str, limit: int = 10) -> List[Dict]:
+        """search() without blocking the event loop."""
+        key = normalize_query(query)
+        products = self._cached(key, limit)
+        if products is None:
+            products = self._store(key, await self._get_async("/products/search", {'q': key}))[:limit]
+        return products
+
+    def place_order(self, product_id: int, quantity: int) -> Dict:
+        """Place an order with the supplier and return its confirmation."""
+        # In a real app, this would POST to an API. Here we mock it.
+        return {'product_id': product_id, 'quantity': quantity, 'delivery_days': 2}
+
+    def stats(self) -> Dict:
+        """Cache and request counters for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached_queries'] = len(self._cache)
+        return stats
+
+    def close(self):
+        self.session.close()
+
+    async def aclose(self):
+        """Close this event loop's httpx client."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+_supplier_client: Optional[SupplierClient] = None
+_supplier_client_lock = threading.Lock()
+
+
+def get_supplier_client() -> SupplierClient:
+    """Process-wide supplier client configured from the environment.
+
+    SUPPLIER_API_URL (default https://dummyjson.com), SUPPLIER_TIMEOUT (5s),
+    SUPPLIER_RETRIES (2), SUPPLIER_CACHE_TTL (300s), SUPPLIER_CACHE_SIZE (256).
+    """
+    global _supplier_client
+    with _supplier_client_lock:
+        if _supplier_client is None:
+            load_env()
+            _supplier_client = SupplierClient(
+                base_url=os.getenv('SUPPLIER_API_URL', 'https://dummyjson.com'),
+                timeout=float(os.getenv('SUPPLIER_TIMEOUT', 5.0)),
+                retries=int(os.getenv('SUPPLIER_RETRIES', 2)),
+                cache_ttl=float(os.getenv('SUPPLIER_CACHE_TTL', 300)),
+                cache_size=int(os.getenv('SUPPLIER_CACHE_SIZE', 256))
+            )
+        return _supplier_client
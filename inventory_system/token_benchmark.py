@@ -0,0 +1,109 @@
+"""
+Context tokens per session on the bundled eval set.
+
+Replays every eval case through the real Runner, tools and backend with a
+scripted fake model calling the tools the case expects, and sums the prompt
+tokens (~4 characters per token) of every model call in the session. Tool
+results are re-sent on every later model call, so their size dominates.
+
+With --rounds N every case runs as one turn of a single long session,
+repeated N times, to measure INVENTORY_CONTEXT_BUDGET compaction.
+
+Usage:
+    uv run python -m inventory_system.token_benchmark --output tokens.json
+    INVENTORY_CONTEXT_BUDGET=2000 uv run python -m inventory_system.token_benchmark --rounds 5 --extra-products 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from typing import Dict, List
+from .benchmark import start_supplier_stub
+from .eval_runner import EVAL_SCRIPTS, load_eval_cases
+
+async def measure(eval_set: str, rounds: int = 0, extra_products: int = 0) -> Dict:
+    from google.adk import Runner
+    from google.genai import types
+    from .agent import create_inventory_agent
+    from .context_budget import get_context_compactor
+    from .database import get_inventory_backend
+    from .fake_llm import ScriptedLlm
+    from .session_store import create_session_service
+
+    cases = load_eval_cases(eval_set)
+    model = ScriptedLlm(scripts={
+        case["input"]: EVAL_SCRIPTS.get(case["id"], ["I'm an Inventory Manager agent."]) for case in cases
+    })
+    if extra_products:
+        get_inventory_backend().update_stock_many({f"Product {i:05d}": 5 + i % 40 for i in range(extra_products)})
+    session_service = create_session_service()
+    runner = Runner(agent=create_inventory_agent(model), app_name="token_benchmark", session_service=session_service)
+
+    async def run_session(session_id: str, messages: List[str]) -> Dict:
+        await session_service.create_session(app_name="token_benchmark", user_id="eval", session_id=session_id)
+        prompt_tokens = model_calls = tool_result_chars = 0
+        for message in messages:
+            content = types.Content(role="user", parts=[types.Part(text=message)])
+            async for event in runner.run_async(user_id="eval", session_id=session_id, new_message=content):
+                if event.usage_metadata and event.usage_metadata.prompt_token_count:
+                    prompt_tokens += event.usage_metadata.prompt_token_count
+                    model_calls += 1
+                for response in event.get_function_responses():
+                    tool_result_chars += len(str(response.response))
+        return {
+            'prompt_tokens': prompt_tokens,
+            'model_calls': model_calls,
+            'tool_result_chars': tool_result_chars,
+        }
+
+    sessions = {}
+    if rounds:
+        messages = [case["input"] for case in cases] * rounds
+        sessions[f"long_session_x{rounds}"] = await run_session(str(uuid.uuid4()), messages)
+    else:
+        for case in cases:
+            sessions[case["id"]] = await run_session(str(uuid.uuid4()), [case["input"]])
+
+    total = sum(s['prompt_tokens'] for s in sessions.values())
+    compactor = get_context_compactor()
+    return {
+        'eval_set': eval_set,
+        'sessions': len(sessions),
+        'prompt_tokens_total': total,
+        'prompt_tokens_per_session': round(total / len(sessions), 1) if sessions else 0.0,
+        'tool_result_chars_total': sum(s['tool_result_chars'] for s in sessions.values()),
+        'context_budget': compactor.stats() if compactor else None,
+        'by_case': sessions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per session on an eval set, with a scripted model")
+    parser.add_argument("--eval-set", default="basic_inventory_tests")
+    parser.add_argument(
+        "--rounds", type=int, default=0,
+        help="run every case as a turn of one long session, this many times over"
+    )
+    parser.add_argument("--extra-products", type=int, default=0, help="add this many products to the catalog first")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    stub = start_supplier_stub()
+    os.environ['SUPPLIER_API_URL'] = f"http://127.0.0.1:{stub.server_port}"
+    try:
+        report = asyncio.run(measure(args.eval_set, args.rounds, args.extra_products))
+    finally:
+        stub.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✓ Report written to {args.output}")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,274 @@
-import requests
-from typing import Dict, Optional
-from .database import _inventory_backend
+from typing import Dict, List, Optional, Tuple, Union
+from . import restock
+from .database import get_inventory_backend
+from .instrumentation import is_error_result
+from .name_resolver import ProductNameResolver, get_name_resolver, resolver_enabled
+from .results import (
+    DATABASE_ERROR, NO_PRODUCTS, RESTOCK_FAILED, SUPPLIER_ERROR, UNKNOWN_PRODUCT,
+    StockChange, StockError, StockLevel
+)
+from .supplier_client import get_supplier_client
+
+# Upper bound on products returned per list_products call, to keep tool output small
+MAX_LIST_LIMIT = 100
+
+# Messages of unknown_product errors from the update tools
+NEW_PRODUCT_HINT = "Unknown product. To add it as a new product, call update_inventory with new_product=true."
+MANY_UNKNOWN_HINT = "Unknown product. No changes applied. Add new products one at a time with update_inventory."
+
+def list_products(offset: int = 0, limit: int = 50, prefix: str = "") -> Dict:
+    """Lists products available in the inventory with their current stock levels.
+    Results are paginated; call again with the suggested offset to see more.
+
+    Args:
+        offset: How many products to skip (for pagination).
+        limit: Maximum number of products to return (at most 100).
+        prefix: Only list products whose name starts with this text.
 
-def list_products() -> str:
-    """Lists all products available in the inventory with their current stock levels.
-    
     Returns:
-        A formatted string listing all products and quantities.
+        {"products": {name: quantity}}, plus "next_offset" when more products
+        are available.
+    """
+    limit = max(1, min(limit, MAX_LIST_LIMIT))
+    offset = max(0, offset)
+    try:
+        # Fetch one extra row to know whether another page exists
+        products = get_inventory_backend().list_products(offset, limit + 1, prefix)
+    except Exception as e:
+        return _error(DATABASE_ERROR, str(e))
+    return _product_page(products, offset, limit)
+
+def _error(code: str, message: str, **details) -> Dict:
+    """Tool response for a failure: the "error" key holds its code."""
+    return {'error': code, 'message': message, **details}
+
+def _product_page(products, offset: int, limit: int) -> Dict:
+    """list_products response for a page fetched with one extra row as a lookahead."""
+    page = {'products': dict(products[:limit])}
+    if len(products) > limit:
+        page['next_offset'] = offset + limit
+    return page
+
+StockResult = Union[StockLevel, StockChange, List[StockLevel], List[StockChange], StockError]
+
+def _stock_response(result: StockResult) -> Dict:
+    """Compact tool response for a backend result.
+
+    Readings become {"stock": {name: quantity}} and updates
+    {"updated": {name: [old, new]}}.
     """
-    # Get list from backend
-    if hasattr(_inventory_backend, '_db'):
-        # In-memory backend
-        products = _inventory_backend._db
-    else:
-        # MySQL backend - we'll need to add a method to get all products
-        # For now, return the known products
-        products = {"Laptop": 5, "Smartphone": 20, "Headphones": 50}
-    
-    result = "Available Products:\n"
-    for product, qty in products.items():
-        result += f"- {product}: {qty} units\n"
-    return result
-
-def check_inventory(product_name: str) -> str:
+    if isinstance(result, StockError):
+        return result.to_dict()
+    if isinstance(result, (StockLevel, StockChange)):
+        result = [result]
+    if not result:
+        return _error(NO_PRODUCTS, "No products specified")
+    if isinstance(result[0], StockLevel):
+        return {'stock': {level.product: level.quantity for level in result}}
+    return {'updated': {change.product: [change.old, change.new] for change in result}}
+
+def _name_resolver() -> Optional[ProductNameResolver]:
+    return get_name_resolver() if resolver_enabled() else None
+
+def _resolve_names(
+    resolver: Optional[ProductNameResolver], product_names: List[str], allow_new: bool = False,
+    existing_only: bool = False
+) -> Tuple[Dict[str, str], Optional[Dict]]:
+    """Map requested names to canonical ones before touching storage.
+
+    Returns (requested -> canonical, None), or (partial mapping, error) when
+    a name is unknown but close to existing products; the error lists the
+    suggestions per requested name. Names with no similar product pass
+    through unchanged (they may be new products), as do all unknown names
+    when `allow_new` is set. With `existing_only` (reads, which would
+    otherwise create the product on MySQL) they are unknown too, with no
+    suggestions.
+    """
+    if resolver is None:
+        return {name: name for name in product_names}, None
+    resolved, unknown = {}, {}
+    for name in product_names:
+        canonical, suggestions = resolver.resolve(name)
+        if canonical is None and (suggestions or existing_only) and not allow_new:
+            unknown[name] = [s for s, _ in suggestions]
+        else:
+            resolved[name] = canonical or name
+    if unknown:
+        return resolved, _error(UNKNOWN_PRODUCT, "Unknown product", suggestions=unknown)
+    return resolved, None
+
+def _record_new_products(resolver: Optional[ProductNameResolver], result: StockResult, product_names):
+    if resolver is not None and not is_error_result(result):
+        resolver.add(product_names)
+
+def _merge_changes(changes: Dict[str, int], resolved: Dict[str, str]) -> Dict[str, int]:
+    """Changes keyed by canonical name; names resolving to the same product are summed."""
+    merged = {}
+    for name, delta in changes.items():
+        merged[resolved[name]] = merged.get(resolved[name], 0) + delta
+    return merged
+
+def _read_names(resolver: Optional[ProductNameResolver], product_names: List[str]) -> Tuple[List[str], Optional[Dict]]:
+    """Canonical names to read stock for, or an unknown_product error.
+
+    Names matching no product never reach storage, where the SQL backends
+    would create them. Shared by the sync and async tools.
+    """
+    resolved, error = _resolve_names(resolver, product_names, existing_only=True)
+    if error:
+        return [], error
+    return list(dict.fromkeys(resolved.values())), None
+
+def _update_name(
+    resolver: Optional[ProductNameResolver], product_name: str, new_product: bool
+) -> Tuple[Optional[str], Optional[Dict]]:
+    """Canonical name to update, or an unknown_product error with a hint."""
+    resolved, error = _resolve_names(resolver, [product_name], allow_new=new_product)
+    if error:
+        return None, dict(error, message=NEW_PRODUCT_HINT)
+    return resolved[product_name], None
+
+def _update_changes(
+    resolver: Optional[ProductNameResolver], changes: Dict[str, int]
+) -> Tuple[Dict[str, int], Optional[Dict]]:
+    """Changes keyed by canonical name, or an unknown_product error with a hint."""
+    resolved, error = _resolve_names(resolver, list(changes))
+    if error:
+        return {}, dict(error, message=MANY_UNKNOWN_HINT)
+    return _merge_changes(changes, resolved), None
+
+def check_inventory(product_name: str) -> Dict:
     """Checks the local inventory for a product's stock level.
 
     Args:
         product_name: The name of the product to check.
+
+    Returns:
+        {"stock": {name: quantity}}.
     """
-    return _inventory_backend.check_stock(product_name)
+    names, error = _read_names(_name_resolver(), [product_name])
+    if error:
+        return error
+    return _stock_response(get_inventory_backend().check_stock(names[0]))
 
-def update_inventory(product_name: str, quantity: int) -> str:
+def update_inventory(product_name: str, quantity: int, new_product: bool = False) -> Dict:
     """Updates the local inventory stock.
 
     Args:
         product_name: The name of the product.
         quantity: The amount to add (positive) or remove (negative).
+        new_product: Set to true only to add a product that is not in the
+            inventory yet but whose name is similar to an existing one.
+
+    Returns:
+        {"updated": {name: [old, new]}}.
+    """
+    resolver = _name_resolver()
+    name, error = _update_name(resolver, product_name, new_product)
+    if error:
+        return error
+    result = get_inventory_backend().update_stock(name, quantity)
+    _record_new_products(resolver, result, [name])
+    return _stock_response(result)
+
+def check_inventory_many(product_names: List[str]) -> Dict:
+    """Checks the local inventory for several products at once.
+
+    Args:
+        product_names: The names of the products to check.
+
+    Returns:
+        {"stock": {name: quantity}}.
+    """
+    names, error = _read_names(_name_resolver(), product_names)
+    if error:
+        return error
+    return _stock_response(get_inventory_backend().check_stock_many(names))
+
+def update_inventory_many(changes: Dict[str, int]) -> Dict:
+    """Updates the local inventory stock of several products in one step.
+    Either every change is applied or none is.
+
+    Args:
+        changes: Mapping of product name to the amount to add (positive) or remove (negative).
+
+    Returns:
+        {"updated": {name: [old, new]}}.
     """
-    return _inventory_backend.update_stock(product_name, quantity)
+    resolver = _name_resolver()
+    merged, error = _update_changes(resolver, changes)
+    if error:
+        return error
+    result = get_inventory_backend().update_stock_many(merged)
+    _record_new_products(resolver, result, merged)
+    return _stock_response(result)
 
-def search_supplier(query: str) -> str:
+def _supplier_results(products: List[Dict]) -> Dict:
+    return {'results': [
+        {'id': p['id'], 'title': p['title'], 'price': p['price'], 'stock': p['stock']} for p in products
+    ]}
+
+def search_supplier(query: str) -> Dict:
     """Searches for products from an external supplier API to check availability and price.
 
     Args:
         query: The product name to search for.
+
+    Returns:
+        {"results": [{"id", "title", "price", "stock"}]}, at most 3.
     """
     try:
-        response = requests.get(f"https://dummyjson.com/products/search?q={query}")
-        response.raise_for_status()
-        data = response.json()
-        products = data.get('products', [])
-        if not products:
-            return f"No products found for '{query}' at supplier."
-        
-        # Return top 3 results
-        result_str = "Supplier Results:\n"
-        for p in products[:3]:
-            result_str += f"- {p['title']} (ID: {p['id']}): ${p['price']} - Stock: {p['stock']}\n"
-        return result_str
+        return _supplier_results(get_supplier_client().search(query, limit=3))
     except Exception as e:
-        return f"Error contacting supplier: {e}"
+        return _error(SUPPLIER_ERROR, str(e))
 
-def place_supplier_order(product_id: int, quantity: int) -> str:
+def place_supplier_order(product_id: int, quantity: int) -> Dict:
     """Places an order with the supplier.
 
     Args:
         product_id: The ID of the product to order (found via search_supplier).
         quantity: The quantity to order.
+
+    Returns:
+        The order confirmation: {"product_id", "quantity", "delivery_days"}.
     """
-    # In a real app, this would POST to an API. Here we mock it.
-    return f"Order placed successfully for Product ID {product_id}, Quantity: {quantity}. Estimated delivery: 2 days."
+    return get_supplier_client().place_order(product_id, quantity)
+
+def plan_restock(threshold: int = 10, target: int = 20) -> Dict:
+    """Finds every product below the stock threshold and plans how much to order
+    from which supplier to bring it up to the target. Nothing is ordered.
+
+    Args:
+        threshold: Products with fewer units than this need restocking.
+        target: Stock level each restocked product should reach.
+
+    Returns:
+        {"plan": {name: {"current", "order", "supplier_id", "price"}},
+        "units", "cost"}; products without a supplier offer have a "skipped"
+        reason instead of the offer.
+    """
+    try:
+        plan = restock.plan_restock(get_inventory_backend(), get_supplier_client(), threshold, target)
+    except Exception as e:
+        return _error(RESTOCK_FAILED, str(e))
+    return restock.summarize_plan(plan)
+
+def execute_restock(threshold: int = 10, target: int = 20) -> Dict:
+    """Restocks the whole catalog in one step: orders every product below the
+    threshold from its supplier and adds the ordered units to the inventory.
+
+    Args:
+        threshold: Products with fewer units than this need restocking.
+        target: Stock level each restocked product should reach.
+
+    Returns:
+        {"restocked": {name: units ordered}}, plus "skipped": {name: reason}
+        for products without a supplier offer.
+    """
+    backend, supplier = get_inventory_backend(), get_supplier_client()
+    try:
+        plan = restock.plan_restock(backend, supplier, threshold, target)
+        result = restock.execute_restock(backend, supplier, plan)
+    except Exception as e:
+        return _error(RESTOCK_FAILED, str(e))
+    return restock.summarize_execution(result)
@@ -2,9 +2,9 @@ import asyncio
 import uuid
 from dotenv import load_dotenv
 from google.adk import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.runners import types
 from inventory_system.agent import create_inventory_agent
+from inventory_system.session_store import create_session_service
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,7 +16,7 @@ async def test_agent(prompt: str):
     print(f"{'='*70}\n")
     
     agent = create_inventory_agent()
-    session_service = InMemorySessionService()
+    session_service = create_session_service()
     app_name = "inventory_app"
     
     runner = Runner(
@@ -0,0 +1,46 @@
+"""
+Tests for the answer cache: what a cached answer is keyed on, and when the
+server gets a cache at all.
+"""
+
+from google.adk.events import Event
+from google.genai import types
+from inventory_system import answer_cache, database
+from inventory_system.answer_cache import AnswerCache, conversation_digest, get_answer_cache
+from inventory_system.database import InMemoryInventory, VersionedInventory
+
+
+def turn(role, text):
+    author = "user" if role == "user" else "inventory_manager"
+    return Event(author=author, content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+def test_answers_are_only_reused_in_the_same_conversation():
+    backend = VersionedInventory(InMemoryInventory())
+    cache = AnswerCache(lambda: backend.version)
+    laptops = [turn("user", "How many laptops?"), turn("model", "We have 5 laptops.")]
+    mice = [turn("user", "How many mice?"), turn("model", "We have 40 mice.")]
+
+    assert conversation_digest([]) == ''
+    assert conversation_digest(laptops) == conversation_digest(list(laptops))
+    assert conversation_digest(laptops) != conversation_digest(mice)
+
+    cache.store("And how many are left?", conversation_digest(laptops), backend.version,
+                "5 laptops are left.", ["check_inventory"])
+    assert cache.lookup("and how many are left", conversation_digest(laptops)).response == "5 laptops are left."
+    assert cache.lookup("And how many are left?", conversation_digest(mice)) is None
+    assert cache.lookup("And how many are left?", '') is None
+
+    backend.update_stock("Laptop", -1)
+    assert cache.lookup("And how many are left?", conversation_digest(laptops)) is None
+
+
+def test_cache_follows_the_flag_the_backend_was_built_with(monkeypatch):
+    monkeypatch.setattr(answer_cache, '_answer_cache', None)
+    monkeypatch.setenv('ANSWER_CACHE', 'true')
+    monkeypatch.setattr(database, '_backend', InMemoryInventory())
+    assert get_answer_cache() is None
+
+    monkeypatch.setenv('ANSWER_CACHE', 'false')
+    monkeypatch.setattr(database, '_backend', VersionedInventory(InMemoryInventory()))
+    assert get_answer_cache() is not None
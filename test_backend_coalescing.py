@@ -0,0 +1,197 @@
+"""
+Stress tests for single-flight read coalescing.
+
+A slow in-memory backend stands in for MySQL and counts the queries that
+reach it, so the tests can compare them with the reads callers made.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from inventory_system.async_backend import CoalescingAsyncInventory, ExecutorInventoryBackend
+from inventory_system.database import CoalescingInventory, InMemoryInventory
+from inventory_system.results import StockLevel
+
+THREADS = 32
+READS_PER_THREAD = 50
+
+
+class SlowInventory(InMemoryInventory):
+    """In-memory backend whose reads take `latency` seconds, like a query."""
+
+    def __init__(self, latency=0.005):
+        super().__init__()
+        self.latency = latency
+        self.queries = Counter()
+        self._queries_lock = threading.Lock()
+        self.fail = False
+
+    def _query(self, name):
+        with self._queries_lock:
+            self.queries[name] += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("connection lost")
+
+    def check_stock(self, product_name):
+        self._query('check_stock')
+        return super().check_stock(product_name)
+
+    def check_stock_many(self, product_names):
+        self._query('check_stock_many')
+        return super().check_stock_many(product_names)
+
+    def list_products(self, offset=0, limit=50, prefix=""):
+        self._query('list_products')
+        return super().list_products(offset, limit, prefix)
+
+
+def run_threads(worker, threads=THREADS):
+    barrier = threading.Barrier(threads)
+
+    def start():
+        barrier.wait()
+        return worker()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(start) for _ in range(threads)]
+        return [future.result() for future in futures]
+
+
+def test_identical_concurrent_reads_share_one_query():
+    backend = SlowInventory(latency=0.1)
+    inventory = CoalescingInventory(backend)
+
+    results = run_threads(lambda: inventory.check_stock("Laptop"))
+
+    assert results == [StockLevel("Laptop", 5)] * THREADS
+    assert backend.queries['check_stock'] <= 2
+    stats = inventory.stats()
+    assert stats['calls'] == THREADS
+    assert stats['coalesced'] == THREADS - backend.queries['check_stock']
+    assert stats['in_flight'] == 0
+
+
+def test_session_start_burst_cuts_backend_queries():
+    # Every new session lists products and checks a few hot ones
+    backend = SlowInventory()
+    inventory = CoalescingInventory(backend)
+    hot = ["Laptop", "Smartphone", "Headphones"]
+
+    def session_starts():
+        rng = random.Random()
+        for _ in range(READS_PER_THREAD):
+            if rng.random() < 0.5:
+                assert len(inventory.list_products()) == 3
+            else:
+                name = rng.choice(hot)
+                assert inventory.check_stock(name).product == name
+
+    run_threads(session_starts)
+
+    reads = THREADS * READS_PER_THREAD
+    queries = sum(backend.queries.values())
+    # About one query in ten reads locally; the ceiling leaves room for slow machines
+    assert 0 < queries <= reads // 4
+    assert inventory.stats()['calls'] == reads
+
+
+def test_read_after_write_does_not_join_earlier_read():
+    backend = SlowInventory(latency=0.2)
+    inventory = CoalescingInventory(backend)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        before = pool.submit(inventory.check_stock, "Laptop")
+        time.sleep(0.05)  # the first read is now in flight
+        inventory.update_stock("Laptop", 1)
+        after = inventory.check_stock("Laptop")
+        before.result()
+
+    assert after == StockLevel("Laptop", 6)
+    assert backend.queries['check_stock'] == 2
+
+
+def test_errors_reach_every_waiter():
+    backend = SlowInventory(latency=0.1)
+    backend.fail = True
+    inventory = CoalescingInventory(backend)
+
+    def read():
+        try:
+            inventory.check_stock_many(["Laptop", "Smartphone"])
+        except RuntimeError as e:
+            return str(e)
+
+    assert run_threads(read) == ["connection lost"] * THREADS
+    # Nothing is kept once the failed call returns
+    backend.fail = False
+    assert inventory.check_stock_many(["Laptop", "Smartphone"]) == [
+        StockLevel("Laptop", 5), StockLevel("Smartphone", 20)
+    ]
+
+
+def test_async_identical_reads_share_one_query():
+    backend = SlowInventory(latency=0.05)
+    executor = ExecutorInventoryBackend(backend, max_workers=4)
+    inventory = CoalescingAsyncInventory(executor)
+
+    async def burst():
+        return await asyncio.gather(*(inventory.check_stock("Laptop") for _ in range(200)))
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        executor.shutdown()
+
+    assert results == [StockLevel("Laptop", 5)] * 200
+    assert backend.queries['check_stock'] == 1
+    assert inventory.stats()['coalesced'] == 199
+
+
+def test_async_read_after_blocking_write_does_not_join_earlier_read():
+    # Tools like execute_restock write through the blocking backend
+    backend = SlowInventory(latency=0.2)
+    inventory = CoalescingInventory(backend)
+    executor = ExecutorInventoryBackend(inventory, max_workers=4)
+    async_inventory = CoalescingAsyncInventory(executor, generation=inventory.generation)
+
+    async def scenario():
+        before = asyncio.ensure_future(async_inventory.check_stock("Laptop"))
+        await asyncio.sleep(0.05)  # the first read is now in flight
+        await asyncio.to_thread(inventory.update_stock, "Laptop", 1)
+        after = await async_inventory.check_stock("Laptop")
+        await before
+        return after
+
+    try:
+        after = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert after == StockLevel("Laptop", 6)
+    assert backend.queries['check_stock'] == 2
+
+
+def test_async_cancelled_caller_does_not_cancel_shared_read():
+    backend = SlowInventory(latency=0.1)
+    executor = ExecutorInventoryBackend(backend, max_workers=2)
+    inventory = CoalescingAsyncInventory(executor)
+
+    async def scenario():
+        first = asyncio.ensure_future(inventory.list_products())
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(inventory.list_products())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    try:
+        products = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+    assert len(products) == 3
+    assert backend.queries['list_products'] == 1
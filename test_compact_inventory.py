@@ -0,0 +1,87 @@
+"""
+Tests for the compact in-memory backend: snapshots, and bulk updates on
+both the NumPy and the pure array('q') paths.
+"""
+
+import pytest
+from inventory_system import compact_inventory
+from inventory_system.compact_inventory import CompactInventory
+from inventory_system.database import create_compact_inventory
+from inventory_system.results import INSUFFICIENT_STOCK, StockChange, StockLevel
+
+# Above the batch size from which updates are vectorized
+BATCH = 100
+
+
+@pytest.fixture(params=["array", "numpy"])
+def numpy_path(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(compact_inventory, '_numpy', None)
+    else:
+        # False: looked up before and not installed
+        monkeypatch.setattr(compact_inventory, '_numpy', False)
+    return request.param
+
+
+def catalog(size):
+    return {f"SKU-{i:05d}": i % 7 for i in range(size)}
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "inventory.snap")
+    inventory = CompactInventory({**catalog(50), "Café": 3, "Überraschung": 0})
+    inventory.update_stock("Laptop", 4)
+    inventory.snapshot(path)
+
+    restored = CompactInventory.restore(path)
+    assert len(restored) == len(inventory)
+    assert restored.list_products(0, 1000) == inventory.list_products(0, 1000)
+    assert restored.check_stock("Café") == StockLevel("Café", 3)
+    # The restored copy is writable and grows like a fresh one
+    assert restored.update_stock("Webcam", 2) == StockChange("Webcam", 0, 2)
+    assert restored.list_products(0, 10, "web") == [("Webcam", 2)]
+
+
+def test_missing_or_empty_snapshot_starts_fresh(tmp_path):
+    empty = tmp_path / "empty.snap"
+    empty.write_bytes(b"")
+    for path in (str(empty), str(tmp_path / "missing.snap")):
+        assert CompactInventory.restore(path).list_products() == CompactInventory().list_products()
+    assert len(create_compact_inventory(str(empty))) == 3
+
+    (tmp_path / "short.snap").write_bytes(b"INVSNAP1")
+    with pytest.raises(ValueError):
+        CompactInventory.restore(str(tmp_path / "short.snap"))
+
+
+def test_bulk_update(numpy_path):
+    inventory = CompactInventory(catalog(BATCH * 2))
+    changes = {f"SKU-{i:05d}": 10 for i in range(0, BATCH * 2, 2)}
+    changes.update({f"NEW-{i:03d}": i + 1 for i in range(BATCH)})
+
+    result = inventory.update_stock_many(changes)
+    assert result[0] == StockChange("SKU-00000", 0, 10)
+    assert result[-1] == StockChange(f"NEW-{BATCH - 1:03d}", 0, BATCH)
+    assert inventory.check_stock("SKU-00002") == StockLevel("SKU-00002", 12)
+    assert inventory.check_stock("SKU-00003") == StockLevel("SKU-00003", 3)
+    assert len(inventory) == BATCH * 3
+    assert inventory.list_products(0, 2, "new") == [("NEW-000", 1), ("NEW-001", 2)]
+
+
+def test_bulk_update_refusal_changes_nothing(numpy_path):
+    inventory = CompactInventory(catalog(BATCH * 2))
+    before = inventory.list_products(0, 1000)
+    changes = {f"SKU-{i:05d}": -1 for i in range(BATCH)}
+    changes["NEW-000"] = 5
+
+    refused = inventory.update_stock_many(changes)
+    assert refused.code == INSUFFICIENT_STOCK
+    assert {level.product for level in refused.insufficient} == {f"SKU-{i:05d}" for i in range(0, BATCH, 7)}
+    assert inventory.list_products(0, 1000) == before
+
+
+def test_low_stock(numpy_path):
+    inventory = CompactInventory(catalog(BATCH))
+    low = inventory.low_stock(1)
+    assert low == [(f"SKU-{i:05d}", 0) for i in range(0, BATCH, 7)]
@@ -0,0 +1,175 @@
+"""
+Tests for paging through conversation history, in the `conversations`
+table and in the monthly archive files.
+
+The logger's history queries run against an in-process stand-in for MySQL:
+an SQLite table with the same columns, returning dict rows with datetimes
+like the MySQL driver's dictionary cursor.
+"""
+
+import re
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from inventory_system.conversation_archive import ConversationArchive
+from inventory_system.conversation_logger import (
+    HISTORY_COLUMNS, KEY_COLUMNS, ConversationLogger, decode_cursor, encode_cursor
+)
+
+START = datetime(2026, 1, 10, 9, 0)
+
+
+class FakeCursor:
+    def __init__(self, db, statements):
+        self._db = db
+        self._statements = statements
+        self._rows = []
+
+    def execute(self, query, params=()):
+        sql = re.sub(r"\s+", " ", query).strip()
+        self._statements.append(sql)
+        cursor = self._db.execute(sql.replace("%s", "?"), params)
+        names = [column[0] for column in cursor.description]
+        self._rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        for row in self._rows:
+            if 'created_at' in row:
+                row['created_at'] = datetime.fromisoformat(row['created_at'])
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db, statements):
+        self._db = db
+        self._statements = statements
+
+    def cursor(self, dictionary=False):
+        assert dictionary
+        return FakeCursor(self._db, self._statements)
+
+    def close(self):
+        pass
+
+
+def turn(row_id, session_id, created_at):
+    return {
+        'id': row_id, 'session_id': session_id, 'user_message': f"question {row_id}",
+        'agent_reasoning': None, 'agent_response': f"answer {row_id}", 'tools_used': "[]",
+        'created_at': created_at,
+    }
+
+
+def turns(first_id, count, start, sessions=("a", "b", "c")):
+    # Pairs of turns share a timestamp, so pages must break ties on id
+    return [
+        turn(first_id + i, sessions[i % len(sessions)], start + timedelta(minutes=i // 2))
+        for i in range(count)
+    ]
+
+
+def history_key(row):
+    return (row['created_at'], row['id'])
+
+
+@pytest.fixture
+def logger(tmp_path, monkeypatch):
+    monkeypatch.setenv('USE_MYSQL', 'true')
+    monkeypatch.setenv('CONVERSATION_LOG_ASYNC', 'false')
+    monkeypatch.setenv('CONVERSATION_ARCHIVE_DIR', str(tmp_path / "archive"))
+    logger = ConversationLogger()
+    db = sqlite3.connect(":memory:")
+    db.execute(f"CREATE TABLE conversations ({', '.join(HISTORY_COLUMNS)})")
+    logger.db, logger.statements = db, []
+    monkeypatch.setattr(logger, '_get_connection', lambda: FakeConnection(db, logger.statements))
+    return logger
+
+
+def store(logger, rows):
+    logger.db.executemany(
+        f"INSERT INTO conversations VALUES ({', '.join('?' * len(HISTORY_COLUMNS))})",
+        [tuple(str(row[col]) if col == 'created_at' else row[col] for col in HISTORY_COLUMNS) for row in rows]
+    )
+
+
+def test_keyset_pages_cover_every_turn_once(logger):
+    rows = turns(1, 23, START)
+    store(logger, rows)
+
+    for newest_first in (True, False):
+        paged = list(logger.iter_history(batch_size=4, newest_first=newest_first))
+        assert [r['id'] for r in paged] == [r['id'] for r in sorted(rows, key=history_key, reverse=newest_first)]
+
+    session_b = [r['id'] for r in sorted(rows, key=history_key, reverse=True) if r['session_id'] == "b"]
+    page, cursor = logger.get_history_page("b", limit=5)
+    assert [r['id'] for r in page] == session_b[:5]
+    page, cursor = logger.get_history_page("b", limit=5, cursor=cursor)
+    assert [r['id'] for r in page] == session_b[5:]
+    assert cursor is None
+
+
+def test_cursor_round_trip(logger):
+    row = turn(42, "a", datetime(2026, 3, 1, 12, 30, 15, 250000))
+    assert decode_cursor(encode_cursor(row)) == ("a", "2026-03-01 12:30:15.250000", 42)
+
+    store(logger, turns(1, 6, START))
+    _, cursor = logger.get_history_page("a", limit=1)
+    with pytest.raises(ValueError):
+        logger.get_history_page("b", cursor=cursor)
+
+
+def test_only_requested_columns_are_read(logger):
+    store(logger, turns(1, 3, START))
+
+    page, _ = logger.get_history_page()
+    assert all(tuple(r) == KEY_COLUMNS for r in page)
+    assert "user_message" not in logger.statements[-1]
+
+    page, _ = logger.get_history_page(columns=["agent_response"])
+    assert page[0]['agent_response'] == "answer 3"
+    assert "user_message" not in logger.statements[-1]
+
+    with pytest.raises(ValueError):
+        logger.get_history_page(columns=["password"])
+
+
+def test_archive_months_are_read_in_order_once(tmp_path):
+    archive = ConversationArchive(str(tmp_path))
+    january, february = turns(1, 6, START), turns(7, 6, START + timedelta(days=31))
+    archive.write(february + january)
+    # An interrupted run archived these again
+    archive.write(january[:2])
+
+    assert archive.months() == [(2026, 1), (2026, 2)]
+    assert [r['id'] for r in archive.iter_rows()] == list(range(1, 13))
+    assert [r['id'] for r in archive.iter_rows(newest_first=True)] == list(range(12, 0, -1))
+    assert [r['id'] for r in archive.iter_rows("a")] == [1, 4, 7, 10]
+
+    after, before = history_key(january[3]), history_key(february[2])
+    assert [r['id'] for r in archive.iter_rows(after=after, before=before)] == [5, 6, 7, 8]
+    assert list(archive.iter_rows("b", columns=['id', 'user_message'], after=after)) == [
+        {'id': 5, 'user_message': "question 5"}, {'id': 8, 'user_message': "question 8"},
+        {'id': 11, 'user_message': "question 11"},
+    ]
+
+
+def test_archived_turns_merge_into_history(logger):
+    archived = turns(1, 10, START)
+    recent = turns(11, 7, START + timedelta(days=60))
+    logger.archive.write(archived + archived[:3])
+    store(logger, recent)
+    everything = archived + recent
+
+    for newest_first in (True, False):
+        paged = list(logger.iter_history(
+            columns=["user_message"], batch_size=3, newest_first=newest_first, include_archived=True
+        ))
+        assert [r['id'] for r in paged] == [r['id'] for r in sorted(everything, key=history_key, reverse=newest_first)]
+        assert all(tuple(r) == KEY_COLUMNS + ("user_message",) for r in paged)
+
+    assert [r['id'] for r in logger.iter_history("c", include_archived=True)] == [3, 6, 9, 13, 16]
+    assert [r['id'] for r in logger.get_conversation_history(limit=9, include_archived=True)] == list(range(17, 8, -1))
+    assert [r['id'] for r in logger.get_conversation_history(limit=9)] == list(range(17, 10, -1))
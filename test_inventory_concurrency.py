@@ -0,0 +1,177 @@
+"""
+Concurrency tests for stock updates.
+
+MySQLInventory is exercised against an in-process stand-in for MySQL that
+executes statements atomically, holds row locks until commit like InnoDB,
+and yields between statements so read-modify-write races would show up.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from inventory_system.database import InMemoryInventory, MySQLInventory
+from inventory_system.results import INSUFFICIENT_STOCK, StockChange, StockError, StockLevel
+
+THREADS = 16
+UPDATES_PER_THREAD = 50
+
+
+class FakeMySQLServer:
+    """Single-table stand-in for the `products` table."""
+
+    def __init__(self, rows):
+        self.rows = dict(rows)
+        self.statements = 0
+        self._mutex = threading.Lock()
+        self._row_lock = threading.Lock()
+        self._lock_owner = None
+
+    def lock_row(self, conn):
+        if self._lock_owner is not conn:
+            self._row_lock.acquire()
+            self._lock_owner = conn
+
+    def unlock_row(self, conn):
+        if self._lock_owner is conn:
+            self._lock_owner = None
+            self._row_lock.release()
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+        self._server = conn.server
+        self._result = []
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def execute(self, query, params=()):
+        sql = re.sub(r"\s+", " ", query).strip()
+        server = self._server
+        # Give other threads a chance to interleave between statements
+        time.sleep(0)
+
+        if sql.startswith("UPDATE products SET quantity = LAST_INSERT_ID(quantity + %s)"):
+            delta, name, _ = params
+            server.lock_row(self._conn)
+            with server._mutex:
+                server.statements += 1
+                current = server.rows.get(name)
+                if current is None or current + delta < 0:
+                    self.rowcount = 0
+                else:
+                    server.rows[name] = current + delta
+                    self.rowcount = 1
+                    self.lastrowid = current + delta
+        elif sql.startswith("SELECT quantity FROM products WHERE product_name = %s"):
+            if sql.endswith("FOR UPDATE"):
+                server.lock_row(self._conn)
+            with server._mutex:
+                server.statements += 1
+                current = server.rows.get(params[0])
+            self._result = [] if current is None else [(current,)]
+        elif sql.startswith("INSERT INTO products (product_name, quantity) VALUES (%s, %s) ON DUPLICATE KEY"):
+            name, quantity, delta = params
+            server.lock_row(self._conn)
+            with server._mutex:
+                server.statements += 1
+                if name in server.rows:
+                    server.rows[name] += delta
+                else:
+                    server.rows[name] = quantity
+                self.rowcount = 1
+        elif sql.startswith("INSERT INTO products (product_name, quantity) VALUES (%s, 0)"):
+            with server._mutex:
+                server.statements += 1
+                server.rows.setdefault(params[0], 0)
+                self.rowcount = 1
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self._result.pop(0) if self._result else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.server.unlock_row(self)
+
+    def rollback(self):
+        self.server.unlock_row(self)
+
+    def close(self):
+        self.server.unlock_row(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def make_mysql_inventory(server):
+    inventory = MySQLInventory()
+    inventory._get_connection = lambda: FakeConnection(server)
+    return inventory
+
+
+def hammer(update, quantity_change):
+    def worker():
+        return [update("Laptop", quantity_change) for _ in range(UPDATES_PER_THREAD)]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        futures = [pool.submit(worker) for _ in range(THREADS)]
+        return [result for future in futures for result in future.result()]
+
+
+def test_mysql_concurrent_restock_loses_no_updates():
+    server = FakeMySQLServer({"Laptop": 5})
+    inventory = make_mysql_inventory(server)
+
+    results = hammer(inventory.update_stock, 1)
+
+    assert server.rows["Laptop"] == 5 + THREADS * UPDATES_PER_THREAD
+    assert all(isinstance(r, StockChange) and r.product == "Laptop" for r in results)
+    # Hot path is a single statement per update
+    assert server.statements == THREADS * UPDATES_PER_THREAD
+
+
+def test_mysql_concurrent_sales_never_go_below_zero():
+    server = FakeMySQLServer({"Laptop": 100})
+    inventory = make_mysql_inventory(server)
+
+    results = hammer(inventory.update_stock, -1)
+
+    assert server.rows["Laptop"] == 0
+    assert sum(isinstance(r, StockChange) for r in results) == 100
+    assert sum(isinstance(r, StockError) and r.code == INSUFFICIENT_STOCK for r in results) == len(results) - 100
+
+
+def test_mysql_update_reports_old_and_new_quantities():
+    server = FakeMySQLServer({"Laptop": 5})
+    inventory = make_mysql_inventory(server)
+
+    assert inventory.update_stock("Laptop", 15) == StockChange("Laptop", 5, 20)
+    assert inventory.update_stock("Laptop", -25) == StockError(
+        INSUFFICIENT_STOCK, "Cannot reduce stock below 0", (StockLevel("Laptop", 20),)
+    )
+    assert inventory.update_stock("Tablet", 3) == StockChange("Tablet", 0, 3)
+    assert server.rows == {"Laptop": 20, "Tablet": 3}
+
+
+def test_in_memory_concurrent_restock_loses_no_updates():
+    inventory = InMemoryInventory()
+
+    hammer(inventory.update_stock, 1)
+
+    assert inventory._db["Laptop"] == 5 + THREADS * UPDATES_PER_THREAD
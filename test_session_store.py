@@ -0,0 +1,218 @@
+"""
+Tests for the MySQL-backed session service.
+
+MySQLSessionService runs against an in-process stand-in for MySQL: an
+SQLite database that executes the service's statements once their MySQL
+dialect is translated. Several services over one stand-in act as worker
+processes sharing a server.
+"""
+
+import asyncio
+import re
+import sqlite3
+import threading
+import pytest
+from google.adk.errors import StaleSessionError
+from google.adk.events import Event
+from google.genai import types
+from inventory_system.session_store import MySQLSessionService
+
+APP, USER = "inventory", "alice"
+
+# MySQL dialect -> SQLite, in order
+TRANSLATIONS = [
+    (r"BIGINT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (r",\s*INDEX \w+ \([^)]*\)", ""),
+    (r"\s*ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;", ""),
+    (r"INSERT INTO (\w+) (.*) ON DUPLICATE KEY UPDATE value = VALUES\(value\)", r"INSERT OR REPLACE INTO \1 \2"),
+    (r"DELETE e FROM (\w+) e JOIN (\w+) s ON (.*) WHERE (.*)",
+     r"DELETE FROM \1 AS e WHERE EXISTS (SELECT 1 FROM \2 s WHERE \3 AND \4)"),
+    (r" FOR UPDATE$", ""),
+    (r"GREATEST\(", "MAX("),
+    (r"%s", "?"),
+]
+
+
+class FakeMySQL:
+    """One shared database; counts the statements it runs."""
+
+    def __init__(self):
+        self.db = sqlite3.connect(":memory:", check_same_thread=False)
+        self.lock = threading.RLock()
+        self.statements = 0
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def execute(self, query, params=()):
+        with self.lock:
+            return self.db.execute(query, params).fetchall()
+
+
+class FakeCursor:
+    def __init__(self, server):
+        self._server = server
+        self._cursor = server.db.cursor()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _sql(self, query):
+        sql = re.sub(r"\s+", " ", query).strip()
+        for pattern, replacement in TRANSLATIONS:
+            sql = re.sub(pattern, replacement, sql)
+        self._server.statements += 1
+        return sql
+
+    def execute(self, query, params=()):
+        with self._server.lock:
+            self._cursor.execute(self._sql(query), tuple(params))
+
+    def executemany(self, query, rows):
+        with self._server.lock:
+            self._cursor.executemany(self._sql(query), rows)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self.server)
+
+    def commit(self):
+        with self.server.lock:
+            self.server.db.commit()
+
+    def rollback(self):
+        with self.server.lock:
+            self.server.db.rollback()
+
+
+@pytest.fixture
+def mysql():
+    return FakeMySQL()
+
+
+@pytest.fixture
+def make_service(mysql):
+    def make_service(**options):
+        service = MySQLSessionService(**options)
+        service._get_connection = mysql.connect
+        service.init_tables()
+        return service
+    return make_service
+
+
+def text_event(author, text):
+    role = "user" if author == "user" else "model"
+    return Event(author=author, content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+def tool_turn(question):
+    """A user message, a tool call, its response and the answer."""
+    call = types.FunctionCall(id="call-1", name="check_inventory", args={'product_name': question})
+    response = types.FunctionResponse(id="call-1", name="check_inventory", response={'stock': {question: 1}})
+    return [
+        text_event("user", question),
+        Event(author="agent", content=types.Content(role="model", parts=[types.Part(function_call=call)])),
+        Event(author="agent", content=types.Content(role="user", parts=[types.Part(function_response=response)])),
+        text_event("agent", f"We have 1 {question}."),
+    ]
+
+
+def append(service, session, *events):
+    async def run():
+        for event in events:
+            await service.append_event(session, event)
+    asyncio.run(run())
+
+
+def get(service, session_id, **kwargs):
+    return asyncio.run(service.get_session(app_name=APP, user_id=USER, session_id=session_id, **kwargs))
+
+
+def create(service, session_id):
+    return asyncio.run(service.create_session(app_name=APP, user_id=USER, session_id=session_id))
+
+
+def test_hot_sessions_are_served_from_memory(mysql, make_service):
+    service = make_service(cache_size=2, revalidate_interval=60)
+    session = create(service, "s1")
+    append(service, session, text_event("user", "hola"))
+
+    statements = mysql.statements
+    first, second = get(service, "s1"), get(service, "s1")
+    assert mysql.statements == statements
+    assert [event.content.parts[0].text for event in second.events] == ["hola"]
+    # Callers get their own copies
+    first.events.clear()
+    assert len(get(service, "s1").events) == 1
+    assert service.stats()['memory_hits'] == 3
+
+    create(service, "s2")
+    create(service, "s3")
+    assert service.stats()['evictions'] == 1
+    assert len(get(service, "s1").events) == 1
+    assert service.stats()['event_loads'] == 1
+
+
+def test_sessions_are_revalidated_after_another_writer(make_service):
+    worker_a = make_service(revalidate_interval=60)
+    worker_b = make_service(revalidate_interval=60)
+    session_a = create(worker_a, "s1")
+    append(worker_a, session_a, text_event("user", "hola"))
+
+    session_b = get(worker_b, "s1")
+    append(worker_b, session_b, text_event("agent", "¡Hola!"))
+
+    # Within the revalidation interval worker A may still serve its copy...
+    assert len(get(worker_a, "s1").events) == 1
+    # ...but cannot write over worker B's event
+    with pytest.raises(StaleSessionError):
+        append(worker_a, session_a, text_event("user", "¿Cuántos laptops hay?"))
+
+    worker_a.revalidate_interval = 0
+    assert [event.author for event in get(worker_a, "s1").events] == ["user", "agent"]
+
+
+def test_compaction_cuts_at_a_user_turn(mysql, make_service):
+    service = make_service(max_events=6, keep_events=3)
+    session = create(service, "s1")
+    append(service, session, *tool_turn("Laptop"), *tool_turn("Mouse")[:3])
+
+    events = get(service, "s1").events
+    assert service.stats()['compactions'] == 1
+    assert [event.author for event in events] == ["user", "agent", "agent"]
+    assert events[0].content.parts[0].text == "Mouse"
+    assert mysql.execute("SELECT event_count FROM adk_sessions WHERE id = 's1'") == [(3,)]
+
+
+def test_idle_sessions_are_purged(mysql, make_service):
+    service = make_service(revalidate_interval=0, idle_ttl=3600, purge_interval=0)
+    session = create(service, "old")
+    append(service, session, text_event("user", "hola"))
+    mysql.execute("UPDATE adk_sessions SET update_time = update_time - 7200 WHERE id = 'old'")
+
+    create(service, "new")
+
+    assert service.stats()['purged'] == 1
+    assert get(service, "old") is None
+    assert get(service, "new") is not None
+    assert mysql.execute("SELECT COUNT(*) FROM adk_session_events") == [(0,)]
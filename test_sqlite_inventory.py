@@ -0,0 +1,109 @@
+"""
+Tests for the SQLite backend, each on its own database file.
+"""
+
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from inventory_system.database import SQLiteInventory
+from inventory_system.results import INSUFFICIENT_STOCK, StockChange, StockError, StockLevel
+
+THREADS = 8
+UPDATES_PER_THREAD = 20
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    monkeypatch.setenv('INVENTORY_LEDGER', 'false')
+    return str(tmp_path / "inventory.db")
+
+
+@pytest.fixture
+def backend(db_path):
+    backend = SQLiteInventory(db_path)
+    yield backend
+    backend.close()
+
+
+def test_new_database_is_seeded_once(db_path, backend):
+    assert backend.list_products(0, 100) == sorted(SQLiteInventory.SAMPLE_DATA)
+    backend.update_stock("Laptop", 2)
+    backend.close()
+
+    reopened = SQLiteInventory(db_path)
+    try:
+        assert reopened.check_stock("laptop") == StockLevel("laptop", 7)
+        assert len(reopened.list_products(0, 100)) == len(SQLiteInventory.SAMPLE_DATA)
+    finally:
+        reopened.close()
+
+
+def test_update_is_refused_below_zero(backend):
+    assert backend.update_stock("Laptop", -3) == StockChange("Laptop", 5, 2)
+
+    refused = backend.update_stock("Laptop", -3)
+    assert isinstance(refused, StockError) and refused.code == INSUFFICIENT_STOCK
+    assert refused.insufficient == (StockLevel("Laptop", 2),)
+    assert backend.check_stock("Laptop") == StockLevel("Laptop", 2)
+
+    # Missing products start at zero
+    assert backend.update_stock("Webcam", 4) == StockChange("Webcam", 0, 4)
+    assert backend.update_stock("Tablet", -1).code == INSUFFICIENT_STOCK
+
+
+def test_update_many_applies_all_changes_or_none(backend):
+    refused = backend.update_stock_many({"Laptop": 1, "Mouse": -10, "Monitor": -20})
+    assert refused.code == INSUFFICIENT_STOCK
+    assert refused.insufficient == (StockLevel("Monitor", 15),)
+    assert backend.check_stock_many(["Laptop", "Mouse", "Monitor"]) == [
+        StockLevel("Laptop", 5), StockLevel("Mouse", 40), StockLevel("Monitor", 15)
+    ]
+
+    # Spellings of one product are merged into one change
+    assert backend.update_stock_many({"Laptop": 1, "LAPTOP": 2, "Webcam": 3}) == [
+        StockChange("Laptop", 5, 8), StockChange("Webcam", 0, 3)
+    ]
+
+
+def test_list_products_by_prefix_and_page(backend):
+    backend.update_stock("Mousepad", 3)
+    backend.update_stock("Mo_dem", 1)
+
+    assert backend.list_products(0, 10, "mo") == [("Mo_dem", 1), ("Monitor", 15), ("Mouse", 40), ("Mousepad", 3)]
+    # LIKE wildcards in the prefix are matched literally
+    assert backend.list_products(0, 10, "Mo_") == [("Mo_dem", 1)]
+
+    pages = [backend.list_products(offset, 2) for offset in range(0, 10, 2)]
+    assert [name for page in pages for name, _ in page] == sorted(name for name, _ in backend.list_products(0, 100))
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 0]
+    assert backend.list_products(0, 0) == []
+
+
+def test_low_stock(backend):
+    assert backend.low_stock(20) == [("Laptop", 5), ("Monitor", 15)]
+    backend.update_stock("Monitor", 5)
+    assert backend.low_stock(20) == [("Laptop", 5)]
+
+
+def test_concurrent_writers_never_oversell(db_path, backend):
+    # A second instance stands in for another process on the same file
+    other = SQLiteInventory(db_path)
+    try:
+        assert other._get_connection().execute("PRAGMA journal_mode").fetchone() == ("wal",)
+        start = threading.Barrier(THREADS)
+
+        def sell(instance):
+            start.wait()
+            return [instance.update_stock("Mouse", -1) for _ in range(UPDATES_PER_THREAD)]
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = [r for batch in pool.map(sell, [backend, other] * (THREADS // 2)) for r in batch]
+
+        sold = [r for r in results if isinstance(r, StockChange)]
+        refused = [r for r in results if isinstance(r, StockError)]
+        assert len(sold) == 40
+        assert {r.code for r in refused} == {INSUFFICIENT_STOCK}
+        assert sorted(r.new for r in sold) == list(range(40))
+        assert backend.check_stock("Mouse") == StockLevel("Mouse", 0)
+    finally:
+        other.close()
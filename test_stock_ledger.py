@@ -0,0 +1,122 @@
+"""
+Tests for the stock movement ledger, over the SQLite backend.
+"""
+
+import sqlite3
+import time
+from datetime import datetime
+import pytest
+from inventory_system import stock_ledger
+from inventory_system.database import SQLiteInventory
+from inventory_system.results import DATABASE_ERROR, INSUFFICIENT_STOCK, StockChange
+from inventory_system.stock_ledger import (
+    current_source, end_failed_tool_call, end_tool_call, movement_source, record_tool_call
+)
+
+
+class Tool:
+    def __init__(self, name):
+        self.name = name
+
+
+class Session:
+    def __init__(self, session_id):
+        self.id = session_id
+
+
+class ToolContext:
+    def __init__(self, session_id):
+        self.session = Session(session_id)
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('INVENTORY_LEDGER', 'true')
+    monkeypatch.setenv('INVENTORY_LEDGER_SNAPSHOT_EVERY', '0')
+    backend = SQLiteInventory(str(tmp_path / "inventory.db"))
+    yield backend
+    backend.close()
+
+
+def moves(backend, product_name=None):
+    return [(m['product_name'], m['delta'], m['session_id'], m['tool'])
+            for m in backend.ledger.movements(product_name)]
+
+
+def stock(backend, product_name):
+    return backend.check_stock(product_name).quantity
+
+
+def test_changes_are_recorded_with_their_source(backend):
+    with movement_source("s1", "update_inventory"):
+        backend.update_stock("Laptop", -2)
+        backend.update_stock_many({"Mouse": 5, "Keyboard": 0, "Webcam": 3})
+    backend.update_stock("Monitor", 1)
+    # Refused changes leave no movement
+    assert backend.update_stock("Laptop", -10).code == INSUFFICIENT_STOCK
+    assert backend.update_stock_many({"Laptop": 1, "Mouse": -100}).code == INSUFFICIENT_STOCK
+
+    assert moves(backend) == [
+        ("Laptop", -2, "s1", "update_inventory"),
+        ("Mouse", 5, "s1", "update_inventory"),
+        ("Webcam", 3, "s1", "update_inventory"),
+        ("Monitor", 1, None, None),
+    ]
+    assert backend.ledger.reconcile() == []
+
+
+def test_movement_commits_or_rolls_back_with_the_change(backend, monkeypatch):
+    record = backend.ledger.record
+
+    def failing_record(cursor, changes):
+        record(cursor, changes)
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(backend.ledger, 'record', failing_record)
+    assert backend.update_stock("Laptop", 1).code == DATABASE_ERROR
+    assert backend.update_stock_many({"Laptop": 1, "Mouse": 1}).code == DATABASE_ERROR
+
+    assert stock(backend, "Laptop") == 5 and stock(backend, "Mouse") == 40
+    assert moves(backend) == []
+
+
+def test_tool_source_is_reset_when_the_tool_fails(backend):
+    tool, context = Tool("update_inventory"), ToolContext("s1")
+
+    record_tool_call(tool, {}, context)
+    assert current_source() == ("s1", "update_inventory")
+    backend.update_stock("Laptop", 1)
+    end_failed_tool_call(tool, {}, context, RuntimeError("boom"))
+    assert current_source() == (None, None)
+
+    record_tool_call(tool, {}, context)
+    end_tool_call(tool, {}, context, {})
+    assert current_source() == (None, None)
+    assert not stock_ledger._tool_call_tokens
+
+    backend.update_stock("Laptop", 1)
+    assert moves(backend, "Laptop") == [("Laptop", 1, "s1", "update_inventory"), ("Laptop", 1, None, None)]
+
+
+def test_stock_as_of_and_reconcile(backend):
+    backend.update_stock("Laptop", 3)
+    time.sleep(0.01)
+    before = datetime.now()
+    time.sleep(0.01)
+    backend.update_stock_many({"Laptop": -6, "Webcam": 4})
+    backend.ledger.take_snapshot()
+    backend.update_stock("Webcam", 1)
+
+    assert backend.ledger.quantity_as_of("Laptop", before) == 8
+    assert backend.ledger.quantity_as_of("Webcam", before) == 0
+    assert backend.ledger.stock_as_of(before)["Laptop"] == 8
+    now = backend.ledger.stock_as_of()
+    assert now["Laptop"] == 2 and now["Webcam"] == 5 and now["Mouse"] == 40
+    assert backend.ledger.quantity_as_of("Webcam", datetime.now()) == 5
+    assert backend.ledger.reconcile() == []
+
+    # A change made behind the backend's back shows up as a mismatch
+    backend._get_connection().execute("UPDATE products SET quantity = 7 WHERE product_name = 'Mouse'")
+    assert backend.ledger.reconcile() == [("Mouse", 7, 40)]
+    assert backend.update_stock("Mouse", 1) == StockChange("Mouse", 7, 8)
+    assert backend.ledger.reconcile() == [("Mouse", 8, 41)]
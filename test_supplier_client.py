@@ -0,0 +1,87 @@
+"""
+Tests for the supplier client's search cache, from threads and from the
+event loop.
+
+A local HTTP server stands in for the supplier API and counts the searches
+that reach it.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from inventory_system.supplier_client import SupplierClient
+
+
+def start_supplier(results=5, failures=0):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            requests_seen.append(query)
+            if len(requests_seen) <= failures:
+                self.send_response(503)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = json.dumps({'products': [
+                {'id': i, 'title': f"{query.title()} {i}", 'price': 100.0 * i, 'stock': 10}
+                for i in range(1, results + 1)
+            ]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests_seen
+
+
+def test_cached_search_honours_each_callers_limit():
+    server, requests_seen = start_supplier()
+    client = SupplierClient(base_url=f"http://127.0.0.1:{server.server_port}")
+    try:
+        # A restock plan looks up one offer, then the agent searches for three
+        assert len(client.search("Laptop", limit=1)) == 1
+        assert [p['id'] for p in client.search("laptop", limit=3)] == [1, 2, 3]
+        assert len(client.search("LAPTOP")) == 5
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert requests_seen == ["laptop"]
+    assert client.stats()['hits'] == 2
+
+
+def test_async_search_shares_the_cache_and_retries():
+    server, requests_seen = start_supplier(failures=1)
+    client = SupplierClient(base_url=f"http://127.0.0.1:{server.server_port}", backoff=0.01)
+
+    async def searches():
+        try:
+            products = await client.search_async("Mouse", limit=2)
+            again = await asyncio.gather(*(client.search_async(" mouse ", limit=3) for _ in range(3)))
+            return products, again
+        finally:
+            await client.aclose()
+
+    try:
+        products, again = asyncio.run(searches())
+        # Cached by the event loop, served to a thread
+        assert len(client.search("MOUSE", limit=5)) == 5
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert [p['id'] for p in products] == [1, 2]
+    assert all([p['id'] for p in result] == [1, 2, 3] for result in again)
+    assert requests_seen == ["mouse", "mouse"]
+    stats = client.stats()
+    assert stats['retries'] == 1 and stats['errors'] == 0 and stats['hits'] == 4
@@ -0,0 +1,60 @@
+"""
+Tests for the tools registered on the agent, over a SQLite database.
+
+SQLite (like MySQL) creates a product on its first read, so these tests
+catch names that reach storage when they should not.
+"""
+
+import asyncio
+import pytest
+from inventory_system import async_backend, database, name_resolver
+from inventory_system.agent import create_inventory_agent
+from inventory_system.async_backend import ExecutorInventoryBackend
+from inventory_system.database import SQLiteInventory
+from inventory_system.fake_llm import ScriptedLlm
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('PRODUCT_RESOLVER', 'true')
+    monkeypatch.setenv('INVENTORY_LEDGER', 'false')
+    backend = SQLiteInventory(str(tmp_path / "inventory.db"))
+    monkeypatch.setattr(database, '_backend', backend)
+    monkeypatch.setattr(async_backend, '_async_backend', ExecutorInventoryBackend(backend, offload=False))
+    monkeypatch.setattr(name_resolver, '_resolver', None)
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def agent_tools(backend):
+    agent = create_inventory_agent(ScriptedLlm(scripts={}))
+    return {tool.__name__: tool for tool in agent.tools}
+
+
+def product_names(backend):
+    return [name for name, _ in backend.list_products(0, 100, "")]
+
+
+def test_registered_read_tools_do_not_create_unknown_products(backend, agent_tools):
+    before = product_names(backend)
+
+    single = asyncio.run(agent_tools['check_inventory']("Zebra crossing"))
+    many = asyncio.run(agent_tools['check_inventory_many'](["Laptop", "Zebra crossing"]))
+
+    assert single == {'error': 'unknown_product', 'message': 'Unknown product', 'suggestions': {'Zebra crossing': []}}
+    assert many['error'] == 'unknown_product'
+    assert product_names(backend) == before
+
+
+def test_registered_read_tools_resolve_and_suggest(backend, agent_tools):
+    assert asyncio.run(agent_tools['check_inventory']("laptops")) == {'stock': {'Laptop': 5}}
+    assert asyncio.run(agent_tools['check_inventory']("Laptp"))['suggestions'] == {'Laptp': ['Laptop']}
+    assert asyncio.run(agent_tools['check_inventory_many'](["mouse", "Keyboards", "MOUSE"])) == {
+        'stock': {'Mouse': 40, 'Keyboard': 30}
+    }
+
+
+def test_registered_update_tool_adds_new_products_to_the_resolver(backend, agent_tools):
+    assert asyncio.run(agent_tools['update_inventory']("Zebra crossing", 3)) == {'updated': {'Zebra crossing': [0, 3]}}
+    assert asyncio.run(agent_tools['check_inventory']("zebra crossings")) == {'stock': {'Zebra crossing': 3}}